@@ -0,0 +1,142 @@
+"""
+Benchmark de concurrence : N sessions simulées partagent une base via AsyncDatabase
+
+Chaque session écrit des émotions à --fps, un message de temps en temps,
+et relit ses statistiques comme la barre latérale.
+
+Usage:
+    python scripts/benchmark_async_db.py --sessions 300 --duration 10
+    python scripts/benchmark_async_db.py --sessions 300 --compare-sync
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.async_database import AsyncDatabase
+from utils.database import DEFAULT_EMOTION_LABELS, MOOD_STATES, Database
+from utils.profiling import percentile
+
+EMOTIONS = list(DEFAULT_EMOTION_LABELS.values())
+MOODS = list(MOOD_STATES.values())
+
+
+class SyncAdapter:
+    """Database bloquante appelée via asyncio.to_thread (référence)"""
+
+    def __init__(self, db_path):
+        self.db = Database(db_path)
+
+    def __getattr__(self, name):
+        method = getattr(self.db, name)
+
+        async def call(*args):
+            return await asyncio.to_thread(method, *args)
+        return call
+
+    async def aclose(self):
+        pass
+
+
+async def run_session(db, index, fps, duration, stats):
+    """Une session : émotions à fps, un message toutes les ~2s, une lecture par seconde"""
+    rng = random.Random(index)
+    user_id = await db.get_or_create_user(f"bench_{index}")
+    session_id = await db.create_session(user_id)
+
+    interval = 1.0 / fps
+    end = time.perf_counter() + duration
+    frame = 0
+
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        try:
+            await db.log_emotion(session_id, rng.choice(EMOTIONS), rng.random(), rng.choice(MOODS))
+            stats["writes"] += 1
+
+            if frame % (2 * fps) == 0:
+                await db.log_message(session_id, "user", "Bonjour !", None)
+                stats["writes"] += 1
+
+            if frame % fps == 0:
+                read_start = time.perf_counter()
+                await db.get_user_stats(user_id, 50)
+                await db.get_unread_notifications(user_id)
+                stats["read_latencies"].append(time.perf_counter() - read_start)
+        except Exception:
+            stats["errors"] += 1
+
+        stats["write_latencies"].append(time.perf_counter() - start)
+        frame += 1
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - start)))
+
+
+async def run_benchmark(db, sessions, fps, duration):
+    stats = {"writes": 0, "errors": 0, "write_latencies": [], "read_latencies": []}
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_session(db, i, fps, duration, stats) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    await db.aclose()
+
+    stats["elapsed"] = elapsed
+    return stats
+
+
+def print_stats(name, stats, sessions, fps):
+    target = sessions * fps
+    print(f"\n📊 {name}")
+    print(f"   • Écritures/s: {stats['writes'] / stats['elapsed']:.0f} (cible ~{target})")
+    print(f"   • Erreurs: {stats['errors']}")
+    print(f"   • Cycle écriture p50/p95/p99 (ms): "
+          f"{percentile(stats['write_latencies'], 50) * 1000:.1f} / "
+          f"{percentile(stats['write_latencies'], 95) * 1000:.1f} / "
+          f"{percentile(stats['write_latencies'], 99) * 1000:.1f}")
+    print(f"   • Lecture p50/p95/p99 (ms): "
+          f"{percentile(stats['read_latencies'], 50) * 1000:.1f} / "
+          f"{percentile(stats['read_latencies'], 95) * 1000:.1f} / "
+          f"{percentile(stats['read_latencies'], 99) * 1000:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--fps", type=int, default=5, help="Émotions enregistrées par seconde et par session")
+    parser.add_argument("--duration", type=float, default=10.0, help="Durée en secondes")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--compare-sync", action="store_true",
+                        help="Rejoue la même charge avec Database bloquante dans des threads")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"BENCHMARK CONCURRENCE - {args.sessions} sessions x {args.fps} FPS, {args.duration:.0f}s")
+    print("=" * 60)
+
+    workdir = tempfile.mkdtemp(prefix="db_bench_")
+    try:
+        db = AsyncDatabase(os.path.join(workdir, "async.db"), readers=args.readers)
+        stats = asyncio.run(run_benchmark(db, args.sessions, args.fps, args.duration))
+        print_stats("AsyncDatabase", stats, args.sessions, args.fps)
+        print(f"   • Commits: {db.commits} ({db.writes / max(db.commits, 1):.1f} écritures/commit)")
+
+        if args.compare_sync:
+            db = SyncAdapter(os.path.join(workdir, "sync.db"))
+            stats = asyncio.run(run_benchmark(db, args.sessions, args.fps, args.duration))
+            print_stats("Database (threads)", stats, args.sessions, args.fps)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Test de charge d'AsyncOllamaGenerator contre un faux serveur Ollama local
+
+Le faux serveur répond à /api/tags et /api/generate après --latency secondes ;
+le débit doit croître avec la limite de concurrence. Un dernier passage
+envoie --requests prompts identiques simultanés : une seule requête doit
+atteindre le serveur (regroupement single-flight).
+
+Usage:
+    python scripts/benchmark_async_llm.py --requests 64 --latency 0.2 --concurrency 1,2,4,8,16
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.mock_ollama_server import MockOllamaServer
+from utils.async_ollama_generator import AsyncOllamaGenerator
+from utils.single_flight import SingleFlight
+
+REPLY = "Je suis là pour toi. 💙"
+
+
+async def run_level(base_url, concurrency, n_requests):
+    generator = AsyncOllamaGenerator(base_url=base_url, max_concurrency=concurrency)
+    try:
+        # Préchauffage (sonde de disponibilité, connexions)
+        await generator.agenerate_response("happy", "UP", "salut")
+
+        start = time.perf_counter()
+        replies = await asyncio.gather(*(
+            generator.agenerate_response("happy", "UP", f"message {i}")
+            for i in range(n_requests)
+        ))
+        elapsed = time.perf_counter() - start
+    finally:
+        generator.close()
+
+    fallbacks = sum(1 for r in replies if r != REPLY)
+    return n_requests / elapsed, elapsed, fallbacks
+
+
+async def run_identical(base_url, n_requests):
+    """n_requests prompts identiques simultanés (message long : pas de cache)"""
+    generator = AsyncOllamaGenerator(base_url=base_url, max_concurrency=4,
+                                     single_flight=SingleFlight())
+    message = "même question posée par toutes les sessions " * 3
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            generator.agenerate_response("sad", "DOWN", message)
+            for _ in range(n_requests)
+        ))
+        elapsed = time.perf_counter() - start
+    finally:
+        generator.close()
+    return elapsed, generator.single_flight.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.2, help="Latence simulée par génération (s)")
+    parser.add_argument("--concurrency", default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    # token_rate=0 : toute la latence est dans le délai de génération
+    server = MockOllamaServer(latency=args.latency, token_rate=0, reply=REPLY).start()
+    base_url = server.url
+
+    print("=" * 60)
+    print(f"CHARGE LLM ASYNC - {args.requests} requêtes, latence {args.latency * 1000:.0f} ms")
+    print("=" * 60)
+    print(f"\n{'concurrence':>12}{'req/s':>10}{'durée (s)':>12}{'fallbacks':>11}")
+
+    baseline = None
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        throughput, elapsed, fallbacks = asyncio.run(run_level(base_url, concurrency, args.requests))
+        baseline = baseline or throughput
+        print(f"{concurrency:>12}{throughput:>10.1f}{elapsed:>12.2f}{fallbacks:>11}"
+              f"   x{throughput / baseline:.1f}")
+
+    posts_before = server.stats()["generate"]
+    elapsed, flights = asyncio.run(run_identical(base_url, args.requests))
+    print(f"\n🔁 {args.requests} prompts identiques en {elapsed:.2f}s : "
+          f"{server.stats()['generate'] - posts_before} requête(s) serveur, "
+          f"{flights['deduplicated']} regroupée(s)")
+
+    server.stop()
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Débit de DetectorPool selon le nombre de processus, comparé à un
+EmotionDetector dans le thread appelant
+
+Plusieurs caméras sont simulées en alternant les flux ; les frames passent
+par mémoire partagée et les résultats reviennent dans l'ordre.
+
+Usage:
+    python scripts/benchmark_detector_pool.py
+    python scripts/benchmark_detector_pool.py --workers 1 2 4 8 --frames 600 --cameras 4
+    python scripts/benchmark_detector_pool.py --model models/optimized/emotion_model_int8.tflite --pin
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmark_streams import load_frames
+from utils.detector_pool import DetectorPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="models/emotion_model.h5")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[n for n in (1, 2, 4, 8) if n <= (os.cpu_count() or 1)] or [1])
+    parser.add_argument("--frames", type=int, default=400, help="Frames par mesure")
+    parser.add_argument("--cameras", type=int, default=4, help="Flux simulés")
+    parser.add_argument("--video", default=None)
+    parser.add_argument("--data", default="data/fer2013.csv")
+    parser.add_argument("--pin", action="store_true", help="Affinité CPU par worker (Linux)")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.data)
+    shape = frames[0].shape
+    work = [(frames[i % len(frames)], i % args.cameras) for i in range(args.frames)]
+
+    print("=" * 60)
+    print(f"POOL DE DÉTECTION - {args.frames} frames {shape[1]}x{shape[0]}, "
+          f"{args.cameras} caméras, {os.cpu_count()} cœurs")
+    print("=" * 60)
+
+    from utils.emotion_detector import EmotionDetector
+
+    detector = EmotionDetector(args.model)
+    detector.detect_emotion(frames[0].copy())
+    start = time.perf_counter()
+    for frame, _ in work:
+        detector.detect_emotion(frame.copy())
+    baseline = args.frames / (time.perf_counter() - start)
+    print(f"\n🧵 Thread appelant : {baseline:>8.1f} FPS")
+
+    for workers in args.workers:
+        with DetectorPool(workers=workers, frame_shape=shape, pin=args.pin,
+                          model_path=args.model) as pool:
+            # Préchauffage : chaque worker traite au moins une frame
+            for _ in pool.map(frames[:workers * 2]):
+                pass
+
+            start = time.perf_counter()
+            backlog = 0
+            for frame, camera in work:
+                if backlog >= pool.slots:
+                    pool.get()
+                    backlog -= 1
+                pool.submit(frame, stream=camera)
+                backlog += 1
+            for _ in range(backlog):
+                pool.get()
+            fps = args.frames / (time.perf_counter() - start)
+
+        print(f"⚙️  {workers} processus : {fps:>8.1f} FPS   x{fps / baseline:.2f} "
+              f"(efficacité {fps / baseline / workers:.0%})")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
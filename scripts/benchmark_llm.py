@@ -0,0 +1,180 @@
+"""
+Benchmark du chemin LLM de bout en bout, hors ligne (faux serveur Ollama)
+
+Pour chaque niveau de concurrence, --requests messages distincts sont
+envoyés par des threads (comme des sessions Streamlit) et l'on mesure :
+latence de réponse (p50/p95/p99), temps jusqu'au premier fragment,
+taux de fallback et débit.
+
+Modes:
+    response  OllamaGenerator.generate_response (réponse complète)
+    stream    OllamaGenerator.generate_stream (TTFT mesuré)
+    chat      ResponseGenerator.generate_response_stream (cache, budget, fallbacks)
+
+Usage:
+    python scripts/benchmark_llm.py --mode stream --concurrency 1,4,16
+    python scripts/benchmark_llm.py --mode chat --latency-budget 0.5 --latency 1.0
+    python scripts/benchmark_llm.py --failure-rate 0.2 --hang-rate 0.05 --read-timeout 2
+    python scripts/benchmark_llm.py --url http://localhost:11434   # vrai serveur
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.mock_ollama_server import MockOllamaServer
+from utils.ollama_generator import OllamaGenerator
+from utils.profiling import percentile
+from utils.response_generator import ResponseGenerator
+from utils.single_flight import SingleFlight
+
+EMOTIONS = ["sad", "happy", "angry", "fear", "neutral"]
+MOODS = {"sad": "DOWN", "angry": "DOWN", "fear": "DOWN", "happy": "UP", "neutral": "NEUTRAL"}
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.ttfts = []
+        self.fallbacks = 0
+
+    def add(self, latency, ttft, fallback):
+        with self.lock:
+            self.latencies.append(latency)
+            if ttft is not None:
+                self.ttfts.append(ttft)
+            self.fallbacks += bool(fallback)
+
+
+def make_generator(args, base_url):
+    """Générateur neuf par niveau : ni cache ni regroupement hérités du niveau précédent"""
+    kwargs = dict(base_url=base_url, model=args.model, read_timeout=args.read_timeout,
+                  single_flight=SingleFlight())
+
+    if args.mode == "chat":
+        generator = ResponseGenerator(prefetch_size=0, latency_budget=args.latency_budget,
+                                      context_budget=0)
+        generator.ollama_gen = OllamaGenerator(**kwargs)
+        return generator
+
+    generator = OllamaGenerator(**kwargs)
+    # Repérer les fallbacks de generate_response (pas de stats en mode non streaming)
+    fallback = generator._fallback_response
+    generator.fallback_seen = threading.local()
+
+    def flagging_fallback(mood_state):
+        generator.fallback_seen.value = True
+        return fallback(mood_state)
+    generator._fallback_response = flagging_fallback
+    return generator
+
+
+def one_request(generator, mode, index, recorder):
+    emotion = EMOTIONS[index % len(EMOTIONS)]
+    mood = MOODS[emotion]
+    # Messages distincts : pas de cache, pas de regroupement
+    message = f"Message de test numéro {index}, comment vas-tu ?"
+    start = time.perf_counter()
+
+    if mode == "response":
+        generator.fallback_seen.value = False
+        generator.generate_response(emotion, mood, message)
+        recorder.add(time.perf_counter() - start, None, generator.fallback_seen.value)
+        return
+
+    stats = {}
+    if mode == "stream":
+        stream = generator.generate_stream(emotion, mood, message, stats=stats)
+    else:
+        stream = generator.generate_response_stream(mood, emotion, context=message, stats=stats)
+
+    first = None
+    for _ in stream:
+        if first is None:
+            first = time.perf_counter() - start
+    recorder.add(time.perf_counter() - start, first, stats.get("fallback"))
+
+
+def run_level(args, base_url, concurrency):
+    generator = make_generator(args, base_url)
+    # Préchauffage : sonde de disponibilité, connexions, chargement du modèle
+    one_request(generator, args.mode, -1, Recorder())
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(args.requests):
+            pool.submit(one_request, generator, args.mode, i, recorder)
+    elapsed = time.perf_counter() - start
+
+    if args.mode == "chat":
+        # Générations tardives (budget dépassé) : les laisser finir avant le niveau suivant
+        generator._llm_executor.shutdown(wait=True)
+    return recorder, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["response", "stream", "chat"], default="stream")
+    parser.add_argument("--requests", type=int, default=64, help="Requêtes par niveau")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--url", default=None, help="Serveur Ollama réel (sinon faux serveur local)")
+    parser.add_argument("--model", default="llama2")
+    parser.add_argument("--read-timeout", type=float, default=5.0)
+    parser.add_argument("--latency-budget", type=float, default=None, help="Mode chat uniquement")
+    # Paramètres du faux serveur
+    parser.add_argument("--latency", type=float, default=0.2, help="Délai avant le premier token (s)")
+    parser.add_argument("--token-rate", type=float, default=50.0)
+    parser.add_argument("--load-time", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server = MockOllamaServer(models=[args.model], latency=args.latency,
+                                  token_rate=args.token_rate, load_time=args.load_time,
+                                  failure_rate=args.failure_rate, hang_rate=args.hang_rate,
+                                  seed=args.seed).start()
+        base_url = server.url
+
+    print("=" * 78)
+    print(f"BENCHMARK LLM - mode {args.mode}, {args.requests} requêtes/niveau, {base_url}")
+    if server is not None:
+        print(f"Faux serveur : latence {args.latency * 1000:.0f} ms, {args.token_rate:.0f} tokens/s, "
+              f"pannes {args.failure_rate:.0%}, blocages {args.hang_rate:.0%}")
+    print("=" * 78)
+    print(f"\n{'concurrence':>12}{'req/s':>9}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}"
+          f"{'TTFT p50':>10}{'TTFT p95':>10}{'fallback':>10}")
+
+    try:
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            recorder, elapsed = run_level(args, base_url, concurrency)
+            lat = [x * 1000 for x in recorder.latencies]
+            ttft = [x * 1000 for x in recorder.ttfts]
+            # Aucune mesure (tout en fallback) : nan plutôt que 0 ms
+            lat_p = [percentile(lat, q, default=float("nan")) for q in (50, 95, 99)]
+            ttft_p = [percentile(ttft, q, default=float("nan")) for q in (50, 95)]
+            print(f"{concurrency:>12}{len(lat) / elapsed:>9.1f}"
+                  f"{lat_p[0]:>10.0f}{lat_p[1]:>10.0f}{lat_p[2]:>10.0f}"
+                  f"{ttft_p[0]:>10.0f}{ttft_p[1]:>10.0f}"
+                  f"{recorder.fallbacks / max(len(lat), 1):>10.1%}")
+    finally:
+        if server is not None:
+            print(f"\n📊 Serveur : {server.stats()}")
+            server.stop()
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+FPS agrégé de plusieurs flux de détection sur une même machine
+
+Pour 1, 2, 4 et 8 flux, chaque flux a son EmotionDetector et son thread et
+traite des frames en boucle pendant --duration secondes. Chaque mesure tourne
+dans un processus neuf (les pools de threads TensorFlow sont figés à
+l'initialisation), threads par défaut puis avec ThreadBudget.
+
+Frames : vidéo (--video), sinon visages du dataset FER2013 agrandis dans
+une frame 640x480, sinon bruit (cascade seule, aucun visage).
+
+Usage:
+    python scripts/benchmark_streams.py
+    python scripts/benchmark_streams.py --model models/optimized/emotion_model_int8.tflite --pin
+    python scripts/benchmark_streams.py --streams 1 2 4 --duration 20 --video data/sample.mp4
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+
+import numpy as np
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def load_frames(video=None, csv_path="data/fer2013.csv", count=120):
+    """Frames BGR uint8 (480, 640, 3)"""
+    import cv2
+
+    if video:
+        cap = cv2.VideoCapture(video)
+        frames = []
+        while len(frames) < count:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+        cap.release()
+        if frames:
+            return frames
+
+    rng = np.random.default_rng(0)
+    if os.path.exists(csv_path):
+        from utils.fer_dataset import load_fer2013
+
+        images, _, usage = load_fer2013(csv_path)
+        faces = images[np.flatnonzero(usage != 0)[:count]]
+        frames = []
+        for face in faces:
+            frame = np.full((480, 640), 128, dtype=np.uint8)
+            x, y = rng.integers(40, 400), rng.integers(40, 240)
+            frame[y:y + 192, x:x + 192] = cv2.resize(face[:, :, 0], (192, 192))
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR))
+        return frames
+
+    return [rng.integers(0, 256, (480, 640, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def run_streams(streams, model_path, use_budget, pin, duration, video, csv_path):
+    """Exécuté dans un processus dédié : FPS agrégé de `streams` flux"""
+    from utils.emotion_detector import EmotionDetector
+    from utils.thread_budget import ThreadBudget
+
+    # Le budget doit exister avant le premier modèle (pools TensorFlow)
+    budget = ThreadBudget(pin=pin) if use_budget else None
+    detectors = [EmotionDetector(model_path, thread_budget=budget) for _ in range(streams)]
+    frames = load_frames(video, csv_path)
+
+    counts = [0] * streams
+    faces = [0] * streams
+    start_barrier = threading.Barrier(streams + 1)
+    deadline = [float("inf")]
+
+    def worker(i):
+        detector = detectors[i]
+        detector.detect_emotion(frames[0].copy())  # préchauffage
+        start_barrier.wait()
+        n = i
+        while time.perf_counter() < deadline[0]:
+            _, emotions = detector.detect_emotion(frames[n % len(frames)].copy())
+            faces[i] += len(emotions)
+            counts[i] += 1
+            n += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(streams)]
+    for t in threads:
+        t.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    deadline[0] = start + duration
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    # Après les rééquilibrages : threads effectifs de chaque détecteur
+    model_threads = [detector.model_threads() for detector in detectors]
+    for detector in detectors:
+        detector.close()
+    total = sum(counts)
+    return {
+        "streams": streams,
+        "budget": use_budget,
+        "fps": total / elapsed,
+        "fps_per_stream": total / elapsed / streams,
+        "faces_per_frame": sum(faces) / max(total, 1),
+        "allocation": budget.summary() if budget else None,
+        "model_threads": model_threads,
+    }
+
+
+def describe_threads(model_threads):
+    """Threads par détecteur ; None = pool intra-op TensorFlow commun (Keras)"""
+    if all(t is None for t in model_threads):
+        return "pool TensorFlow commun"
+    return "/".join("défaut" if t is None else str(t) for t in model_threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="models/emotion_model.h5")
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=10.0, help="Secondes par mesure")
+    parser.add_argument("--video", default=None)
+    parser.add_argument("--data", default="data/fer2013.csv")
+    parser.add_argument("--pin", action="store_true", help="Affinité CPU par flux (Linux)")
+    parser.add_argument("--budget-only", action="store_true", help="Ne pas mesurer les réglages par défaut")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"FLUX CONCURRENTS - {args.model}, {os.cpu_count()} cœurs, {args.duration:.0f}s par mesure")
+    print("=" * 60)
+
+    modes = [True] if args.budget_only else [False, True]
+    results = {}
+    context = mp.get_context("spawn")
+    for streams in args.streams:
+        for use_budget in modes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_streams, streams, args.model, use_budget, args.pin,
+                                     args.duration, args.video, args.data).result()
+            results[(streams, use_budget)] = result
+            print(f"   {streams} flux, {'budget' if use_budget else 'défaut'}: "
+                  f"{result['fps']:.1f} FPS ({result['faces_per_frame']:.2f} visage/frame, "
+                  f"threads modèle {describe_threads(result['model_threads'])})")
+
+    print("\n" + "=" * 60)
+    print(f"{'Flux':>5}{'FPS défaut':>14}{'FPS budget':>14}{'par flux':>12}{'gain':>9}")
+    print("-" * 60)
+    for streams in args.streams:
+        budget = results[(streams, True)]
+        default = results.get((streams, False))
+        print(f"{streams:>5}{default['fps'] if default else float('nan'):>14.1f}{budget['fps']:>14.1f}"
+              f"{budget['fps_per_stream']:>12.1f}"
+              f"{'x%.2f' % (budget['fps'] / default['fps']) if default else '-':>9}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Générateur de charge pour la base : combien d'utilisateurs simultanés
+database/chatbot.db (ou un remplaçant de Database) peut-il tenir ?
+
+Chaque utilisateur simulé est un thread (comme une session Streamlit) :
+    - log_emotion à --fps (boucle webcam)
+    - log_message user + bot toutes les --message-interval secondes
+    - requêtes de la barre latérale (get_user_stats, get_unread_notifications)
+      toutes les --sidebar-interval secondes
+
+Usage:
+    python scripts/db_load_test.py --users 1,10,50,100 --fps 10 --duration 15
+    python scripts/db_load_test.py --backend async --users 200
+    python scripts/db_load_test.py --backend mon_module:MaDatabase
+"""
+
+import argparse
+import importlib
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.database import DEFAULT_EMOTION_LABELS, MOOD_STATES, Database
+from utils.profiling import percentile
+
+EMOTIONS = list(DEFAULT_EMOTION_LABELS.values())
+MOODS = list(MOOD_STATES.values())
+
+
+class AsyncBackend:
+    """AsyncDatabase vue depuis des threads : écritures via la file, lectures directes"""
+
+    def __init__(self, db_path, timeout):
+        from utils.async_database import AsyncDatabase
+        self.adb = AsyncDatabase(db_path)
+        self.adb.db.timeout = timeout
+
+    def __getattr__(self, name):
+        if name.startswith("get_"):
+            return getattr(self.adb.db, name)
+
+        def write(*args):
+            return self.adb.submit_write(name, *args).result()
+        return write
+
+    def close(self):
+        self.adb.close()
+
+
+def make_backend(spec, db_path, timeout):
+    """database | async | module:Classe (constructeur (db_path), API de Database)"""
+    if spec == "database":
+        return Database(db_path, timeout=timeout)
+    if spec == "async":
+        return AsyncBackend(db_path, timeout)
+
+    module_name, class_name = spec.split(":")
+    cls = getattr(importlib.import_module(module_name), class_name)
+    return cls(db_path)
+
+
+class Recorder:
+    """Compteurs partagés entre threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inserts = 0
+        self.lock_errors = 0
+        self.other_errors = 0
+        self.latencies = {"log_emotion": [], "log_message": [], "sidebar": []}
+
+    def timed(self, kind, func, *args, inserts=0):
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        except sqlite3.OperationalError as e:
+            with self.lock:
+                if "locked" in str(e) or "busy" in str(e):
+                    self.lock_errors += 1
+                else:
+                    self.other_errors += 1
+            return None
+        except Exception:
+            with self.lock:
+                self.other_errors += 1
+            return None
+
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.inserts += inserts
+            self.latencies[kind].append(elapsed)
+        return result
+
+
+def simulate_user(db, index, args, recorder, start_barrier, stop_event):
+    rng = random.Random(index)
+    user_id = db.get_or_create_user(f"load_{index}")
+    session_id = db.create_session(user_id)
+    start_barrier.wait()
+
+    frame_interval = 1.0 / args.fps
+    now = time.perf_counter()
+    next_frame = now + rng.random() * frame_interval
+    next_message = now + rng.random() * args.message_interval
+    next_sidebar = now + rng.random() * args.sidebar_interval
+
+    while not stop_event.is_set():
+        now = time.perf_counter()
+
+        if now >= next_frame:
+            recorder.timed("log_emotion", db.log_emotion, session_id,
+                           rng.choice(EMOTIONS), rng.random(), rng.choice(MOODS), inserts=1)
+            next_frame += frame_interval
+
+        if now >= next_message:
+            def chat():
+                db.log_message(session_id, "user", "Comment ça va ?", rng.choice(EMOTIONS))
+                db.log_message(session_id, "bot", "Je suis là pour t'écouter. 💙")
+            recorder.timed("log_message", chat, inserts=2)
+            next_message += args.message_interval
+
+        if now >= next_sidebar:
+            def sidebar():
+                db.get_user_stats(user_id, 50)
+                db.get_unread_notifications(user_id)
+            recorder.timed("sidebar", sidebar)
+            next_sidebar += args.sidebar_interval
+
+        wait = min(next_frame, next_message, next_sidebar) - time.perf_counter()
+        if wait > 0:
+            stop_event.wait(wait)
+
+
+def run_level(users, args, workdir):
+    """Une mesure à nombre d'utilisateurs fixé, sur une base neuve"""
+    db_path = os.path.join(workdir, f"load_{users}.db")
+    db = make_backend(args.backend, db_path, args.busy_timeout)
+
+    recorder = Recorder()
+    start_barrier = threading.Barrier(users + 1)
+    stop_event = threading.Event()
+
+    threads = [
+        threading.Thread(target=simulate_user,
+                         args=(db, i, args, recorder, start_barrier, stop_event), daemon=True)
+        for i in range(users)
+    ]
+    for t in threads:
+        t.start()
+
+    start_barrier.wait()
+    start = time.perf_counter()
+    time.sleep(args.duration)
+    stop_event.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    if hasattr(db, "close"):
+        db.close()
+
+    target = users * (args.fps + 2 / args.message_interval)
+    return {
+        "users": users,
+        "target": target,
+        "inserts_per_s": recorder.inserts / elapsed,
+        "lock_errors": recorder.lock_errors,
+        "other_errors": recorder.other_errors,
+        "write_p95": percentile(recorder.latencies["log_emotion"], 95),
+        "write_p99": percentile(recorder.latencies["log_emotion"], 99),
+        "read_p95": percentile(recorder.latencies["sidebar"], 95),
+        "read_p99": percentile(recorder.latencies["sidebar"], 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", default="1,10,50,100",
+                        help="Nombres d'utilisateurs simultanés (liste séparée par des virgules)")
+    parser.add_argument("--fps", type=float, default=10.0, help="log_emotion par seconde et par utilisateur")
+    parser.add_argument("--message-interval", type=float, default=5.0, help="Secondes entre deux échanges chat")
+    parser.add_argument("--sidebar-interval", type=float, default=2.0, help="Secondes entre deux rafraîchissements")
+    parser.add_argument("--duration", type=float, default=15.0, help="Durée de chaque palier (s)")
+    parser.add_argument("--backend", default="database", help="database | async | module:Classe")
+    parser.add_argument("--busy-timeout", type=float, default=5.0,
+                        help="Attente max sur verrou avant erreur (s)")
+    args = parser.parse_args()
+
+    levels = [int(u) for u in args.users.split(",")]
+
+    print("=" * 78)
+    print(f"TEST DE CHARGE BASE - backend {args.backend}, {args.fps:g} FPS/utilisateur")
+    print("=" * 78)
+    print(f"\n{'users':>6}{'cible/s':>10}{'inserts/s':>11}{'verrous':>9}{'autres':>8}"
+          f"{'écr p95':>9}{'écr p99':>9}{'lect p95':>10}{'lect p99':>10}   (ms)")
+
+    workdir = tempfile.mkdtemp(prefix="db_load_")
+    try:
+        for users in levels:
+            r = run_level(users, args, workdir)
+            print(f"{r['users']:>6}{r['target']:>10.0f}{r['inserts_per_s']:>11.0f}"
+                  f"{r['lock_errors']:>9}{r['other_errors']:>8}"
+                  f"{r['write_p95'] * 1000:>9.1f}{r['write_p99'] * 1000:>9.1f}"
+                  f"{r['read_p95'] * 1000:>10.1f}{r['read_p99'] * 1000:>10.1f}")
+
+            # Saturation : le débit soutenu décroche de la cible
+            if r["inserts_per_s"] < 0.9 * r["target"] or r["lock_errors"]:
+                print(f"\n⚠️ Limite atteinte vers {users} utilisateurs")
+                break
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Rapport de stockage de emotions_log : schéma TEXT/REAL historique
+vs schéma compact (codes entiers + confiance quantifiée)
+
+Usage:
+    python scripts/db_storage_report.py --rows 200000
+    python scripts/db_storage_report.py --db database/chatbot.db
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.database import Database, DEFAULT_EMOTION_LABELS, MOOD_STATES
+
+LEGACY_SCHEMA = """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        end_time TIMESTAMP
+    );
+    CREATE TABLE emotions_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER NOT NULL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        emotion TEXT NOT NULL,
+        confidence REAL NOT NULL,
+        mood_state TEXT
+    );
+"""
+
+LEGACY_SCAN = """
+    SELECT e.emotion, COUNT(*), AVG(e.confidence)
+    FROM emotions_log e
+    JOIN sessions s ON e.session_id = s.id
+    WHERE s.user_id = ?
+    GROUP BY e.emotion
+"""
+
+COMPACT_SCAN = """
+    SELECT el.label, COUNT(*), AVG(e.confidence_q)
+    FROM emotions_log e
+    JOIN sessions s ON e.session_id = s.id
+    JOIN emotion_labels el ON el.code = e.emotion_code
+    WHERE s.user_id = ?
+    GROUP BY e.emotion_code
+"""
+
+
+def build_legacy_db(path, rows, users=10, seed=42):
+    """Crée une base au schéma historique avec des lignes synthétiques"""
+    rng = random.Random(seed)
+    emotions = list(DEFAULT_EMOTION_LABELS.values())
+    moods = list(MOOD_STATES.values())
+
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany("INSERT INTO users (username) VALUES (?)",
+                     [(f"user_{i}",) for i in range(users)])
+    conn.executemany("INSERT INTO sessions (user_id) VALUES (?)",
+                     [(i % users + 1,) for i in range(users * 5)])
+    conn.executemany(
+        "INSERT INTO emotions_log (session_id, timestamp, emotion, confidence, mood_state) "
+        "VALUES (?, datetime('now', ?), ?, ?, ?)",
+        (
+            (rng.randint(1, users * 5), f"-{rows - i} seconds",
+             rng.choice(emotions), rng.random(), rng.choice(moods))
+            for i in range(rows)
+        )
+    )
+    conn.commit()
+    conn.close()
+
+
+def table_stats(path):
+    """Retourne (nb lignes, octets par ligne) pour emotions_log"""
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    rows = conn.execute("SELECT COUNT(*) FROM emotions_log").fetchone()[0]
+
+    try:
+        # Taille exacte des pages de la table (extension dbstat)
+        size = conn.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name = 'emotions_log'"
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        size = os.path.getsize(path)
+
+    conn.close()
+    return rows, (size / rows if rows else 0.0)
+
+
+def scan_time(path, query, repeats=5):
+    """Temps moyen (ms) d'un scan agrégé par utilisateur"""
+    conn = sqlite3.connect(path)
+    user_ids = [r[0] for r in conn.execute("SELECT id FROM users")]
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for user_id in user_ids:
+            conn.execute(query, (user_id,)).fetchall()
+    elapsed = time.perf_counter() - start
+
+    conn.close()
+    return elapsed / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="Base existante (schéma historique) à comparer, copiée avant migration")
+    parser.add_argument("--rows", type=int, default=100000, help="Lignes synthétiques si --db absent")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("RAPPORT DE STOCKAGE - emotions_log")
+    print("=" * 60)
+
+    workdir = tempfile.mkdtemp(prefix="db_report_")
+    legacy_path = os.path.join(workdir, "legacy.db")
+    compact_path = os.path.join(workdir, "compact.db")
+
+    try:
+        if args.db:
+            print(f"\n📂 Copie de {args.db}...")
+            shutil.copyfile(args.db, legacy_path)
+        else:
+            print(f"\n🔄 Génération de {args.rows} lignes synthétiques...")
+            build_legacy_db(legacy_path, args.rows)
+
+        legacy_rows, legacy_bpr = table_stats(legacy_path)
+        legacy_ms = scan_time(legacy_path, LEGACY_SCAN)
+
+        shutil.copyfile(legacy_path, compact_path)
+        start = time.perf_counter()
+        Database(compact_path)
+        migration_s = time.perf_counter() - start
+
+        compact_rows, compact_bpr = table_stats(compact_path)
+        compact_ms = scan_time(compact_path, COMPACT_SCAN)
+
+        print(f"\n{'':<12}{'lignes':>10}{'octets/ligne':>15}{'scan (ms)':>12}")
+        print(f"{'historique':<12}{legacy_rows:>10}{legacy_bpr:>15.1f}{legacy_ms:>12.2f}")
+        print(f"{'compact':<12}{compact_rows:>10}{compact_bpr:>15.1f}{compact_ms:>12.2f}")
+
+        if legacy_bpr and legacy_ms:
+            print(f"\n✅ Gain stockage: {(1 - compact_bpr / legacy_bpr) * 100:.1f}% | "
+                  f"scan x{legacy_ms / compact_ms:.2f} | migration {migration_s:.2f}s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Banc d'évaluation précision / latence des modèles et backends
+
+Chaque cible est évaluée sur le split de test FER2013 dans un processus
+neuf : précision, F1 par classe, matrice de confusion, latence lot 1 et
+lot N, débit, mémoire. Le rapport JSON complet sert de référence pour
+choisir le modèle de production.
+
+Cibles:
+    registry            version courante du registre (models/registry)
+    registry:v0003      version précise
+    variant:int8        variante de models/optimized/registry.json
+    chemin              .h5 / .keras / .tflite / dossier SavedModel
+
+Usage:
+    python scripts/evaluate_models.py models/emotion_model.h5 models/student/emotion_model.h5
+    python scripts/evaluate_models.py registry variant:int8 variant:float16 --threads 1
+    python scripts/evaluate_models.py registry --output reports/prod.json
+"""
+
+import argparse
+import os
+import sys
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# TensorFlow n'est importé que dans les processus d'évaluation
+from utils.evaluation import run_evaluation
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", default=["models/emotion_model.h5"])
+    parser.add_argument("--data", default="data/fer2013.csv")
+    parser.add_argument("--cache-dir", default="data/cache")
+    parser.add_argument("--split", default="test", choices=["test", "val"])
+    parser.add_argument("--seed", type=int, default=42, help="Graine du découpage (= entraînement)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Taille du lot N mesuré")
+    parser.add_argument("--runs", type=int, default=200, help="Mesures de latence lot 1")
+    parser.add_argument("--threads", type=int, default=None, help="Threads d'inférence")
+    parser.add_argument("--no-isolate", dest="isolate", action="store_false",
+                        help="Tout évaluer dans ce processus (mémoire moins fiable)")
+    parser.add_argument("--output", default=None, help="Rapport JSON (défaut: reports/evaluation-<date>.json)")
+    return parser.parse_args(argv)
+
+
+def print_summary(report):
+    results = report["results"]
+    if not results:
+        return
+
+    print("\n" + "=" * 100)
+    print(f"{'Cible':<34}{'Backend':<11}{'Précision':>10}{'F1 macro':>10}"
+          f"{'Lot 1 p50':>11}{'p95':>9}{'img/s':>9}{'Mémoire':>10}")
+    print("-" * 100)
+    for r in results:
+        print(f"{r['target'][-33:]:<34}{r['backend']:<11}{r['accuracy']:>10.4f}{r['macro_f1']:>10.4f}"
+              f"{r['latency_batch1']['p50_ms']:>9.2f}ms{r['latency_batch1']['p95_ms']:>7.2f}ms"
+              f"{r['throughput_images_per_s']:>9.0f}{r['memory']['model_rss_mb']:>8.0f}Mo")
+    print("=" * 100)
+
+    names = results[0]["class_names"]
+    print(f"\n{'F1 par classe':<34}" + "".join(f"{n[:8]:>9}" for n in names))
+    for r in results:
+        print(f"{r['target'][-33:]:<34}" + "".join(f"{r['per_class'][n]['f1']:>9.3f}" for n in names))
+
+    best = max(results, key=lambda r: r["accuracy"])
+    fastest = min(results, key=lambda r: r["latency_batch1"]["p50_ms"])
+    print(f"\n🎯 Plus précis : {best['target']} ({best['accuracy']:.4f})")
+    print(f"⚡ Plus rapide : {fastest['target']} ({fastest['latency_batch1']['p50_ms']:.2f} ms / visage)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 60)
+    print("ÉVALUATION DES MODÈLES (PRÉCISION / PERFORMANCE)")
+    print("=" * 60)
+
+    if not os.path.exists(args.data):
+        print(f"\n❌ ERREUR: Fichier {args.data} non trouvé!")
+        return 1
+
+    report = run_evaluation(
+        args.targets,
+        csv_path=args.data,
+        cache_dir=args.cache_dir,
+        split=args.split,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        runs=args.runs,
+        num_threads=args.threads,
+        isolate=args.isolate,
+        output_path=args.output
+    )
+    print_summary(report)
+    for spec, error in report["errors"].items():
+        print(f"❌ {spec}: {error}")
+    print(f"\n💾 Rapport: {report['path']}")
+    return 0 if report["results"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
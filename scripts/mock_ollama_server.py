@@ -0,0 +1,272 @@
+"""
+Faux serveur Ollama local pour mesurer le chemin LLM sans vrai modèle
+
+Implémente /api/tags et /api/generate (streaming NDJSON ou réponse unique)
+avec latence de premier token, débit de tokens, temps de chargement du
+modèle (keep_alive respecté) et injection de pannes (erreurs 500, blocages).
+
+Usage:
+    python scripts/mock_ollama_server.py --port 11434 --latency 0.3 --token-rate 40
+    python scripts/mock_ollama_server.py --failure-rate 0.2 --hang-rate 0.05
+
+Depuis Python:
+    server = MockOllamaServer(latency=0.2, token_rate=50).start()
+    generator = OllamaGenerator(base_url=server.url)
+    ...
+    server.stop()
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = ("Je comprends ce que tu ressens, et c'est tout à fait normal. "
+                 "Prends un moment pour toi, je suis là si tu veux en parler. 💙")
+
+KEEP_ALIVE_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_keep_alive(value, default=300.0):
+    """Durée keep_alive Ollama ("30m", "10s", 300, -1 = infini) en secondes"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)(ms|s|m|h)?", str(value).strip())
+    if not match:
+        return default
+    seconds = float(match.group(1)) * KEEP_ALIVE_UNITS[match.group(2) or "s"]
+    return float("inf") if seconds < 0 else seconds
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Écritures groupées : sans tampon, chaque write part dans son propre segment TCP
+    wbufsize = -1
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.wfile.flush()
+
+    def _send_chunk(self, payload):
+        data = json.dumps(payload).encode() + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/api/tags":
+            self._send_json({"error": "not found"}, status=404)
+            return
+        self.server.count("tags")
+        self._send_json({"models": [{"name": name} for name in self.server.models]})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json({"error": "invalid JSON"}, status=400)
+            return
+
+        if self.path.rstrip("/") != "/api/generate":
+            self._send_json({"error": "not found"}, status=404)
+            return
+
+        server = self.server
+        server.count("generate")
+        model = request.get("model")
+        if model not in server.models:
+            self._send_json({"error": f"model '{model}' not found"}, status=404)
+            return
+
+        load = server.load_model(model, request.get("keep_alive"))
+
+        # Requête sans prompt : simple chargement du modèle
+        if not request.get("prompt"):
+            time.sleep(load)
+            self._send_json({"model": model, "response": "", "done": True,
+                             "done_reason": "load"})
+            return
+
+        fault = server.draw_fault()
+        if fault == "error":
+            server.count("errors")
+            time.sleep(server.latency)
+            self._send_json({"error": "injected failure"}, status=500)
+            return
+        if fault == "hang":
+            # Ne répond jamais dans les délais du client (timeout de lecture)
+            server.count("hangs")
+            time.sleep(server.hang_seconds)
+            self._send_json({"error": "hang"}, status=500)
+            return
+
+        tokens = server.reply_tokens()
+        time.sleep(load + server.latency)
+
+        if request.get("stream", True):
+            server.count("streams")
+            self._stream(model, tokens)
+        else:
+            time.sleep(len(tokens) * server.token_interval())
+            self._send_json({"model": model, "response": "".join(tokens), "done": True,
+                             "eval_count": len(tokens),
+                             "eval_duration": int(len(tokens) * server.token_interval() * 1e9)})
+
+    def _stream(self, model, tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        interval = self.server.token_interval()
+        start = time.perf_counter()
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(interval)
+            self._send_chunk({"model": model, "response": token, "done": False})
+        self._send_chunk({"model": model, "response": "", "done": True,
+                          "eval_count": len(tokens),
+                          "eval_duration": int((time.perf_counter() - start) * 1e9)})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class MockOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # File d'attente TCP large : sinon les connexions en rafale attendent une retransmission SYN (1 s)
+    request_queue_size = 256
+
+    def __init__(self, host="127.0.0.1", port=0, models=("llama2",), latency=0.2,
+                 token_rate=50.0, reply=DEFAULT_REPLY, load_time=0.0,
+                 failure_rate=0.0, hang_rate=0.0, hang_seconds=60.0, seed=None):
+        """
+        Args:
+            host, port: adresse d'écoute (port 0 = port libre)
+            models: modèles annoncés par /api/tags
+            latency: délai avant le premier token (s)
+            token_rate: tokens générés par seconde (0 = instantané)
+            reply: texte renvoyé, découpé en tokens (mots)
+            load_time: chargement du modèle si absent ou expiré (keep_alive)
+            failure_rate: proportion de réponses 500
+            hang_rate: proportion de requêtes bloquées hang_seconds
+            seed: graine pour une injection de pannes reproductible
+        """
+        super().__init__((host, port), _Handler)
+        self.models = list(models)
+        self.latency = latency
+        self.token_rate = token_rate
+        self.reply = reply
+        self.load_time = load_time
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._loaded_until = {}
+        self._thread = None
+        self.counters = {"tags": 0, "generate": 0, "streams": 0, "errors": 0,
+                         "hangs": 0, "loads": 0}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def reply_tokens(self):
+        return re.findall(r"\S+\s*", self.reply)
+
+    def token_interval(self):
+        return 1.0 / self.token_rate if self.token_rate > 0 else 0.0
+
+    def draw_fault(self):
+        with self._lock:
+            draw = self._rng.random()
+        if draw < self.failure_rate:
+            return "error"
+        if draw < self.failure_rate + self.hang_rate:
+            return "hang"
+        return None
+
+    def load_model(self, model, keep_alive):
+        """Temps de chargement à payer pour cette requête (0 si le modèle est résident)"""
+        now = time.monotonic()
+        with self._lock:
+            resident = self._loaded_until.get(model, 0.0) > now
+            self._loaded_until[model] = now + parse_keep_alive(keep_alive)
+            if not resident and self.load_time > 0:
+                self.counters["loads"] += 1
+        return 0.0 if resident else self.load_time
+
+    def handle_error(self, request, client_address):
+        # Client parti avant la fin (timeout, annulation) : cas normal ici
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    def start(self):
+        """Sert en arrière-plan (thread démon) ; retourne self"""
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--model", action="append", help="Modèle annoncé (répétable, défaut llama2)")
+    parser.add_argument("--latency", type=float, default=0.2, help="Délai avant le premier token (s)")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="Tokens par seconde")
+    parser.add_argument("--load-time", type=float, default=0.0, help="Chargement du modèle (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = MockOllamaServer(args.host, args.port, models=args.model or ["llama2"],
+                              latency=args.latency, token_rate=args.token_rate,
+                              load_time=args.load_time, failure_rate=args.failure_rate,
+                              hang_rate=args.hang_rate, seed=args.seed)
+    print(f"🤖 Faux Ollama sur {server.url} (latence {args.latency * 1000:.0f} ms, "
+          f"{args.token_rate:.0f} tokens/s, pannes {args.failure_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"📊 {server.stats()}")
+
+
+if __name__ == "__main__":
+    main()
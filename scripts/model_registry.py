@@ -0,0 +1,93 @@
+"""
+Gestion du registre de modèles versionné (models/registry)
+
+Usage:
+    python scripts/model_registry.py list
+    python scripts/model_registry.py register models/emotion_model.h5 --metrics models/student/distillation_report.json
+    python scripts/model_registry.py register models/optimized/emotion_model_int8.tflite --promote
+    python scripts/model_registry.py promote v0002
+    python scripts/model_registry.py show [v0002]
+
+Les détecteurs lancés avec EmotionDetector(registry=True) basculent sur la
+version promue sans redémarrage.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.model_registry import BACKENDS, DEFAULT_ROOT, ModelRegistry
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    parser.add_argument("--name", default="emotion")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Versions publiées")
+
+    register = commands.add_parser("register", help="Publier une nouvelle version")
+    register.add_argument("model", help="Modèle .h5 / .keras / .tflite")
+    register.add_argument("--labels", default=None, help="emotion_labels.json (défaut: à côté du modèle)")
+    register.add_argument("--backend", default="savedmodel", choices=BACKENDS)
+    register.add_argument("--metrics", default=None, help="Rapport JSON de métriques")
+    register.add_argument("--notes", default="")
+    register.add_argument("--promote", action="store_true", help="Promouvoir immédiatement")
+
+    promote = commands.add_parser("promote", help="Rendre une version courante")
+    promote.add_argument("version")
+
+    show = commands.add_parser("show", help="Manifeste d'une version (courante par défaut)")
+    show.add_argument("version", nargs="?")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    registry = ModelRegistry(args.root, args.name)
+
+    if args.command == "list":
+        current = registry.current_version()
+        versions = registry.versions()
+        if not versions:
+            print(f"📭 Registre vide ({registry.path})")
+        for version in versions:
+            manifest = registry.manifest(version)
+            accuracy = manifest["metrics"].get("accuracy", manifest["metrics"].get("test_accuracy"))
+            marker = "⭐" if version == current else "  "
+            print(f"{marker} {version}  {manifest['backend']:<10} {manifest['created']}  "
+                  f"accuracy={accuracy if accuracy is not None else '-'}  {manifest['notes']}")
+
+    elif args.command == "register":
+        if not os.path.exists(args.model):
+            print(f"❌ ERREUR: Modèle {args.model} non trouvé!")
+            return 1
+        version = registry.register(args.model, labels_path=args.labels, metrics=args.metrics,
+                                    backend=args.backend, notes=args.notes, promote=args.promote)
+        print(f"✅ {version} publiée{' et promue' if args.promote else ''} ({registry.path})")
+
+    elif args.command == "promote":
+        try:
+            registry.promote(args.version)
+        except LookupError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"⭐ {args.version} est maintenant la version courante")
+
+    elif args.command == "show":
+        try:
+            print(json.dumps(registry.manifest(args.version), ensure_ascii=False, indent=2))
+        except (LookupError, FileNotFoundError) as e:
+            print(f"❌ {e}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Optimisation post-entraînement du modèle d'émotions
+
+Produit les variantes TFLite (float32, float16, dynamique, int8 calibrée
+sur le split d'entraînement, et leurs versions élaguées), mesure précision,
+taille et latence CPU, puis enregistre dans models/optimized/registry.json
+celles dont la perte de précision reste sous le seuil.
+
+Usage:
+    python scripts/optimize_model.py
+    python scripts/optimize_model.py --max-accuracy-drop 0.005 --threads 1
+    python scripts/optimize_model.py --quantizations float16 int8 --prune-sparsity 0
+"""
+
+import argparse
+import os
+import sys
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="models/emotion_model.h5", help="Modèle Keras source")
+    parser.add_argument("--data", default="data/fer2013.csv", help="CSV FER2013")
+    parser.add_argument("--cache-dir", default="data/cache")
+    parser.add_argument("--output-dir", default="models/optimized")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01,
+                        help="Perte de précision maximale pour enregistrer une variante (0.01 = 1 point)")
+    parser.add_argument("--quantizations", nargs="+", default=None,
+                        choices=["float32", "float16", "dynamic", "int8"])
+    parser.add_argument("--prune-sparsity", type=float, default=0.5,
+                        help="Proportion de poids élagués (0 = pas d'élagage)")
+    parser.add_argument("--prune-epochs", type=int, default=2)
+    parser.add_argument("--calibration-size", type=int, default=500,
+                        help="Images d'entraînement pour la calibration int8")
+    parser.add_argument("--batch-size", type=int, default=32, help="Taille du lot mesuré")
+    parser.add_argument("--threads", type=int, default=None, help="Threads TFLite")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def print_report(registry):
+    baseline = registry["baseline"]
+    rows = [("keras", baseline, True)] + [
+        (name, m, m["accepted"]) for name, m in sorted(registry["variants"].items())
+    ]
+
+    print("\n" + "=" * 92)
+    print(f"{'Variante':<18}{'Précision':>10}{'Δ':>8}{'Taille':>10}{'gzip':>10}"
+          f"{'1 visage':>11}{'Lot ' + str(baseline['batch_size']):>10}{'img/s':>9}  ")
+    print("-" * 92)
+    for name, m, accepted in rows:
+        delta = m["accuracy"] - baseline["accuracy"]
+        print(f"{name:<18}{m['accuracy']:>10.4f}{delta:>+8.4f}"
+              f"{m['size_bytes'] / 1e6:>8.2f}MB{m['compressed_bytes'] / 1e6:>8.2f}MB"
+              f"{m['latency_ms']:>9.2f}ms{m['batch_latency_ms']:>8.1f}ms{m['images_per_s']:>9.0f}"
+              f"  {'✅' if accepted else '❌'}")
+    print("=" * 92)
+
+    if registry["registered"]:
+        print(f"\n📦 Variantes enregistrées: {', '.join(registry['registered'])}")
+        print(f"⭐ Recommandée: {registry['recommended']} "
+              f"(EmotionDetector(variant=\"recommended\"))")
+    else:
+        print(f"\n⚠️ Aucune variante sous le seuil de {registry['max_accuracy_drop']:.2%} de perte")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 60)
+    print("OPTIMISATION DU MODÈLE (ÉLAGAGE + QUANTIFICATION)")
+    print("=" * 60)
+
+    for path in (args.model, args.data):
+        if not os.path.exists(path):
+            print(f"\n❌ ERREUR: Fichier {path} non trouvé!")
+            print("   Lance d'abord: python scripts/train_model.py")
+            return 1
+
+    # Import tardif : --help ne charge pas TensorFlow
+    from utils.model_optimization import QUANTIZATIONS, optimize
+
+    registry = optimize(
+        model_path=args.model,
+        csv_path=args.data,
+        output_dir=args.output_dir,
+        cache_dir=args.cache_dir,
+        max_accuracy_drop=args.max_accuracy_drop,
+        quantizations=tuple(args.quantizations or QUANTIZATIONS),
+        prune_sparsity=args.prune_sparsity,
+        prune_epochs=args.prune_epochs,
+        calibration_size=args.calibration_size,
+        batch_size=args.batch_size,
+        seed=args.seed,
+        num_threads=args.threads
+    )
+    print_report(registry)
+    print(f"\n💾 Registre: {os.path.join(args.output_dir, 'registry.json')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
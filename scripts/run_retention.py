@@ -0,0 +1,58 @@
+"""
+Archivage de l'historique hors fenêtre chaude (Parquet) et compaction
+
+Usage:
+    python scripts/run_retention.py --hot-days 30
+    python scripts/run_retention.py --interval 3600     # tâche de fond
+    python scripts/run_retention.py --full-vacuum       # maintenance
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.database import Database
+from utils.retention import RetentionManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="database/chatbot.db")
+    parser.add_argument("--archive-dir", default="database/archive")
+    parser.add_argument("--hot-days", type=int, default=30, help="Jours conservés dans SQLite")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--interval", type=int, default=0,
+                        help="Secondes entre deux passes (0 = une seule passe)")
+    parser.add_argument("--full-vacuum", action="store_true",
+                        help="VACUUM complet après la passe (bloque les écritures)")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    retention = RetentionManager(db, archive_dir=args.archive_dir,
+                                 hot_days=args.hot_days, batch_size=args.batch_size)
+
+    if args.interval <= 0:
+        print(f"📦 Archivage des lignes de plus de {args.hot_days} jours...")
+        archived = retention.run_once()
+        if args.full_vacuum:
+            retention.compact(full=True)
+        print(f"✅ Terminé: {archived}")
+        return
+
+    print(f"🔄 Archivage toutes les {args.interval}s (Ctrl+C pour arrêter)")
+    retention.start(interval_seconds=args.interval)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n🛑 Arrêt demandé")
+        retention.stop()
+
+
+if __name__ == "__main__":
+    main()
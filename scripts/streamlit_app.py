@@ -8,6 +8,7 @@ import sys
 import os
 from datetime import datetime, timedelta
 import pandas as pd
+import threading
 import time
 
 # Ajouter le dossier parent au path
@@ -16,6 +17,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from utils.emotion_detector import EmotionDetector
 from utils.response_generator import ResponseGenerator
 from utils.database import Database
+from utils.response_cache import ResponseCache
+from utils.notification_engine import NotificationEngine
 
 # ============================================================
 # CONFIGURATION PAGE
@@ -154,15 +157,44 @@ button[data-baseweb="tab"] {
 # INITIALISATION SESSION STATE
 # ============================================================
 
+@st.cache_resource
+def load_response_cache():
+    """Cache des réponses LLM partagé par toutes les sessions"""
+    return ResponseCache(persist_path="database/llm_cache.db")
+
 if 'detector' not in st.session_state:
     st.session_state.detector = None
 
-if 'response_gen' not in st.session_state:
-    st.session_state.response_gen = ResponseGenerator()
-
 if 'db' not in st.session_state:
     st.session_state.db = Database()
 
+@st.cache_resource
+def load_ollama_generator():
+    """
+    Client Ollama partagé par toutes les sessions : un disjoncteur, un pool
+    de connexions et un seul préchargement du modèle par processus
+    """
+    try:
+        from utils.ollama_generator import OllamaGenerator
+        generator = OllamaGenerator(model="llama2", cache=load_response_cache())
+    except Exception as e:
+        print(f"⚠️ Erreur init Ollama: {e}")
+        return None
+    threading.Thread(target=generator.warm_up, name="ollama-warm-up", daemon=True).start()
+    return generator
+
+if 'response_gen' not in st.session_state:
+    # Au-delà de 1.5 s sans token, réponse provisoire puis remplacement à l'arrivée du LLM.
+    # Ses threads sont arrêtés quand la session est libérée (close() via weakref.finalize)
+    ollama_gen = load_ollama_generator()
+    st.session_state.response_gen = ResponseGenerator(
+        use_ollama=ollama_gen is not None,
+        cache=load_response_cache(),
+        latency_budget=1.5,
+        db=st.session_state.db,
+        ollama_gen=ollama_gen
+    )
+
 if 'user_id' not in st.session_state:
     st.session_state.user_id = None
 
@@ -181,8 +213,12 @@ if 'chat_history' not in st.session_state:
 if 'emotion_history' not in st.session_state:
     st.session_state.emotion_history = []
 
-if 'last_notification_time' not in st.session_state:
-    st.session_state.last_notification_time = None
+if 'notifications' not in st.session_state:
+    # Humeur lissée et règles évaluées à chaque frame, écritures groupées
+    st.session_state.notifications = NotificationEngine(
+        st.session_state.db,
+        message_fn=st.session_state.response_gen.get_notification_message
+    )
 
 if 'webcam_active' not in st.session_state:
     st.session_state.webcam_active = False
@@ -191,58 +227,30 @@ if 'webcam_active' not in st.session_state:
 # FONCTIONS UTILITAIRES
 # ============================================================
 
-@st.cache_resource
 def load_detector():
-    """Charge le détecteur d'émotions (une seule fois)"""
+    """
+    Charge le détecteur d'émotions de la session : un détecteur (et une part
+    du budget de threads) par session, rendue quand la session se ferme
+    """
     try:
-        detector = EmotionDetector()
+        # Version promue du registre ; variante "recommended" tant qu'aucune ne l'est
+        detector = EmotionDetector(variant="recommended", registry=True, thread_budget=True)
         return detector
     except Exception as e:
         st.error(f"❌ Erreur de chargement du modèle: {e}")
         return None
 
-def check_notification_trigger():
-    """Vérifie si une notification doit être envoyée"""
-    if st.session_state.current_mood == "DOWN":
-        if len(st.session_state.emotion_history) >= 5:
-            # Dernières 5 émotions
-            recent = st.session_state.emotion_history[-5:]
-            negative_count = sum(1 for e in recent if e['mood'] == 'DOWN')
-            
-            # Si 80%+ des dernières émotions sont DOWN
-            if negative_count >= 4:
-                # Vérifier qu'on n'a pas déjà notifié récemment
-                now = datetime.now()
-                if (st.session_state.last_notification_time is None or 
-                    (now - st.session_state.last_notification_time).seconds > 300):  # 5 min
-                    
-                    duration = len([e for e in st.session_state.emotion_history if e['mood'] == 'DOWN'])
-                    
-                    notif_msg = st.session_state.response_gen.get_notification_message(
-                        "DOWN", duration
-                    )
-                    
-                    if notif_msg and st.session_state.user_id:
-                        st.session_state.db.create_notification(
-                            st.session_state.user_id,
-                            "mood_alert",
-                            notif_msg
-                        )
-                        st.session_state.last_notification_time = now
-                        return notif_msg
-    
-    return None
-
-def display_chat_message(role, message, emotion=None):
-    """Affiche un message de chat stylisé"""
+def display_chat_message(role, message, emotion=None, container=None):
+    """Affiche un message de chat stylisé (dans container, ex: st.empty(), si fourni)"""
+    target = container if container is not None else st
     if role == "user":
         emotion_tag = f" [{emotion}]" if emotion else ""
-        st.markdown(
+        target.markdown(
             f'<div class="chat-message user-message">👤 Vous{emotion_tag}: {message}</div>',
             unsafe_allow_html=True
         )
     else:
-        st.markdown(
+        target.markdown(
             f'<div class="chat-message bot-message">🤖 Assistant: {message}</div>',
             unsafe_allow_html=True
         )
@@ -314,6 +322,7 @@ with st.sidebar:
         
         # Notifications
         st.subheader("🔔 Notifications")
+        st.session_state.notifications.flush()
         notifs = st.session_state.db.get_unread_notifications(st.session_state.user_id)
         
         if notifs:
@@ -380,6 +389,17 @@ with tab1:
                     msg['message'],
                     msg.get('emotion')
                 )
+                
+                stats = msg.get('stats')
+                if msg.get('upgraded'):
+                    st.caption("✨ Réponse mise à jour par le LLM")
+                elif stats and stats.get('late'):
+                    st.caption("⏳ Réponse provisoire, le LLM termine sa génération...")
+                elif stats and not stats.get('fallback') and stats.get('ttft') is not None:
+                    st.caption(
+                        f"⚡ 1er token: {stats['ttft']*1000:.0f} ms · "
+                        f"{stats['tokens_per_s']:.1f} tokens/s"
+                    )
     
     st.markdown("---")
     
@@ -412,27 +432,57 @@ with tab1:
                 st.session_state.current_emotion['emotion'] if st.session_state.current_emotion else None
             )
         
-        # Générer réponse du bot
+        # Générer réponse du bot (affichée au fil des tokens)
         include_tip = len(st.session_state.chat_history) % 3 == 0
-
-        bot_response = st.session_state.response_gen.generate_response(
+        
+        with chat_container:
+            display_chat_message('user', user_input, st.session_state.chat_history[-1]['emotion'])
+            bot_placeholder = st.empty()
+        
+        stream_stats = {}
+        bot_entry = {'role': 'bot', 'message': "", 'stats': stream_stats}
+        
+        entry_lock = threading.Lock()
+        
+        # Réponse LLM arrivée après le délai : remplace la réponse provisoire, en
+        # base comme à l'écran (appelé depuis un thread de fond, visible au
+        # prochain rafraîchissement) ; pas de second message dans l'historique
+        def upgrade_reply(reply, entry=bot_entry, db=st.session_state.db, lock=entry_lock):
+            with lock:
+                entry['message'] = reply
+                entry['upgraded'] = True
+                if entry.get('message_id'):
+                    db.update_message(entry['message_id'], reply)
+        
+        bot_response = ""
+        for chunk in st.session_state.response_gen.generate_response_stream(
             st.session_state.current_mood,
-            st.session_state.current_emotion['emotion'] if st.session_state.current_emotion else None,
+            # Même clé lissée que la pré-génération
+            st.session_state.current_emotion['dominant'] if st.session_state.current_emotion else None,
             include_tip=include_tip,
-            context=user_input  # ✅ CORRIGÉ : context au lieu de user_message
-        )
+            context=user_input,  # ✅ CORRIGÉ : context au lieu de user_message
+            stats=stream_stats,
+            on_late_reply=upgrade_reply,
+            # Historique lu en base si connecté, sinon dans la session Streamlit
+            session_id=st.session_state.session_id or "local",
+            turns=None if st.session_state.session_id else [
+                (i + 1, m['role'], m['message'])
+                for i, m in enumerate(st.session_state.chat_history)
+            ]
+        ):
+            bot_response += chunk
+            display_chat_message('bot', bot_response + " ▌", container=bot_placeholder)
         
-        st.session_state.chat_history.append({
-            'role': 'bot',
-            'message': bot_response
-        })
-        
-        if st.session_state.session_id:
-            st.session_state.db.log_message(
-                st.session_state.session_id,
-                'bot',
-                bot_response
-            )
+        with entry_lock:
+            # Réponse déjà remplacée si le LLM a fini avant la fin du flux provisoire
+            bot_entry['message'] = bot_entry['message'] or bot_response
+            if st.session_state.session_id:
+                bot_entry['message_id'] = st.session_state.db.log_message(
+                    st.session_state.session_id,
+                    'bot',
+                    bot_entry['message']
+                )
+        st.session_state.chat_history.append(bot_entry)
         
         st.rerun()
 
@@ -484,9 +534,19 @@ with tab2:
                 
                 # Mise à jour session state
                 if emotions:
-                    st.session_state.current_emotion = emotions[0]
+                    # 'dominant' : émotion majoritaire des dernières frames, clé lissée
+                    # des réponses (la détection d'une seule frame fluctue)
+                    st.session_state.current_emotion = {
+                        **emotions[0],
+                        'dominant': st.session_state.detector.get_dominant_emotion()
+                    }
                     st.session_state.current_mood = mood_state
                     
+                    # Pré-génération des réponses pour ce nouvel état (no-op si inchangé)
+                    st.session_state.response_gen.prefetch(
+                        st.session_state.current_emotion['dominant'], mood_state
+                    )
+                    
                     # Log dans DB
                     if st.session_state.session_id:
                         st.session_state.db.log_emotion(
@@ -507,10 +567,11 @@ with tab2:
                     if len(st.session_state.emotion_history) > 100:
                         st.session_state.emotion_history.pop(0)
                 
-                # Vérifier notifications
-                notif = check_notification_trigger()
-                if notif:
-                    st.toast(notif, icon="⚠️")
+                    # Vérifier notifications
+                    for notif in st.session_state.notifications.observe(
+                        st.session_state.user_id, mood_state
+                    ):
+                        st.toast(notif['message'], icon="⚠️")
                 
                 # Convertir BGR -> RGB pour Streamlit
                 frame_rgb = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
@@ -528,6 +589,7 @@ with tab2:
                 time.sleep(0.03)  # ~30 FPS
             
             cap.release()
+            st.session_state.notifications.flush()
             st.success("✅ Webcam arrêtée")
     else:
         frame_placeholder.info("📷 Clique sur 'Démarrer la webcam' pour lancer la détection")
@@ -587,6 +649,37 @@ with tab3:
         
         st.markdown("---")
         
+        # Historique complet (toutes sessions), agrégé page par page
+        st.markdown("### 🗂️ Historique complet")
+        
+        if st.button("Charger l'historique complet"):
+            emotion_totals = pd.Series(dtype="int64")
+            daily_moods = pd.DataFrame()
+        
+            for page in st.session_state.db.iter_emotion_frames(st.session_state.user_id):
+                emotion_totals = emotion_totals.add(
+                    page['emotion'].value_counts(), fill_value=0
+                )
+                page_daily = page.groupby(
+                    [page['timestamp'].dt.date, 'mood_state'], observed=True
+                ).size().unstack(fill_value=0)
+                daily_moods = daily_moods.add(page_daily, fill_value=0)
+        
+            if emotion_totals.empty:
+                st.info("Aucune donnée encore")
+            else:
+                col1, col2 = st.columns(2)
+        
+                with col1:
+                    st.markdown("**Répartition des émotions**")
+                    st.bar_chart(emotion_totals.astype(int))
+        
+                with col2:
+                    st.markdown("**Humeur par jour**")
+                    st.bar_chart(daily_moods.astype(int))
+        
+        st.markdown("---")
+        
         # Historique des messages
         st.markdown("### 💬 Historique des conversations")
         
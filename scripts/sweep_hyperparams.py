@@ -0,0 +1,94 @@
+"""
+Recherche d'hyperparamètres du CNN d'émotions en parallèle
+
+Chaque essai tourne dans son propre processus avec un nombre de threads
+TensorFlow borné ; le dataset en cache (data/cache) est partagé en memmap.
+Les résultats s'accumulent dans <output-dir>/results.jsonl (reprise
+automatique) et le tableau trié est écrit dans <output-dir>/results.csv.
+
+Usage:
+    python scripts/sweep_hyperparams.py
+    python scripts/sweep_hyperparams.py --trials 8 --workers 4 --threads 2 --epochs 20
+    python scripts/sweep_hyperparams.py --space '{"learning_rate": [0.001, 0.0003], "batch_size": [64]}'
+    python scripts/sweep_hyperparams.py --smoke --epochs 2
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# TensorFlow n'est importé que dans les workers
+from utils.fer_dataset import SMOKE_SIZE
+from utils.sweep import DEFAULT_SPACE, grid, run_sweep, sample
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data/fer2013.csv")
+    parser.add_argument("--cache-dir", default="data/cache")
+    parser.add_argument("--output-dir", default="models/sweep")
+    parser.add_argument("--space", default=None,
+                        help=f"Grille JSON (défaut: {json.dumps(DEFAULT_SPACE)})")
+    parser.add_argument("--trials", type=int, default=None,
+                        help="Tirer N configurations au hasard (défaut: toute la grille)")
+    parser.add_argument("--workers", type=int, default=None, help="Processus parallèles")
+    parser.add_argument("--threads", type=int, default=None, help="Threads TensorFlow par processus")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--patience", type=int, default=5, help="Arrêt anticipé (époques)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--smoke", action="store_true", help="Sous-ensemble de données réduit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 60)
+    print("RECHERCHE D'HYPERPARAMÈTRES")
+    print("=" * 60)
+
+    if not os.path.exists(args.data):
+        print(f"\n❌ ERREUR: Fichier {args.data} non trouvé!")
+        return 1
+
+    space = json.loads(args.space) if args.space else None
+    configs = sample(space, args.trials, args.seed) if args.trials else grid(space)
+
+    def report(result):
+        print(f"   ✅ {result['trial_id']}  val_acc={result['val_accuracy']:.4f}  "
+              f"{result['epochs']} ép.{' (arrêt anticipé)' if result['early_stopped'] else ''}  "
+              f"{result['duration_s']:.0f}s  lr={result['learning_rate']} "
+              f"batch={result['batch_size']} {result['lr_schedule']} "
+              f"dropout={result['dense_dropout']}")
+
+    table = run_sweep(
+        configs,
+        csv_path=args.data,
+        cache_dir=args.cache_dir,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        threads_per_worker=args.threads,
+        epochs=args.epochs,
+        patience=args.patience,
+        seed=args.seed,
+        smoke_size=SMOKE_SIZE if args.smoke else None,
+        on_result=report
+    )
+    if table is None:
+        print("\n⚠️ Aucun essai terminé")
+        return 1
+
+    print("\n" + "=" * 60)
+    print(table.head(10).to_string(index=False))
+    print("=" * 60)
+    print(f"\n💾 Résultats: {os.path.join(args.output_dir, 'results.csv')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
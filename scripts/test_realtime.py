@@ -1,4 +1,5 @@
 
+import argparse
 import cv2
 import sys
 import os
@@ -7,20 +8,40 @@ import os
 
 from utils.emotion_detector import EmotionDetector
 
+def frames_from(cap):
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            print("❌ Erreur de lecture de la frame")
+            return
+        yield frame
+
 def main():
+    parser = argparse.ArgumentParser(description="Test de détection d'émotions en temps réel")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Détection dans N processus (0 = dans ce thread)")
+    args = parser.parse_args()
+    
     print("="*60)
     print("TEST DÉTECTION ÉMOTIONS EN TEMPS RÉEL")
     print("="*60)
     print("\n📹 Initialisation de la webcam...")
     
-    # Initialisation du détecteur
-    detector = EmotionDetector()
+    # Initialisation du détecteur (pool de processus : frames en mémoire partagée,
+    # résultats dans l'ordre, quelques frames de latence en plus)
+    if args.workers:
+        from utils.detector_pool import DetectorPool
+        detector = DetectorPool(workers=args.workers)
+    else:
+        detector = EmotionDetector()
     
     # Ouverture webcam
     cap = cv2.VideoCapture(0)
     
     if not cap.isOpened():
         print("❌ Impossible d'ouvrir la webcam!")
+        if args.workers:
+            detector.close()
         return
     
     print("✅ Webcam ouverte!")
@@ -31,15 +52,13 @@ def main():
     
     frame_count = 0
     
-    while True:
-        ret, frame = cap.read()
-        
-        if not ret:
-            print("❌ Erreur de lecture de la frame")
-            break
-        
-        # Détection d'émotions
-        annotated_frame, emotions = detector.detect_emotion(frame)
+    # Détection d'émotions (pool : plusieurs frames en parallèle, rendues dans l'ordre)
+    if args.workers:
+        results = detector.map(frames_from(cap))
+    else:
+        results = (detector.detect_emotion(frame) for frame in frames_from(cap))
+    
+    for annotated_frame, emotions in results:
         
         # Affichage de l'état d'humeur sur la frame
         mood_state = detector.get_mood_state()
@@ -88,6 +107,8 @@ def main():
     
     cap.release()
     cv2.destroyAllWindows()
+    if args.workers:
+        detector.close()
     
     print(f"\n✅ Test terminé ({frame_count} frames traitées)")
     print("="*60)
@@ -1,227 +1,134 @@
-
-
-import pandas as pd
-import numpy as np
+"""
+Entraînement du modèle de détection d'émotions faciales (FER2013)
+
+Usage:
+    python scripts/train_model.py
+    python scripts/train_model.py --epochs 40 --batch-size 128 --output-dir models/exp1
+    python scripts/train_model.py --smoke            # essai rapide sur un sous-ensemble
+    python scripts/train_model.py --no-resume        # repartir de zéro
+    python scripts/train_model.py --distill-from models/emotion_model.h5   # élève compact
+"""
+
+import argparse
 import os
-from sklearn.model_selection import train_test_split
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Conv2D, MaxPooling2D, Dropout, Flatten, Dense, BatchNormalization
-from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.utils import to_categorical
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras.callbacks import ModelCheckpoint, EarlyStopping, ReduceLROnPlateau
-import json
-
-print("="*60)
-print("ENTRAÎNEMENT MODÈLE DÉTECTION ÉMOTIONS FACIALES")
-print("="*60)
-
-# ============================================================
-# 1. CHARGEMENT ET PRÉPARATION DES DONNÉES
-# ============================================================
-
-csv_path = "data/fer2013.csv"
-
-if not os.path.exists(csv_path):
-    print("\n❌ ERREUR: Fichier fer2013.csv non trouvé!")
-    print("\n📥 Télécharge le dataset depuis:")
-    print("   https://www.kaggle.com/datasets/msambare/fer2013")
-    print("\n   Puis place-le dans: data/fer2013.csv")
-    exit()
-
-print("\n📂 Chargement du dataset FER2013...")
-data = pd.read_csv(csv_path)
-
-print(f"   • Total d'images: {len(data)}")
-print(f"   • Distribution des émotions:")
-emotion_map = {
-    0: "angry", 1: "disgust", 2: "fear", 3: "happy",
-    4: "sad", 5: "surprise", 6: "neutral"
-}
-for idx, count in data['emotion'].value_counts().sort_index().items():
-    print(f"      {emotion_map[idx]}: {count}")
-
-# ============================================================
-# 2. CONVERSION PIXELS → IMAGES
-# ============================================================
-
-def pixels_to_image(pixels_str):
-    """Convertit string de pixels en image 48x48"""
-    pixels = np.fromstring(pixels_str, dtype=int, sep=' ')
-    return pixels.reshape(48, 48, 1)
-
-print("\n🔄 Conversion des pixels en images...")
-
-X = np.stack(data['pixels'].apply(pixels_to_image).values)
-y = data['emotion'].values
-
-# Normalisation
-X = X.astype('float32') / 255.0
-
-# Split train/val/test
-X_train, X_temp, y_train, y_temp = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
-X_val, X_test, y_val, y_test = train_test_split(
-    X_temp, y_temp, test_size=0.5, random_state=42, stratify=y_temp
-)
-
-# One-hot encoding
-num_classes = 7
-y_train_cat = to_categorical(y_train, num_classes)
-y_val_cat = to_categorical(y_val, num_classes)
-y_test_cat = to_categorical(y_test, num_classes)
-
-print(f"   • Train: {X_train.shape[0]} images")
-print(f"   • Validation: {X_val.shape[0]} images")
-print(f"   • Test: {X_test.shape[0]} images")
-
-# ============================================================
-# 3. CONSTRUCTION DU MODÈLE CNN
-# ============================================================
-
-print("\n🏗️  Construction du modèle CNN...")
-
-model = Sequential([
-    # Bloc 1
-    Conv2D(32, (3,3), activation='relu', padding='same', input_shape=(48,48,1)),
-    BatchNormalization(),
-    Conv2D(32, (3,3), activation='relu', padding='same'),
-    BatchNormalization(),
-    MaxPooling2D(pool_size=(2,2)),
-    Dropout(0.25),
-    
-    # Bloc 2
-    Conv2D(64, (3,3), activation='relu', padding='same'),
-    BatchNormalization(),
-    Conv2D(64, (3,3), activation='relu', padding='same'),
-    BatchNormalization(),
-    MaxPooling2D(pool_size=(2,2)),
-    Dropout(0.25),
-    
-    # Bloc 3
-    Conv2D(128, (3,3), activation='relu', padding='same'),
-    BatchNormalization(),
-    Conv2D(128, (3,3), activation='relu', padding='same'),
-    BatchNormalization(),
-    MaxPooling2D(pool_size=(2,2)),
-    Dropout(0.25),
-    
-    # Bloc 4
-    Conv2D(256, (3,3), activation='relu', padding='same'),
-    BatchNormalization(),
-    MaxPooling2D(pool_size=(2,2)),
-    Dropout(0.25),
-    
-    # Couches denses
-    Flatten(),
-    Dense(512, activation='relu'),
-    BatchNormalization(),
-    Dropout(0.5),
-    Dense(256, activation='relu'),
-    BatchNormalization(),
-    Dropout(0.5),
-    Dense(num_classes, activation='softmax')
-])
-
-model.compile(
-    loss='categorical_crossentropy',
-    optimizer=Adam(learning_rate=0.001),
-    metrics=['accuracy']
-)
-
-model.summary()
-
-# ============================================================
-# 4. DATA AUGMENTATION
-# ============================================================
-
-print("\n📊 Configuration de la data augmentation...")
-
-datagen = ImageDataGenerator(
-    rotation_range=15,
-    width_shift_range=0.15,
-    height_shift_range=0.15,
-    zoom_range=0.15,
-    horizontal_flip=True,
-    fill_mode='nearest'
-)
-
-datagen.fit(X_train)
-
-# ============================================================
-# 5. CALLBACKS
-# ============================================================
-
-os.makedirs("models", exist_ok=True)
-
-checkpoint = ModelCheckpoint(
-    "models/emotion_model_best.h5",
-    monitor="val_accuracy",
-    save_best_only=True,
-    mode='max',
-    verbose=1
-)
-
-early_stop = EarlyStopping(
-    monitor="val_loss",
-    patience=15,
-    restore_best_weights=True,
-    verbose=1
-)
-
-reduce_lr = ReduceLROnPlateau(
-    monitor='val_loss',
-    factor=0.5,
-    patience=5,
-    min_lr=0.00001,
-    verbose=1
-)
-
-# ============================================================
-# 6. ENTRAÎNEMENT
-# ============================================================
-
-print("\n🚀 Démarrage de l'entraînement...")
-print("   (Cela peut prendre 30-60 minutes selon ta machine)\n")
-
-batch_size = 64
-epochs = 80
-
-history = model.fit(
-    datagen.flow(X_train, y_train_cat, batch_size=batch_size),
-    validation_data=(X_val, y_val_cat),
-    epochs=epochs,
-    callbacks=[checkpoint, early_stop, reduce_lr],
-    verbose=1
-)
-
-# ============================================================
-# 7. ÉVALUATION
-# ============================================================
-
-print("\n📈 Évaluation sur le test set...")
-
-test_loss, test_acc = model.evaluate(X_test, y_test_cat, verbose=0)
-
-print(f"\n✅ Résultats finaux:")
-print(f"   • Test Loss: {test_loss:.4f}")
-print(f"   • Test Accuracy: {test_acc:.4f} ({test_acc*100:.2f}%)")
-
-# ============================================================
-# 8. SAUVEGARDE FINALE
-# ============================================================
-
-model.save("models/emotion_model.h5")
-
-# Sauvegarde du mapping des émotions
-with open("models/emotion_labels.json", "w", encoding='utf-8') as f:
-    json.dump(emotion_map, f, ensure_ascii=False, indent=2)
-
-print("\n💾 Modèle sauvegardé:")
-print("   • models/emotion_model.h5")
-print("   • models/emotion_labels.json")
-
-print("\n" + "="*60)
-print("✅ ENTRAÎNEMENT TERMINÉ AVEC SUCCÈS!")
-print("="*60)
+import sys
+
+# Ajouter le dossier parent au path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data/fer2013.csv", help="CSV FER2013")
+    parser.add_argument("--cache-dir", default="data/cache", help="Cache uint8 et découpages")
+    parser.add_argument("--epochs", type=int, default=80)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--learning-rate", type=float, default=0.001)
+    parser.add_argument("--output-dir", default=None,
+                        help="Dossier de sortie (défaut: models, ou models/student en distillation)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-resume", dest="resume", action="store_false",
+                        help="Ignorer le dernier checkpoint")
+    parser.add_argument("--smoke", action="store_true",
+                        help="1 époque sur un petit sous-ensemble (vérifie la chaîne complète)")
+
+    distill = parser.add_argument_group("distillation")
+    distill.add_argument("--distill-from", metavar="TEACHER", default=None,
+                         help="Entraîner un élève compact à partir de ce modèle professeur")
+    distill.add_argument("--temperature", type=float, default=4.0)
+    distill.add_argument("--alpha", type=float, default=0.1,
+                         help="Poids de la vérité terrain (1 - alpha pour le professeur)")
+    distill.add_argument("--student-width", type=int, default=32,
+                         help="Filtres du premier bloc de l'élève")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("ENTRAÎNEMENT MODÈLE DÉTECTION ÉMOTIONS FACIALES")
+    print("="*60)
+
+    if not os.path.exists(args.data):
+        print(f"\n❌ ERREUR: Fichier {args.data} non trouvé!")
+        print("\n📥 Télécharge le dataset depuis:")
+        print("   https://www.kaggle.com/datasets/msambare/fer2013")
+        print("\n   Puis place-le dans: data/fer2013.csv")
+        return 1
+
+    if args.distill_from:
+        return distill_main(args)
+
+    # Import tardif : --help et les erreurs d'arguments ne chargent pas TensorFlow
+    from utils.training import train
+
+    result = train(
+        csv_path=args.data,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        output_dir=args.output_dir or "models",
+        seed=args.seed,
+        resume=args.resume,
+        smoke=args.smoke,
+        cache_dir=args.cache_dir,
+        learning_rate=args.learning_rate
+    )
+
+    output_dir = os.path.dirname(result["model_path"])
+    print("\n💾 Modèle sauvegardé:")
+    print(f"   • {result['model_path']}")
+    print(f"   • {os.path.join(output_dir, 'emotion_labels.json')}")
+    print(f"   • Checkpoints de reprise: {os.path.join(output_dir, 'checkpoints')}")
+
+    print("\n" + "="*60)
+    print("✅ ENTRAÎNEMENT TERMINÉ AVEC SUCCÈS!")
+    print("="*60)
+    return 0
+
+
+def distill_main(args):
+    if not os.path.exists(args.distill_from):
+        print(f"\n❌ ERREUR: Modèle professeur {args.distill_from} non trouvé!")
+        return 1
+
+    from utils.training import distill
+
+    report = distill(
+        csv_path=args.data,
+        teacher_path=args.distill_from,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        output_dir=args.output_dir or "models/student",
+        temperature=args.temperature,
+        alpha=args.alpha,
+        width=args.student_width,
+        seed=args.seed,
+        smoke=args.smoke,
+        cache_dir=args.cache_dir,
+        learning_rate=args.learning_rate
+    )
+
+    print("\n" + "="*72)
+    print(f"{'Modèle':<12}{'Paramètres':>12}{'Taille':>10}{'Précision':>11}"
+          f"{'1 visage':>11}{'img/s':>10}")
+    print("-"*72)
+    for name, label in (("teacher", "Professeur"), ("student", "Élève")):
+        m = report[name]
+        print(f"{label:<12}{m['params']:>12,}{m['size_bytes'] / 1e6:>8.2f}MB{m['accuracy']:>11.4f}"
+              f"{m['latency_ms']:>9.2f}ms{m['images_per_s']:>10.0f}")
+    print("="*72)
+    print(f"   • Accélération 1 visage: x{report['speedup']:.1f}, "
+          f"perte de précision: {report['accuracy_drop'] * 100:.2f} points")
+
+    output_dir = os.path.dirname(report["model_path"])
+    print("\n💾 Élève sauvegardé:")
+    print(f"   • {report['model_path']}")
+    print(f"   • {os.path.join(output_dir, 'emotion_labels.json')}")
+    print(f"   • {os.path.join(output_dir, 'distillation_report.json')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
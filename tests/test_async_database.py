@@ -0,0 +1,38 @@
+"""
+Régression : une écriture annulée par l'appelant ne doit pas tuer le
+thread écrivain d'AsyncDatabase
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.async_database import AsyncDatabase
+
+
+def test_cancelled_write_does_not_kill_writer(tmp_path):
+    async def scenario():
+        db = AsyncDatabase(str(tmp_path / "chatbot.db"), labels_path=None, commit_interval=0.2)
+        try:
+            user_id = await db.get_or_create_user("alice")
+            session_id = await db.create_session(user_id)
+
+            # Expire pendant que le thread écrivain attend commit_interval
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(db.log_emotion(session_id, "happy", 0.9, "UP"), 0.01)
+
+            # Les écritures suivantes doivent toujours aboutir
+            await asyncio.wait_for(db.log_emotion(session_id, "sad", 0.8, "DOWN"), 5)
+            await asyncio.wait_for(db.log_message(session_id, "user", "bonjour"), 5)
+            assert db._writer.is_alive()
+
+            stats = await db.get_user_stats(user_id)
+            assert "sad" in [row[0] for row in stats]
+        finally:
+            await db.aclose()
+
+    asyncio.run(scenario())
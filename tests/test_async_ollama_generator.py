@@ -0,0 +1,58 @@
+"""
+Régression : annuler l'appelant pendant la sonde HALF_OPEN (/api/tags) ne
+doit pas bloquer le disjoncteur
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.async_ollama_generator import AsyncOllamaGenerator
+
+
+def test_cancelled_probe_releases_breaker():
+    slow_probe = [True]
+
+    async def handler(request):
+        if request.url.path == "/api/tags":
+            if slow_probe[0]:
+                await asyncio.sleep(5)
+            return httpx.Response(200, json={"models": []})
+        return httpx.Response(200, json={"response": "réponse du LLM"})
+
+    generator = AsyncOllamaGenerator(deadline=10.0)
+    try:
+        generator._client = httpx.AsyncClient(base_url=generator.base_url,
+                                              transport=httpx.MockTransport(handler))
+        # Disjoncteur ouvert dont le délai de récupération est écoulé : prochain appel = sonde
+        generator.breaker._state = generator.breaker.OPEN
+        generator.breaker._opened_at = -1e9
+
+        async def cancel_during_probe():
+            task = asyncio.ensure_future(generator.agenerate_response("happy", "UP", "salut"))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(cancel_during_probe())
+        # L'annulation atteint la boucle dédiée de façon asynchrone
+        for _ in range(100):
+            if generator.completed:
+                break
+            time.sleep(0.02)
+        assert generator.completed == 1
+        assert not generator.breaker._probe_in_flight
+
+        slow_probe[0] = False
+        assert generator.generate_response("happy", "UP", "encore") == "réponse du LLM"
+        assert generator.breaker.state == generator.breaker.CLOSED
+    finally:
+        generator.close()
@@ -0,0 +1,50 @@
+"""
+Réponse provisoire remplacée par celle du LLM : le message est mis à jour,
+l'historique ne contient pas de doublon
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.database import Database
+
+
+def test_update_message_replaces_provisional_reply(tmp_path):
+    db = Database(str(tmp_path / "chatbot.db"), labels_path=None)
+    session_id = db.create_session(db.get_or_create_user("alice"))
+    db.log_message(session_id, "user", "bonjour")
+    message_id = db.log_message(session_id, "bot", "réponse provisoire")
+
+    db.update_message(message_id, "réponse du LLM")
+
+    history = db.get_conversation_history(session_id)
+    assert [row[1] for row in history] == ["bonjour", "réponse du LLM"]
+
+
+def test_schema_version_gates_migrations(tmp_path):
+    import sqlite3
+
+    from utils.database import SCHEMA_VERSION
+
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    with conn:
+        # Ancien schéma (version 0) : libellés et confiance en clair
+        conn.execute("CREATE TABLE emotions_log (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                     "session_id INTEGER NOT NULL, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP, "
+                     "emotion TEXT NOT NULL, confidence REAL NOT NULL, mood_state TEXT)")
+        conn.execute("INSERT INTO emotions_log (session_id, emotion, confidence, mood_state) "
+                     "VALUES (1, 'sad', 0.9, 'DOWN')")
+    conn.close()
+
+    Database(path, labels_path=None)
+    Database(path, labels_path=None)  # déjà à jour : aucune migration rejouée
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(emotions_log)")]
+    assert "emotion_code" in columns and "emotion" not in columns
+    assert conn.execute("SELECT COUNT(*) FROM emotions_log").fetchone()[0] == 1
+    conn.close()
@@ -0,0 +1,32 @@
+"""
+Les règles sont seules à décider du déclenchement : message_fn ne fait que
+mettre en forme le texte
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.notification_engine import NotificationEngine
+
+
+def _observe_minutes(engine, mood, minutes, start=1_000_000.0):
+    """Une frame toutes les 30 s ; l'état change à la 4e (fenêtre de 5, ratio 0.8)"""
+    fired = []
+    for second in range(0, 90 + minutes * 60 + 1, 30):
+        fired += engine.observe(1, mood, timestamp=start + second)
+    return fired
+
+
+def test_rule_fires_at_its_threshold():
+    engine = NotificationEngine(message_fn=lambda mood, minutes: f"{mood} {minutes}")
+    fired = _observe_minutes(engine, "DOWN", 5)
+    assert [n["message"] for n in fired] == ["DOWN 5"]
+
+
+def test_empty_message_falls_back_to_rule_template():
+    engine = NotificationEngine(message_fn=lambda mood, minutes: None)
+    fired = _observe_minutes(engine, "UP", 10)
+    assert len(fired) == 1
+    assert "depuis 10 minutes" in fired[0]["message"]
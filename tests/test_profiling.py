@@ -0,0 +1,35 @@
+"""
+Mesures partagées par l'optimisation, la distillation et l'évaluation
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.profiling import latency_stats, predict_labels, profile
+
+
+def _predict(x):
+    # "Modèle" : classe 1 si l'image est claire, sinon 0
+    bright = x.reshape(len(x), -1).mean(axis=1) > 0.5
+    return np.stack([~bright, bright], axis=1).astype(np.float32)
+
+
+def test_profile_reports_accuracy_and_latency_percentiles():
+    images = np.concatenate([np.zeros((10, 48, 48, 1)), np.full((10, 48, 48, 1), 255)]).astype(np.uint8)
+    labels = np.array([0] * 10 + [1] * 9 + [0])
+
+    metrics = profile(_predict, images, labels, batch_size=8, runs=20)
+
+    assert metrics["accuracy"] == 0.95
+    assert metrics["latency_ms"] <= metrics["latency_p95_ms"] <= metrics["latency_p99_ms"]
+    assert metrics["batch_size"] == 8 and metrics["images_per_s"] > 0
+    assert list(predict_labels(_predict, images, batch_size=3)) == [0] * 10 + [1] * 10
+
+
+def test_latency_stats_keys():
+    stats = latency_stats(_predict, np.zeros((1, 48, 48, 1), np.float32), runs=5, warmup=1)
+    assert set(stats) == {"mean_ms", "p50_ms", "p95_ms", "p99_ms"}
@@ -0,0 +1,104 @@
+"""
+Pré-génération : aucun appel LLM tant que l'état fluctue, le pool se
+remplit une fois l'état stable
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.response_generator import ResponseGenerator
+
+
+class _FakeLLM:
+    is_available = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_stream(self, emotion, mood_state, context, stats=None, history=""):
+        self.calls += 1
+        time.sleep(0.05)
+        yield f"{emotion}/{mood_state}"
+
+    def summarize(self, previous, turns):
+        return previous
+
+
+def _generator(**kwargs):
+    generator = ResponseGenerator(use_ollama=False, **kwargs)
+    generator.use_ollama = True
+    generator.ollama_gen = _FakeLLM()
+    return generator
+
+
+def _feed(generator, states, interval=0.03):
+    for state in states:
+        generator.prefetch(*state)
+        time.sleep(interval)
+
+
+def test_prefetch_waits_for_a_stable_state():
+    generator = _generator(prefetch_size=2, prefetch_settle=0.2)
+
+    _feed(generator, [("happy" if i % 2 else "sad", "UP") for i in range(30)])
+    assert generator.ollama_gen.calls == 0
+
+    _feed(generator, [("happy", "UP")] * 20)
+    assert generator.prefetch_report()["generated"] == 2
+    assert generator.generate_response("UP", "happy") == "happy/UP"
+
+
+def test_close_stops_worker_threads():
+    generator = _generator(prefetch_size=1, prefetch_settle=0.0)
+    generator.prefetch("happy", "UP")
+    _feed(generator, [("happy", "UP")] * 5)
+
+    generator.close()
+    generator.close()
+    assert generator._llm_executor._shutdown and generator._prefetch_executor._shutdown
+
+
+def test_shared_ollama_generator_is_reused():
+    shared = _FakeLLM()
+    first = ResponseGenerator(ollama_gen=shared, prefetch_size=0)
+    second = ResponseGenerator(ollama_gen=shared, prefetch_size=0)
+    assert first.ollama_gen is second.ollama_gen is shared
+    first.close()
+    second.close()
+
+
+def _stream_with(generator, stream):
+    generator.ollama_gen.generate_stream = stream
+    stats = {}
+    reply = "".join(generator.generate_response_stream("DOWN", "sad", context="salut",
+                                                       stats=stats, latency_budget=0.2))
+    return reply, stats
+
+
+def test_failed_stream_is_a_fallback_not_a_pending_upgrade():
+    generator = _generator(prefetch_size=0)
+
+    def failing(*args, **kwargs):
+        raise RuntimeError("Ollama en erreur")
+        yield
+
+    reply, stats = _stream_with(generator, failing)
+    assert reply in generator.responses_down
+    assert stats["fallback"] and not stats["late"]
+    generator.close()
+
+
+def test_slow_stream_is_marked_late():
+    generator = _generator(prefetch_size=0)
+
+    def slow(*args, **kwargs):
+        time.sleep(0.5)
+        yield "réponse"
+
+    reply, stats = _stream_with(generator, slow)
+    assert reply in generator.responses_down
+    assert stats["late"]
+    generator.close()
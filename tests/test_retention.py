@@ -0,0 +1,47 @@
+"""
+Régression : toute ligne supprimée de SQLite par l'archivage doit se
+retrouver dans les fichiers Parquet (y compris les lignes orphelines)
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.database import Database
+from utils.retention import PARQUET_AVAILABLE, RetentionManager
+
+pytestmark = pytest.mark.skipif(not PARQUET_AVAILABLE, reason="pyarrow requis")
+
+
+def test_orphan_rows_are_archived_before_delete(tmp_path):
+    db = Database(str(tmp_path / "chatbot.db"), labels_path=None)
+    user_id = db.get_or_create_user("alice")
+    session_id = db.create_session(user_id)
+    db.log_message(session_id, "user", "avant")
+
+    conn = sqlite3.connect(db.db_path)
+    with conn:
+        # Ligne orpheline au milieu de la plage d'ids du lot
+        conn.execute("INSERT INTO messages (session_id, role, message, timestamp) "
+                     "VALUES (9999, 'user', 'orpheline', '2020-01-01 10:00:00')")
+        conn.execute("INSERT INTO messages (session_id, role, message, timestamp) "
+                     "VALUES (?, 'bot', 'apres', '2020-01-01 11:00:00')", (session_id,))
+        conn.execute("UPDATE messages SET timestamp = '2020-01-01 09:00:00' WHERE message = 'avant'")
+    conn.close()
+
+    retention = RetentionManager(db, archive_dir=str(tmp_path / "archive"), hot_days=30)
+    archived = retention.run_once(now=datetime(2024, 1, 1, tzinfo=timezone.utc))
+    assert archived["messages"] == 3
+
+    conn = sqlite3.connect(db.db_path)
+    remaining = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    conn.close()
+    assert remaining == 0
+
+    messages = retention.query_messages()
+    assert sorted(messages["message"]) == ["apres", "avant", "orpheline"]
@@ -0,0 +1,206 @@
+"""
+Façade asyncio de Database : un thread écrivain unique (écritures
+ordonnées, commits groupés) et un pool de threads lecteurs
+"""
+
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+
+from .database import Database
+
+# Signal d'arrêt du thread écrivain
+_STOP = object()
+
+
+class AsyncDatabase:
+    def __init__(self, db_path="database/chatbot.db", labels_path="models/emotion_labels.json",
+                 readers=4, max_batch=256, commit_interval=0.0):
+        """
+        Args:
+            db_path: chemin de la base SQLite
+            labels_path: mapping des émotions (voir Database)
+            readers: nombre de threads lecteurs
+            max_batch: écritures maximum par transaction
+            commit_interval: attente (s) pour grouper davantage d'écritures
+                avant chaque commit (0 = on regroupe ce qui est déjà en file)
+        """
+        self.db = Database(db_path, labels_path)
+        self.max_batch = max_batch
+        self.commit_interval = commit_interval
+
+        # Statistiques du thread écrivain
+        self.writes = 0
+        self.commits = 0
+
+        self._queue = queue.Queue()
+        self._savepoints = itertools.count()
+        self._writer = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+        self._writer.start()
+
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+        self._closed = False
+
+    # ------------------------------------------------------------
+    # Écritures (ordonnées, dans le thread écrivain)
+    # ------------------------------------------------------------
+
+    async def get_or_create_user(self, username):
+        """Récupère ou crée un utilisateur"""
+        return await self._write("get_or_create_user", username)
+
+    async def create_session(self, user_id):
+        """Crée une nouvelle session"""
+        return await self._write("create_session", user_id)
+
+    async def log_emotion(self, session_id, emotion, confidence, mood_state):
+        """Enregistre une émotion détectée"""
+        return await self._write("log_emotion", session_id, emotion, confidence, mood_state)
+
+    async def log_message(self, session_id, role, message, emotion_context=None):
+        """Enregistre un message (user ou bot)"""
+        return await self._write("log_message", session_id, role, message, emotion_context)
+
+    async def update_message(self, message_id, message):
+        """Remplace le texte d'un message"""
+        return await self._write("update_message", message_id, message)
+
+    async def create_notification(self, user_id, notification_type, message):
+        """Crée une notification"""
+        return await self._write("create_notification", user_id, notification_type, message)
+
+    async def create_notifications(self, notifications):
+        """Crée plusieurs notifications ([(user_id, type, message), ...])"""
+        return await self._write("create_notifications", notifications)
+
+    async def mark_notification_read(self, notification_id):
+        """Marque une notification comme lue"""
+        return await self._write("mark_notification_read", notification_id)
+
+    # ------------------------------------------------------------
+    # Lectures (pool de threads)
+    # ------------------------------------------------------------
+
+    async def get_user_stats(self, user_id, limit=100):
+        """Récupère les statistiques émotionnelles d'un utilisateur"""
+        return await self._read("get_user_stats", user_id, limit)
+
+    async def get_conversation_history(self, session_id):
+        """Récupère l'historique de conversation d'une session"""
+        return await self._read("get_conversation_history", session_id)
+
+    async def get_unread_notifications(self, user_id):
+        """Récupère les notifications non lues"""
+        return await self._read("get_unread_notifications", user_id)
+
+    # ------------------------------------------------------------
+    # Mécanique
+    # ------------------------------------------------------------
+
+    def submit_write(self, method, *args):
+        """
+        Met une écriture en file (utilisable hors asyncio)
+
+        Returns:
+            concurrent.futures.Future: résolu après le commit
+        """
+        if self._closed:
+            raise RuntimeError("AsyncDatabase fermée")
+        future = Future()
+        self._queue.put((method, args, future))
+        return future
+
+    async def _write(self, method, *args):
+        return await asyncio.wrap_future(self.submit_write(method, *args))
+
+    async def _read(self, method, *args):
+        if self._closed:
+            raise RuntimeError("AsyncDatabase fermée")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, getattr(self.db, method), *args)
+
+    def _next_batch(self):
+        """Bloque jusqu'à une écriture, puis vide la file (max_batch)"""
+        batch = [self._queue.get()]
+        if batch[0] is _STOP:
+            return batch
+
+        if self.commit_interval:
+            time.sleep(self.commit_interval)
+
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is _STOP:
+                break
+        return batch
+
+    def _writer_loop(self):
+        stopping = False
+
+        while not stopping:
+            batch = self._next_batch()
+            if batch[-1] is _STOP:
+                stopping = True
+                batch = batch[:-1]
+            # Écritures annulées par l'appelant (ex. asyncio.wait_for expiré) : ignorées ;
+            # les autres passent à l'état RUNNING et ne peuvent plus être annulées
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            results = []
+            try:
+                with self.db.batch(synchronous="NORMAL") as conn:
+                    for method, args, future in batch:
+                        # Un SAVEPOINT par écriture : une erreur n'annule que la sienne
+                        name = f"w{next(self._savepoints)}"
+                        conn.execute(f"SAVEPOINT {name}")
+                        try:
+                            results.append((future, getattr(self.db, method)(*args), None))
+                            conn.execute(f"RELEASE {name}")
+                        except Exception as e:
+                            conn.execute(f"ROLLBACK TO {name}")
+                            conn.execute(f"RELEASE {name}")
+                            results.append((future, None, e))
+            except Exception as e:
+                # Échec du commit : aucune écriture du lot n'est persistée
+                results = [(future, None, e) for _, _, future in batch]
+
+            self.writes += len(batch)
+            self.commits += 1
+
+            # Les appelants ne sont réveillés qu'après le commit ; le thread
+            # écrivain ne doit jamais mourir sur une livraison de résultat
+            for future, result, error in results:
+                try:
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(result)
+                except InvalidStateError:
+                    pass
+
+    def close(self):
+        """Vide la file d'écritures puis arrête les threads"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._readers.shutdown(wait=True)
+
+    async def aclose(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
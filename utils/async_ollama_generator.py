@@ -0,0 +1,243 @@
+"""
+Client Ollama asynchrone (httpx) à concurrence bornée
+"""
+
+import asyncio
+import threading
+
+import httpx
+
+from .ollama_generator import OllamaGenerator
+
+
+class AsyncOllamaGenerator(OllamaGenerator):
+    """
+    Même prompts et fallbacks qu'OllamaGenerator, mais les appels passent
+    par une boucle asyncio dédiée (thread de fond) :
+        - au plus max_concurrency requêtes vers Ollama en même temps
+        - délai maximum par requête (attente en file comprise)
+        - annulation propagée à la requête HTTP
+        - prompts identiques simultanés regroupés en une seule requête
+
+    Utilisable depuis un serveur asyncio (await agenerate_response(...))
+    comme depuis du code synchrone (generate_response(...), bloquant).
+    """
+
+    def __init__(self, model="llama2", base_url="http://localhost:11434",
+                 max_concurrency=4, deadline=30.0, **kwargs):
+        """
+        Args:
+            model, base_url, **kwargs: voir OllamaGenerator
+            max_concurrency: requêtes simultanées maximum vers Ollama
+            deadline: délai maximum par réponse (s), file d'attente comprise
+        """
+        super().__init__(model=model, base_url=base_url, **kwargs)
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+
+        # Statistiques
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.deadline_exceeded = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name="ollama-async", daemon=True)
+        self._thread.start()
+        # Client HTTP et sémaphore appartiennent à la boucle dédiée
+        self._client, self._semaphore = self._submit(self._setup()).result()
+
+    async def _setup(self):
+        client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency),
+        )
+        return client, asyncio.Semaphore(self.max_concurrency)
+
+    def _submit(self, coro):
+        """Planifie une coroutine sur la boucle dédiée (concurrent.futures.Future)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    # ------------------------------------------------------------
+    # API asynchrone
+    # ------------------------------------------------------------
+
+    async def agenerate_response(self, emotion, mood_state, user_message="", deadline=None, *,
+                                 history=""):
+        """
+        Génère une réponse sans bloquer la boucle de l'appelant
+
+        Args:
+            emotion, mood_state, user_message, history: voir OllamaGenerator.generate_response
+            deadline: délai maximum (s), self.deadline par défaut
+
+        Returns:
+            str: réponse générée ou fallback (délai dépassé, erreur, Ollama down)
+        """
+        future = self._submit(self._generate(emotion, mood_state, user_message, deadline, history))
+        # Annuler l'appelant annule aussi la requête sur la boucle dédiée
+        return await asyncio.wrap_future(future)
+
+    async def _generate(self, emotion, mood_state, user_message, deadline, history=""):
+        deadline = self.deadline if deadline is None else deadline
+        prompt = self.build_prompt(emotion, mood_state, user_message, history)
+
+        # Réponse en cache : ni file d'attente ni requête
+        cached = self._cached(prompt, user_message)
+        if cached is not None:
+            return cached
+
+        key = self._flight_key(prompt)
+        leader, flight = self.single_flight.begin(key)
+        if not leader:
+            return await self._join(flight, mood_state, deadline)
+
+        reply = None
+        try:
+            reply = await self._generate_bounded(prompt, user_message, deadline)
+        finally:
+            # Publié même en cas d'annulation : les suiveurs passent alors au fallback
+            self.single_flight.end(key, reply)
+        return reply or self._fallback_response(mood_state)
+
+    async def _join(self, flight, mood_state, deadline):
+        """Attend la réponse d'une requête identique déjà en cours"""
+        try:
+            # shield : le délai de ce suiveur n'annule pas la requête partagée
+            reply = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(flight)), deadline)
+        except asyncio.TimeoutError:
+            self.deadline_exceeded += 1
+            print("⏱️ Délai dépassé (Ollama)")
+            reply = None
+        except Exception:
+            reply = None
+        finally:
+            self.completed += 1
+        return reply or self._fallback_response(mood_state)
+
+    async def _generate_bounded(self, prompt, user_message, deadline):
+        """Requête sous sémaphore et délai ; None si aucune réponse exploitable"""
+        progress = {"started": False}
+        try:
+            # wait_for plutôt qu'asyncio.timeout (Python 3.11+) : annule la file et la requête
+            return await asyncio.wait_for(self._acquire_and_request(prompt, user_message, progress),
+                                          deadline)
+        except asyncio.TimeoutError:
+            self.deadline_exceeded += 1
+            print("⏱️ Délai dépassé (Ollama)")
+            # Un délai dépassé en file d'attente n'est pas une panne du serveur
+            if progress["started"]:
+                self.breaker.record_failure()
+            return None
+        finally:
+            self.completed += 1
+
+    async def _acquire_and_request(self, prompt, user_message, progress):
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        progress["started"] = True
+        self.in_flight += 1
+        try:
+            return await self._request(prompt, user_message)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def _request(self, prompt, user_message):
+        if not await self._ensure_available_async():
+            return None
+
+        try:
+            response = await self._client.post("/api/generate",
+                                               json=self._payload(prompt, stream=False))
+        except httpx.TimeoutException:
+            print("⏱️ Timeout Ollama")
+            self.breaker.record_failure()
+            return None
+        except httpx.HTTPError as e:
+            print(f"❌ Erreur Ollama: {e}")
+            self.breaker.record_failure()
+            return None
+
+        if response.status_code != 200:
+            print(f"❌ Erreur Ollama: {response.status_code}")
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            return None
+
+        self.breaker.record_success()
+        generated_text = response.json().get('response', '').strip()
+        if not generated_text:
+            return None
+
+        self._store(prompt, user_message, generated_text)
+        return generated_text
+
+    async def _ensure_available_async(self):
+        """Équivalent non bloquant de OllamaGenerator._ensure_available"""
+        if not self.breaker.allow_request():
+            return False
+
+        if not self.breaker.health_expired():
+            return True
+
+        try:
+            response = await self._client.get(
+                "/api/tags", timeout=httpx.Timeout(2, connect=self.connect_timeout)
+            )
+            available = response.status_code == 200
+        except httpx.HTTPError:
+            available = False
+        except asyncio.CancelledError:
+            # Ni succès ni échec : sans cela la sonde HALF_OPEN resterait « en vol » pour toujours
+            self.breaker.release_probe()
+            raise
+
+        if available:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return available
+
+    # ------------------------------------------------------------
+    # API synchrone
+    # ------------------------------------------------------------
+
+    def generate_response(self, emotion, mood_state, user_message="", deadline=None, *, history=""):
+        """
+        Version bloquante, partageant la même limite de concurrence
+        (history par mot-clé : deadline garde sa position d'origine)
+
+        Returns:
+            str: réponse générée ou fallback
+        """
+        return self._submit(self._generate(emotion, mood_state, user_message, deadline,
+                                           history)).result()
+
+    def close(self):
+        """Ferme le client HTTP et arrête la boucle dédiée"""
+        if not self._loop.is_running():
+            return
+        self._submit(self._client.aclose()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "deadline_exceeded": self.deadline_exceeded,
+            "breaker": self.breaker.state,
+            "deduplicated": self.single_flight.stats()["deduplicated"],
+        }
@@ -0,0 +1,91 @@
+"""
+Disjoncteur (circuit breaker) pour les appels à un service externe
+"""
+
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    CLOSED    : appels autorisés, les échecs consécutifs sont comptés
+    OPEN      : appels refusés immédiatement (fallback instantané)
+    HALF_OPEN : après recovery_timeout, une seule sonde est autorisée ;
+                succès -> CLOSED, échec -> OPEN
+
+    L'état de santé a une durée de vie (health_ttl) : passé ce délai sans
+    succès, health_expired() demande une nouvelle vérification.
+    """
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, failure_threshold=3, recovery_timeout=15.0, health_ttl=30.0):
+        """
+        Args:
+            failure_threshold: échecs consécutifs avant ouverture
+            recovery_timeout: secondes en OPEN avant une sonde
+            health_ttl: secondes de validité d'un succès
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.health_ttl = health_ttl
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._last_success = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow_request(self):
+        """Indique si un appel peut partir (passe en HALF_OPEN si c'est l'heure de sonder)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = True
+                return True
+
+            # HALF_OPEN : une seule sonde à la fois
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def health_expired(self):
+        """Vrai si aucun succès récent ne garantit la disponibilité"""
+        with self._lock:
+            return (self._state != self.CLOSED
+                    or self._last_success is None
+                    or time.monotonic() - self._last_success > self.health_ttl)
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+            self._last_success = time.monotonic()
+
+    def release_probe(self):
+        """Sonde abandonnée sans verdict (appelant annulé) : la suivante pourra partir"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
@@ -0,0 +1,170 @@
+"""
+Contexte de conversation borné pour le LLM : derniers échanges sous un
+budget de tokens, échanges plus anciens condensés dans un résumé mis en
+cache par session
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+ROLE_LABELS = {"user": "Utilisateur", "bot": "Assistant"}
+
+
+def estimate_tokens(text):
+    """Estimation grossière (~4 caractères par token), sans tokenizer"""
+    return len(text) // 4 + 1
+
+
+def format_turn(role, message):
+    return f"{ROLE_LABELS.get(role, role)}: {message.strip()}"
+
+
+def extractive_summary(previous, turns, max_chars=80):
+    """
+    Résumé sans LLM : début de chaque message utilisateur ajouté au résumé
+    précédent (les réponses de l'assistant sont omises)
+    """
+    points = [message.strip()[:max_chars] for _, role, message in turns if role == "user"]
+    lines = [previous] if previous else []
+    lines.extend(f"- {point}" for point in points if point)
+    return "\n".join(lines)
+
+
+class ConversationContext:
+    def __init__(self, db=None, token_budget=768, max_turns=40, summary_tokens=160,
+                 summarizer=None, max_sessions=256):
+        """
+        Args:
+            db: Database source des messages (get_recent_messages), optionnelle
+                si les échanges sont fournis à build()
+            token_budget: tokens maximum pour résumé + échanges récents
+            max_turns: messages lus au plus par tour (coût constant)
+            summary_tokens: taille maximum du résumé (les points les plus
+                anciens sont retirés au-delà)
+            summarizer: callable(previous, turns) -> str exécuté en arrière-plan
+                (ex: OllamaGenerator.summarize) ; None = résumé extractif immédiat
+            max_sessions: résumés gardés en mémoire (LRU)
+        """
+        self.db = db
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self.max_sessions = max_sessions
+
+        # session -> {"text": résumé, "upto": dernier id résumé, "pending": bool}
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary") \
+            if summarizer is not None else None
+
+    def build(self, session_id, turns=None, current_message=""):
+        """
+        Historique à injecter dans le prompt
+
+        Args:
+            session_id: clé de session (cache du résumé)
+            turns: échanges (id, role, message) chronologiques ; None = lus
+                dans la base
+            current_message: message en cours, retiré s'il est déjà le dernier échange
+
+        Returns:
+            str: résumé puis derniers échanges ("" si aucun)
+        """
+        if turns is None:
+            if self.db is None or session_id is None:
+                return ""
+            turns = self.db.get_recent_messages(session_id, self.max_turns)
+        turns = list(turns)[-self.max_turns:]
+
+        if turns and current_message and turns[-1][1] == "user" \
+                and turns[-1][2].strip() == current_message.strip():
+            turns = turns[:-1]
+        if not turns:
+            return ""
+
+        summary = self._summary(session_id)
+        budget = self.token_budget - (estimate_tokens(summary["text"]) if summary["text"] else 0)
+
+        # Échanges récents, du plus récent au plus ancien, tant que le budget le permet
+        recent = []
+        for turn in reversed(turns):
+            if turn[0] <= summary["upto"]:
+                break
+            line = format_turn(turn[1], turn[2])
+            cost = estimate_tokens(line)
+            if cost > budget:
+                break
+            budget -= cost
+            recent.append(line)
+        recent.reverse()
+
+        # Échanges sortis de la fenêtre et pas encore résumés
+        overflow = [t for t in turns[:len(turns) - len(recent)] if t[0] > summary["upto"]]
+        if overflow:
+            self._fold(session_id, overflow)
+            summary = self._summary(session_id)
+            # Le résumé a pu grossir : les plus anciens échanges récents seront résumés au tour suivant
+            budget = self.token_budget - (estimate_tokens(summary["text"]) if summary["text"] else 0)
+            while recent and sum(estimate_tokens(line) for line in recent) > budget:
+                recent.pop(0)
+
+        parts = []
+        if summary["text"]:
+            parts.append(f"Résumé des échanges précédents:\n{summary['text']}")
+        if recent:
+            parts.append("\n".join(recent))
+        return "\n\n".join(parts)
+
+    def _summary(self, session_id):
+        with self._lock:
+            summary = self._summaries.get(session_id)
+            if summary is None:
+                summary = {"text": "", "upto": 0, "pending": False}
+                self._summaries[session_id] = summary
+                while len(self._summaries) > self.max_sessions:
+                    self._summaries.popitem(last=False)
+            self._summaries.move_to_end(session_id)
+            return dict(summary)
+
+    def _fold(self, session_id, turns):
+        """Intègre des échanges au résumé (immédiat, ou en arrière-plan avec un summarizer)"""
+        if self._executor is None:
+            self._apply(session_id, extractive_summary, turns)
+            return
+
+        with self._lock:
+            summary = self._summaries[session_id]
+            if summary["pending"]:
+                return
+            summary["pending"] = True
+        # Pendant le résumé, ces échanges sont simplement omis du prompt
+        self._executor.submit(self._apply, session_id, self.summarizer, turns)
+
+    def _apply(self, session_id, summarizer, turns):
+        with self._lock:
+            previous = self._summaries.get(session_id, {}).get("text", "")
+
+        try:
+            text = summarizer(previous, turns)
+        except Exception as e:
+            print(f"⚠️ Résumé de conversation impossible: {e}")
+            text = extractive_summary(previous, turns)
+
+        text = self._truncate(text or previous)
+        with self._lock:
+            summary = self._summaries.setdefault(session_id, {"text": "", "upto": 0, "pending": False})
+            summary.update(text=text, upto=max(summary["upto"], turns[-1][0]), pending=False)
+
+    def _truncate(self, text):
+        """Garde la fin du résumé (points les plus récents) dans summary_tokens"""
+        lines = text.splitlines()
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_tokens:
+            lines.pop(0)
+        return "\n".join(lines)[-self.summary_tokens * 4:]
+
+    def forget(self, session_id):
+        """Oublie le résumé d'une session (fin de session)"""
+        with self._lock:
+            self._summaries.pop(session_id, None)
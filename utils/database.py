@@ -3,13 +3,60 @@ Gestion de la base de données SQLite pour l'historique
 """
 
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
+import json
 import os
+import threading
+
+# Version du schéma (PRAGMA user_version)
+#   0: emotions_log en TEXT/REAL (emotion, confidence, mood_state)
+#   1: emotions_log compact (codes entiers + confiance quantifiée)
+SCHEMA_VERSION = 1
+
+# Mapping par défaut, identique à models/emotion_labels.json
+DEFAULT_EMOTION_LABELS = {
+    0: "angry", 1: "disgust", 2: "fear", 3: "happy",
+    4: "sad", 5: "surprise", 6: "neutral"
+}
+
+MOOD_STATES = {0: "NEUTRAL", 1: "UP", 2: "DOWN"}
+
+# Confiance stockée en entier: round(confidence * CONFIDENCE_SCALE)
+CONFIDENCE_SCALE = 10000
+
+# Taille de page par défaut des itérateurs d'historique
+DEFAULT_PAGE_SIZE = 500
+
+
+def load_emotion_labels(labels_path="models/emotion_labels.json"):
+    """Charge le mapping code -> émotion (fallback sur le mapping FER2013)"""
+    if labels_path and os.path.exists(labels_path):
+        with open(labels_path, 'r', encoding='utf-8') as f:
+            return {int(k): v for k, v in json.load(f).items()}
+    return dict(DEFAULT_EMOTION_LABELS)
+
+
+def quantize_confidence(confidence):
+    """Convertit une confiance [0, 1] en entier"""
+    return int(round(float(confidence) * CONFIDENCE_SCALE))
+
+
+def dequantize_confidence(confidence_q):
+    """Convertit une confiance entière en float [0, 1]"""
+    return confidence_q / CONFIDENCE_SCALE
+
 
 class Database:
-    def __init__(self, db_path="database/chatbot.db"):
+    def __init__(self, db_path="database/chatbot.db", labels_path="models/emotion_labels.json",
+                 timeout=30):
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.db_path = db_path
+        self.labels_path = labels_path
+        # Attente max (s) sur un verrou avant "database is locked"
+        self.timeout = timeout
+        # Connexion partagée par thread pendant un batch()
+        self._local = threading.local()
         self.init_database()
     
     def init_database(self):
@@ -17,6 +64,11 @@ class Database:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # Compaction incrémentale (effective sur une base neuve, sinon après VACUUM)
+        # et WAL : lecteurs et archivage ne bloquent pas les écritures
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.execute("PRAGMA journal_mode = WAL")
+        
         # Table users
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -37,16 +89,42 @@ class Database:
             )
         """)
         
-        # Table emotions_log
+        # Tables de correspondance code -> libellé
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS emotion_labels (
+                code INTEGER PRIMARY KEY,
+                label TEXT UNIQUE NOT NULL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS mood_states (
+                code INTEGER PRIMARY KEY,
+                label TEXT UNIQUE NOT NULL
+            )
+        """)
+        
+        cursor.executemany(
+            "INSERT OR IGNORE INTO emotion_labels (code, label) VALUES (?, ?)",
+            load_emotion_labels(self.labels_path).items()
+        )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO mood_states (code, label) VALUES (?, ?)",
+            MOOD_STATES.items()
+        )
+        
+        # Table emotions_log (schéma compact)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS emotions_log (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 session_id INTEGER NOT NULL,
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                emotion TEXT NOT NULL,
-                confidence REAL NOT NULL,
-                mood_state TEXT,
-                FOREIGN KEY (session_id) REFERENCES sessions(id)
+                emotion_code INTEGER NOT NULL,
+                confidence_q INTEGER NOT NULL,
+                mood_code INTEGER,
+                FOREIGN KEY (session_id) REFERENCES sessions(id),
+                FOREIGN KEY (emotion_code) REFERENCES emotion_labels(code),
+                FOREIGN KEY (mood_code) REFERENCES mood_states(code)
             )
         """)
         
@@ -76,141 +154,472 @@ class Database:
             )
         """)
         
+        # Migration des bases existantes vers le schéma compact
+        self._migrate(cursor)
+        
+        # Index pour la pagination par clé (keyset) des historiques
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user_id, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_emotions_session ON emotions_log (session_id, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications (user_id, id)")
+        
+        # Vue lisible (libellés) pour les requêtes ad hoc
+        cursor.execute(f"""
+            CREATE VIEW IF NOT EXISTS emotions_log_view AS
+            SELECT e.id, e.session_id, e.timestamp,
+                   el.label AS emotion,
+                   e.confidence_q / {float(CONFIDENCE_SCALE)} AS confidence,
+                   ms.label AS mood_state
+            FROM emotions_log e
+            JOIN emotion_labels el ON el.code = e.emotion_code
+            LEFT JOIN mood_states ms ON ms.code = e.mood_code
+        """)
+        
         conn.commit()
+        
+        self._load_codes(cursor)
+        
         conn.close()
     
-    def get_or_create_user(self, username):
-        """Récupère ou crée un utilisateur"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _load_codes(self, cursor):
+        """(Re)charge les caches libellé -> code"""
+        cursor.execute("SELECT code, label FROM emotion_labels")
+        self.emotion_codes = {label: code for code, label in cursor.fetchall()}
+        cursor.execute("SELECT code, label FROM mood_states")
+        self.mood_codes = {label: code for code, label in cursor.fetchall()}
+    
+    def _migrate(self, cursor):
+        """Met à jour le schéma jusqu'à SCHEMA_VERSION (étapes selon PRAGMA user_version)"""
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        
+        if version < 1:
+            # Base neuve (tables déjà créées en compact) ou ancienne base TEXT/REAL
+            cursor.execute("PRAGMA table_info(emotions_log)")
+            columns = [row[1] for row in cursor.fetchall()]
+            if "emotion" in columns:
+                self._migrate_compact_emotions(cursor)
+        
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def _migrate_compact_emotions(self, cursor):
+        """Convertit emotions_log (TEXT/REAL) vers les codes entiers"""
+        print("🔄 Migration de emotions_log vers le schéma compact...")
         
-        cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        result = cursor.fetchone()
+        # Libellés inconnus (hors emotion_labels.json) : nouveaux codes
+        for table, column in (("emotion_labels", "emotion"), ("mood_states", "mood_state")):
+            cursor.execute(f"""
+                SELECT DISTINCT {column} FROM emotions_log
+                WHERE {column} IS NOT NULL
+                  AND {column} NOT IN (SELECT label FROM {table})
+            """)
+            for (label,) in cursor.fetchall():
+                cursor.execute(
+                    f"INSERT INTO {table} (code, label) "
+                    f"VALUES ((SELECT COALESCE(MAX(code), -1) + 1 FROM {table}), ?)",
+                    (label,)
+                )
         
-        if result:
-            user_id = result[0]
-        else:
-            cursor.execute("INSERT INTO users (username) VALUES (?)", (username,))
-            user_id = cursor.lastrowid
+        cursor.execute("""
+            CREATE TABLE emotions_log_compact (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER NOT NULL,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                emotion_code INTEGER NOT NULL,
+                confidence_q INTEGER NOT NULL,
+                mood_code INTEGER,
+                FOREIGN KEY (session_id) REFERENCES sessions(id),
+                FOREIGN KEY (emotion_code) REFERENCES emotion_labels(code),
+                FOREIGN KEY (mood_code) REFERENCES mood_states(code)
+            )
+        """)
+        
+        cursor.execute(f"""
+            INSERT INTO emotions_log_compact
+                (id, session_id, timestamp, emotion_code, confidence_q, mood_code)
+            SELECT e.id, e.session_id, e.timestamp, el.code,
+                   CAST(ROUND(e.confidence * {CONFIDENCE_SCALE}) AS INTEGER),
+                   ms.code
+            FROM emotions_log e
+            JOIN emotion_labels el ON el.label = e.emotion
+            LEFT JOIN mood_states ms ON ms.label = e.mood_state
+            ORDER BY e.id
+        """)
+        migrated = cursor.rowcount
+        
+        cursor.execute("DROP VIEW IF EXISTS emotions_log_view")
+        cursor.execute("DROP TABLE emotions_log")
+        cursor.execute("ALTER TABLE emotions_log_compact RENAME TO emotions_log")
+        
+        print(f"✅ Migration terminée ({migrated} lignes converties)")
+    
+    def _emotion_code(self, cursor, emotion):
+        """Retourne le code d'une émotion (créé si inconnu)"""
+        code = self.emotion_codes.get(emotion)
+        if code is None:
+            cursor.execute("INSERT OR IGNORE INTO emotion_labels (code, label) "
+                           "VALUES ((SELECT COALESCE(MAX(code), -1) + 1 FROM emotion_labels), ?)",
+                           (emotion,))
+            cursor.execute("SELECT code FROM emotion_labels WHERE label = ?", (emotion,))
+            code = cursor.fetchone()[0]
+            self.emotion_codes[emotion] = code
+        return code
+    
+    def _mood_code(self, cursor, mood_state):
+        """Retourne le code d'un état d'humeur (créé si inconnu)"""
+        if mood_state is None:
+            return None
+        code = self.mood_codes.get(mood_state)
+        if code is None:
+            cursor.execute("INSERT OR IGNORE INTO mood_states (code, label) "
+                           "VALUES ((SELECT COALESCE(MAX(code), -1) + 1 FROM mood_states), ?)",
+                           (mood_state,))
+            cursor.execute("SELECT code FROM mood_states WHERE label = ?", (mood_state,))
+            code = cursor.fetchone()[0]
+            self.mood_codes[mood_state] = code
+        return code
+    
+    def _connect(self):
+        """Ouvre une connexion (attente sur verrou plutôt qu'erreur immédiate)"""
+        return sqlite3.connect(self.db_path, timeout=self.timeout)
+    
+    @contextmanager
+    def _cursor(self, commit=True):
+        """
+        Curseur sur la connexion du batch() en cours dans ce thread,
+        sinon sur une connexion ouverte et fermée pour l'appel
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn.cursor()
+            return
+        
+        conn = self._connect()
+        try:
+            yield conn.cursor()
+            if commit:
+                conn.commit()
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def batch(self, synchronous=None):
+        """
+        Regroupe plusieurs appels dans une seule transaction (un seul commit)
+        
+        Args:
+            synchronous: niveau PRAGMA synchronous de la connexion (ex: "NORMAL",
+                sûr en mode WAL), None = défaut SQLite
+        
+        Usage:
+            with db.batch():
+                for e in emotions:
+                    db.log_emotion(...)
+        
+        Yields:
+            sqlite3.Connection: connexion partagée par les appels de ce thread
+        """
+        if getattr(self._local, "conn", None) is not None:
+            # batch() imbriqué : la transaction englobante décide du commit
+            yield self._local.conn
+            return
+        
+        conn = self._connect()
+        self._local.conn = conn
+        try:
+            if synchronous:
+                conn.execute(f"PRAGMA synchronous = {synchronous}")
+            conn.execute("BEGIN")
+            yield conn
             conn.commit()
+        except BaseException:
+            conn.rollback()
+            # Des codes créés dans la transaction annulée peuvent être en cache
+            self._load_codes(conn.cursor())
+            raise
+        finally:
+            self._local.conn = None
+            conn.close()
+    
+    def get_or_create_user(self, username):
+        """Récupère ou crée un utilisateur"""
+        with self._cursor() as cursor:
+            cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
+            result = cursor.fetchone()
+            
+            if result:
+                user_id = result[0]
+            else:
+                cursor.execute("INSERT INTO users (username) VALUES (?)", (username,))
+                user_id = cursor.lastrowid
         
-        conn.close()
         return user_id
     
     def create_session(self, user_id):
         """Crée une nouvelle session"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("INSERT INTO sessions (user_id) VALUES (?)", (user_id,))
-        session_id = cursor.lastrowid
+        with self._cursor() as cursor:
+            cursor.execute("INSERT INTO sessions (user_id) VALUES (?)", (user_id,))
+            session_id = cursor.lastrowid
         
-        conn.commit()
-        conn.close()
         return session_id
     
     def log_emotion(self, session_id, emotion, confidence, mood_state):
         """Enregistre une émotion détectée"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO emotions_log (session_id, emotion, confidence, mood_state)
-            VALUES (?, ?, ?, ?)
-        """, (session_id, emotion, confidence, mood_state))
-        
-        conn.commit()
-        conn.close()
+        with self._cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO emotions_log (session_id, emotion_code, confidence_q, mood_code)
+                VALUES (?, ?, ?, ?)
+            """, (
+                session_id,
+                self._emotion_code(cursor, emotion),
+                quantize_confidence(confidence),
+                self._mood_code(cursor, mood_state)
+            ))
     
     def log_message(self, session_id, role, message, emotion_context=None):
-        """Enregistre un message (user ou bot)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO messages (session_id, role, message, emotion_context)
-            VALUES (?, ?, ?, ?)
-        """, (session_id, role, message, emotion_context))
-        
-        conn.commit()
-        conn.close()
+        """Enregistre un message (user ou bot) et retourne son id"""
+        with self._cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO messages (session_id, role, message, emotion_context)
+                VALUES (?, ?, ?, ?)
+            """, (session_id, role, message, emotion_context))
+            return cursor.lastrowid
+    
+    def update_message(self, message_id, message):
+        """Remplace le texte d'un message (réponse provisoire remplacée par celle du LLM)"""
+        with self._cursor() as cursor:
+            cursor.execute("UPDATE messages SET message = ? WHERE id = ?", (message, message_id))
     
     def create_notification(self, user_id, notification_type, message):
         """Crée une notification"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO notifications (user_id, notification_type, message)
-            VALUES (?, ?, ?)
-        """, (user_id, notification_type, message))
-        
-        conn.commit()
-        conn.close()
+        with self._cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO notifications (user_id, notification_type, message)
+                VALUES (?, ?, ?)
+            """, (user_id, notification_type, message))
+    
+    def create_notifications(self, notifications):
+        """Crée plusieurs notifications en une transaction ([(user_id, type, message), ...])"""
+        with self._cursor() as cursor:
+            cursor.executemany("""
+                INSERT INTO notifications (user_id, notification_type, message)
+                VALUES (?, ?, ?)
+            """, notifications)
     
     def get_user_stats(self, user_id, limit=100):
         """Récupère les statistiques émotionnelles d'un utilisateur"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT e.emotion, e.confidence, e.mood_state, e.timestamp
-            FROM emotions_log e
-            JOIN sessions s ON e.session_id = s.id
-            WHERE s.user_id = ?
-            ORDER BY e.timestamp DESC
-            LIMIT ?
-        """, (user_id, limit))
-        
-        results = cursor.fetchall()
-        conn.close()
+        with self._cursor(commit=False) as cursor:
+            cursor.execute(f"""
+                SELECT el.label, e.confidence_q / {float(CONFIDENCE_SCALE)}, ms.label, e.timestamp
+                FROM emotions_log e
+                JOIN sessions s ON e.session_id = s.id
+                JOIN emotion_labels el ON el.code = e.emotion_code
+                LEFT JOIN mood_states ms ON ms.code = e.mood_code
+                WHERE s.user_id = ?
+                ORDER BY e.timestamp DESC
+                LIMIT ?
+            """, (user_id, limit))
+            
+            results = cursor.fetchall()
         
         return results
     
     def get_conversation_history(self, session_id):
         """Récupère l'historique de conversation d'une session"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT role, message, emotion_context, timestamp
-            FROM messages
-            WHERE session_id = ?
-            ORDER BY timestamp ASC
-        """, (session_id,))
-        
-        results = cursor.fetchall()
-        conn.close()
+        with self._cursor(commit=False) as cursor:
+            cursor.execute("""
+                SELECT role, message, emotion_context, timestamp
+                FROM messages
+                WHERE session_id = ?
+                ORDER BY timestamp ASC
+            """, (session_id,))
+            
+            results = cursor.fetchall()
         
         return results
     
+    def get_recent_messages(self, session_id, limit=40):
+        """
+        Derniers messages d'une session (coût borné par limit, quelle que
+        soit la longueur de la conversation)
+
+        Returns:
+            list: (id, role, message) dans l'ordre chronologique
+        """
+        with self._cursor(commit=False) as cursor:
+            cursor.execute("""
+                SELECT id, role, message
+                FROM messages
+                WHERE session_id = ?
+                ORDER BY id DESC
+                LIMIT ?
+            """, (session_id, limit))
+
+            results = cursor.fetchall()
+
+        results.reverse()
+        return results
+
     def get_unread_notifications(self, user_id):
         """Récupère les notifications non lues"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, notification_type, message, timestamp
-            FROM notifications
-            WHERE user_id = ? AND is_read = 0
-            ORDER BY timestamp DESC
-        """, (user_id,))
-        
-        results = cursor.fetchall()
-        conn.close()
+        with self._cursor(commit=False) as cursor:
+            cursor.execute("""
+                SELECT id, notification_type, message, timestamp
+                FROM notifications
+                WHERE user_id = ? AND is_read = 0
+                ORDER BY timestamp DESC
+            """, (user_id,))
+            
+            results = cursor.fetchall()
         
         return results
     
     def mark_notification_read(self, notification_id):
         """Marque une notification comme lue"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._cursor() as cursor:
+            cursor.execute("""
+                UPDATE notifications
+                SET is_read = 1
+                WHERE id = ?
+            """, (notification_id,))
+    
+    # ============================================================
+    # ITÉRATEURS PAGINÉS (mémoire constante)
+    # ============================================================
+    
+    def _iter_pages(self, query, params, page_size, descending=False):
+        """
+        Pagination par clé sur l'id : chaque page est une requête courte
+        (connexion ouverte puis fermée hors batch()), aucun OFFSET ni
+        transaction longue.
+        La requête doit exposer l'id en première colonne et finir par
+        une condition sur "{key} ?" suivie de ORDER BY / LIMIT.
+        """
+        last_id = None
+        op = "<" if descending else ">"
         
-        cursor.execute("""
-            UPDATE notifications
-            SET is_read = 1
-            WHERE id = ?
-        """, (notification_id,))
+        while True:
+            key = last_id if last_id is not None else (2 ** 63 - 1 if descending else 0)
+            
+            with self._cursor(commit=False) as cursor:
+                rows = cursor.execute(query.format(key=op), (*params, key, page_size)).fetchall()
+            
+            if not rows:
+                return
+            
+            yield rows
+            
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+    
+    def iter_emotions(self, user_id, page_size=DEFAULT_PAGE_SIZE, newest_first=True):
+        """
+        Parcourt les émotions d'un utilisateur page par page
         
-        conn.commit()
-        conn.close()
+        Yields:
+            tuple: (emotion, confidence, mood_state, timestamp), comme get_user_stats
+        """
+        order = "DESC" if newest_first else "ASC"
+        query = f"""
+            SELECT e.id, el.label, e.confidence_q, ms.label, e.timestamp
+            FROM emotions_log e
+            JOIN sessions s ON e.session_id = s.id
+            JOIN emotion_labels el ON el.code = e.emotion_code
+            LEFT JOIN mood_states ms ON ms.code = e.mood_code
+            WHERE s.user_id = ? AND e.id {{key}} ?
+            ORDER BY e.id {order}
+            LIMIT ?
+        """
+        for rows in self._iter_pages(query, (user_id,), page_size, newest_first):
+            for _, emotion, confidence_q, mood_state, timestamp in rows:
+                yield emotion, dequantize_confidence(confidence_q), mood_state, timestamp
+    
+    def iter_messages(self, session_id, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Parcourt les messages d'une session dans l'ordre chronologique
+        
+        Yields:
+            tuple: (role, message, emotion_context, timestamp), comme get_conversation_history
+        """
+        query = """
+            SELECT id, role, message, emotion_context, timestamp
+            FROM messages
+            WHERE session_id = ? AND id {key} ?
+            ORDER BY id ASC
+            LIMIT ?
+        """
+        for rows in self._iter_pages(query, (session_id,), page_size):
+            for row in rows:
+                yield row[1:]
+    
+    def iter_notifications(self, user_id, unread_only=False, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Parcourt les notifications d'un utilisateur, des plus récentes aux plus anciennes
+        
+        Yields:
+            tuple: (id, notification_type, message, timestamp, is_read)
+        """
+        unread = "AND is_read = 0" if unread_only else ""
+        query = f"""
+            SELECT id, notification_type, message, timestamp, is_read
+            FROM notifications
+            WHERE user_id = ? {unread} AND id {{key}} ?
+            ORDER BY id DESC
+            LIMIT ?
+        """
+        for rows in self._iter_pages(query, (user_id,), page_size, descending=True):
+            yield from rows
+    
+    def iter_emotion_frames(self, user_id, page_size=10000, newest_first=False):
+        """
+        Parcourt les émotions d'un utilisateur en DataFrames colonnes
+        
+        Les codes entiers sont copiés une fois dans des tableaux NumPy
+        (uint8/uint16) puis exposés en Categorical sans créer de chaînes.
+        
+        Yields:
+            pandas.DataFrame: colonnes timestamp, emotion, confidence, mood_state
+        """
+        import numpy as np
+        import pandas as pd
+        
+        # Libellés éventuellement ajoutés par un autre processus
+        with self._cursor(commit=False) as cursor:
+            self._load_codes(cursor)
+        
+        emotion_categories = _categories(self.emotion_codes)
+        mood_categories = _categories(self.mood_codes)
+        
+        order = "DESC" if newest_first else "ASC"
+        query = f"""
+            SELECT e.id, e.timestamp, e.emotion_code, e.confidence_q, COALESCE(e.mood_code, -1)
+            FROM emotions_log e
+            JOIN sessions s ON e.session_id = s.id
+            WHERE s.user_id = ? AND e.id {{key}} ?
+            ORDER BY e.id {order}
+            LIMIT ?
+        """
+        for rows in self._iter_pages(query, (user_id,), page_size, newest_first):
+            _, timestamps, emotion_codes, confidence_q, mood_codes = zip(*rows)
+            
+            yield pd.DataFrame({
+                "timestamp": pd.to_datetime(np.array(timestamps, dtype="datetime64[s]")),
+                "emotion": pd.Categorical.from_codes(
+                    np.array(emotion_codes, dtype=np.int16), categories=emotion_categories
+                ),
+                "confidence": np.array(confidence_q, dtype=np.uint16) / np.float32(CONFIDENCE_SCALE),
+                "mood_state": pd.Categorical.from_codes(
+                    np.array(mood_codes, dtype=np.int16), categories=mood_categories
+                ),
+            })
+
+
+def _categories(codes):
+    """Liste des libellés indexée par code (codes contigus depuis 0)"""
+    categories = [None] * (max(codes.values()) + 1)
+    for label, code in codes.items():
+        categories[code] = label
+    return [c if c is not None else f"code_{i}" for i, c in enumerate(categories)]
@@ -0,0 +1,233 @@
+"""
+Détection d'émotions dans un pool de processus : chaque worker possède son
+EmotionDetector (cascade, prétraitement, modèle, annotation hors du GIL du
+processus appelant), les frames transitent par mémoire partagée et les
+résultats sont rendus dans l'ordre de soumission
+"""
+
+import os
+import queue
+from collections import deque
+from multiprocessing import shared_memory
+import multiprocessing as mp
+
+import numpy as np
+
+
+def _worker_main(shm_name, slot_bytes, tasks, results, detector_kwargs, cpus, pin):
+    """Boucle d'un worker : frame lue et annotée sur place dans son emplacement partagé"""
+    try:
+        if pin and cpus and hasattr(os, "sched_setaffinity"):
+            # Avant le chargement : les pools de threads créés ensuite héritent de l'affinité
+            os.sched_setaffinity(0, cpus)
+
+        from .emotion_detector import EmotionDetector
+        from .thread_budget import ThreadBudget
+
+        # Un seul flux par worker : tout son budget pour son détecteur
+        budget = ThreadBudget(cpus=cpus, pin=pin) if cpus else None
+        detector = EmotionDetector(**detector_kwargs, thread_budget=budget)
+        shm = shared_memory.SharedMemory(name=shm_name)
+    except Exception as e:
+        results.put(("error", os.getpid(), repr(e)))
+        return
+    results.put(("ready", os.getpid(), None))
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot, shape = task
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+            try:
+                _, emotions = detector.detect_emotion(frame)
+                emotions = [{**e, "bbox": tuple(int(v) for v in e["bbox"])} for e in emotions]
+                results.put((seq, slot, None, emotions))
+            except Exception as e:
+                results.put((seq, slot, repr(e), []))
+            del frame
+    finally:
+        detector.close()
+        shm.close()
+
+
+class DetectorPool:
+    def __init__(self, workers=None, frame_shape=(480, 640, 3), slots=None, pin=False,
+                 start_timeout=120.0, **detector_kwargs):
+        """
+        Args:
+            workers: processus de détection (défaut: un par cœur)
+            frame_shape: plus grande frame acceptée (taille des emplacements partagés)
+            slots: frames en vol au maximum (défaut: 2 par worker, un en calcul
+                et un en attente pour ne jamais laisser un worker inactif)
+            pin: fixer chaque worker sur sa tranche de cœurs (Linux)
+            **detector_kwargs: arguments d'EmotionDetector (model_path, variant,
+                registry...) pour chaque worker
+        """
+        from .thread_budget import ThreadBudget
+
+        self.workers = workers or os.cpu_count() or 1
+        self.slot_bytes = int(np.prod(frame_shape))
+        self.slots = slots or 2 * self.workers
+        self._closed = False
+
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.slots)
+        self._free_slots = list(range(self.slots))
+        self._pending = {}          # seq -> (slot, shape, stream)
+        self._done = {}             # seq -> (frame, emotions, stream)
+        self._next_seq = 0
+        self._next_out = 0
+        self._moods = {}            # stream -> émotions récentes
+
+        # Une tranche de cœurs par worker, même répartition que pour des flux en threads
+        planner = ThreadBudget(configure_tensorflow=False)
+        tokens = [planner.acquire() for _ in range(self.workers)]
+        cpu_slices = [planner.allocation(t).cpus for t in tokens]
+
+        # spawn : pas de copie de l'état TensorFlow / OpenCV du parent
+        context = mp.get_context("spawn")
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._processes = [
+            context.Process(target=_worker_main, daemon=True,
+                            args=(self._shm.name, self.slot_bytes, self._tasks, self._results,
+                                  detector_kwargs, cpu_slices[i], pin))
+            for i in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        try:
+            for _ in range(self.workers):
+                status, pid, error = self._results.get(timeout=start_timeout)
+                if status == "error":
+                    raise RuntimeError(f"Worker {pid} non démarré: {error}")
+        except (queue.Empty, RuntimeError):
+            self.close()
+            raise
+        print(f"✅ Pool de détection prêt ({self.workers} processus)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    def _slot_view(self, slot, shape):
+        return np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf,
+                          offset=slot * self.slot_bytes)
+
+    def _collect(self, timeout=None):
+        """Reçoit un résultat (dans n'importe quel ordre) et libère son emplacement"""
+        waited = 0.0
+        while True:
+            try:
+                seq, slot, error, emotions = self._results.get(timeout=1.0)
+                break
+            except queue.Empty:
+                waited += 1.0
+                if not all(p.is_alive() for p in self._processes):
+                    raise RuntimeError("Un worker de détection s'est arrêté")
+                if timeout is not None and waited >= timeout:
+                    raise TimeoutError("Aucun résultat de détection")
+
+        _, shape, stream = self._pending.pop(seq)
+        # Copie de la frame annotée : l'emplacement est réutilisable aussitôt
+        frame = self._slot_view(slot, shape).copy()
+        self._free_slots.append(slot)
+        if error is not None:
+            print(f"⚠️ Erreur de détection (frame {seq}): {error}")
+        self._done[seq] = (frame, emotions, stream)
+
+    def submit(self, frame, stream=0):
+        """
+        Copie la frame dans un emplacement partagé et la confie au pool ;
+        bloque si toutes les frames en vol sont occupées
+
+        Returns:
+            int: numéro de séquence (ordre de restitution)
+        """
+        if self._closed:
+            raise RuntimeError("DetectorPool fermé")
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame {frame.shape} plus grande que les emplacements "
+                             f"({self.slot_bytes} octets) : augmenter frame_shape")
+
+        while not self._free_slots:
+            self._collect()
+        slot = self._free_slots.pop()
+        self._slot_view(slot, frame.shape)[...] = frame
+
+        seq = self._next_seq
+        self._next_seq += 1
+        self._pending[seq] = (slot, frame.shape, stream)
+        # Seuls l'indice et la forme passent par la file (pas de pickle de la frame)
+        self._tasks.put((seq, slot, frame.shape))
+        return seq
+
+    def get(self, timeout=None):
+        """
+        Résultat suivant dans l'ordre de soumission
+
+        Returns:
+            (frame annotée, émotions détectées) comme EmotionDetector.detect_emotion
+        """
+        if self._next_out >= self._next_seq:
+            raise LookupError("Aucune frame en attente")
+        while self._next_out not in self._done:
+            self._collect(timeout)
+
+        frame, emotions, stream = self._done.pop(self._next_out)
+        self._next_out += 1
+        history = self._moods.setdefault(stream, deque(maxlen=10))
+        history.extend(e["emotion"] for e in emotions)
+        return frame, emotions
+
+    def map(self, frames, stream=0):
+        """Traite un itérable de frames en gardant le pool plein ; résultats dans l'ordre"""
+        backlog = 0
+        for frame in frames:
+            if backlog >= self.slots:
+                yield self.get()
+                backlog -= 1
+            self.submit(frame, stream)
+            backlog += 1
+        for _ in range(backlog):
+            yield self.get()
+
+    def detect_emotion(self, frame, stream=0):
+        """
+        Appel synchrone (même interface qu'EmotionDetector), sans parallélisme :
+        préférer submit/get ou map pour occuper tous les workers
+        """
+        if self.in_flight:
+            raise RuntimeError("Frames en vol : utiliser get() avant detect_emotion()")
+        self.submit(frame, stream)
+        return self.get()
+
+    def get_mood_state(self, stream=0):
+        from .emotion_detector import mood_from_emotions
+        return mood_from_emotions(self._moods.get(stream, ()))
+
+    def get_dominant_emotion(self, stream=0):
+        from .emotion_detector import dominant_emotion
+        return dominant_emotion(self._moods.get(stream, ()))
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._shm.close()
+        self._shm.unlink()
@@ -7,26 +7,107 @@ import numpy as np
 from tensorflow.keras.models import load_model
 import json
 import os
-from collections import deque
+import threading
+import time
+import weakref
+from collections import Counter, deque
+
+def mood_from_emotions(emotions):
+    """
+    État d'humeur (UP/DOWN/NEUTRAL) d'une suite d'émotions récentes
+    (historique d'un détecteur ou d'un flux de DetectorPool)
+    """
+    if len(emotions) == 0:
+        return "NEUTRAL"
+    
+    # Classification des émotions
+    negative_emotions = ['angry', 'sad', 'fear', 'disgust']
+    positive_emotions = ['happy', 'surprise']
+    
+    negative_count = sum(1 for e in emotions if e in negative_emotions)
+    positive_count = sum(1 for e in emotions if e in positive_emotions)
+    
+    total = len(emotions)
+    negative_ratio = negative_count / total
+    positive_ratio = positive_count / total
+    
+    # Seuils de décision
+    if negative_ratio > 0.6:
+        return "DOWN"
+    elif positive_ratio > 0.5:
+        return "UP"
+    else:
+        return "NEUTRAL"
+
+
+def dominant_emotion(emotions):
+    """
+    Émotion majoritaire d'une suite d'émotions récentes (None si vide) :
+    stable d'une frame à l'autre, contrairement à la dernière détection
+    """
+    counts = Counter(emotions)
+    return counts.most_common(1)[0][0] if counts else None
+
 
 class EmotionDetector:
-    def __init__(self, model_path="models/emotion_model.h5"):
+    def __init__(self, model_path="models/emotion_model.h5", variant=None, registry=None,
+                 reload_interval=2.0, thread_budget=None):
+        """
+        Args:
+            model_path: modèle Keras (.h5) ou TFLite (.tflite)
+            variant: variante optimisée enregistrée ("int8", "float16"...,
+                "recommended" = la plus rapide) ; repli sur model_path si absente
+            registry: ModelRegistry (ou True = registre par défaut) : charge la
+                version promue et la recharge à chaud à chaque promotion.
+                Prioritaire sur variant / model_path, qui ne servent que tant
+                qu'aucune version n'est promue (la première promotion est
+                chargée à chaud comme les suivantes)
+            reload_interval: secondes entre deux vérifications du registre
+            thread_budget: ThreadBudget (ou True = budget partagé du processus) :
+                threads TFLite / OpenCV et affinité CPU selon le nombre de flux,
+                réajustés à chaque rééquilibrage (un modèle Keras utilise le
+                pool TensorFlow commun au processus)
+        """
         print("🔄 Chargement du modèle d'émotions...")
         
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(
-                f"Modèle non trouvé: {model_path}\n"
-                "Lance d'abord: python scripts/1_train_model.py"
-            )
-        
-        self.model = load_model(model_path)
+        # Avant le chargement : les pools TensorFlow se figent à la première opération
+        if thread_budget is True:
+            from .thread_budget import DEFAULT_THREAD_BUDGET
+            thread_budget = DEFAULT_THREAD_BUDGET
+        self.thread_budget = thread_budget
+        self._budget_token = None
+        if thread_budget is not None:
+            self._budget_token = thread_budget.acquire()
+            # Part rendue aussi si le détecteur est abandonné sans close() (session Streamlit fermée)
+            self._budget_release = weakref.finalize(self, thread_budget.release, self._budget_token)
         
-        # Chargement labels émotions
-        labels_path = "models/emotion_labels.json"
-        with open(labels_path, 'r', encoding='utf-8') as f:
-            emotion_labels = json.load(f)
+        if registry is True:
+            from .model_registry import ModelRegistry
+            registry = ModelRegistry()
+        self.registry = registry
+        self.reload_interval = reload_interval
+        self._last_check = time.monotonic()
+        self._reloading = threading.Lock()
+        self._failed_version = None
         
-        self.emotion_labels = {int(k): v for k, v in emotion_labels.items()}
+        current = registry.current_version() if registry is not None else None
+        if current is not None:
+            if variant is not None:
+                print(f"ℹ️ Registre prioritaire : variante '{variant}' ignorée (version {current})")
+            model, manifest = self.registry.load(current, num_threads=self._num_threads())
+            self._activate(model, manifest["labels"], manifest["version"],
+                           f"{self.registry.path}/{manifest['version']}")
+        else:
+            if registry is not None:
+                print(f"ℹ️ Aucune version promue dans {registry.path} : modèle local "
+                      "en attendant la première promotion")
+            model_path = self._resolve_variant(model_path, variant)
+            if model_path.endswith(".tflite"):
+                from .tflite_model import TFLiteModel
+                model = TFLiteModel(model_path, num_threads=self._num_threads())
+            else:
+                model = load_model(model_path)
+            self._activate(model, self._read_labels(model_path), None, model_path)
         
         # Détecteur de visage Haar Cascade
         cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
@@ -37,11 +118,105 @@ class EmotionDetector:
         
         print("✅ Détecteur d'émotions prêt!")
     
+    def _num_threads(self):
+        """Threads d'un interpréteur TFLite : part actuelle du flux"""
+        if self._budget_token is None:
+            return None
+        allocation = self.thread_budget.allocation(self._budget_token)
+        return allocation.threads if allocation is not None else None
+    
+    def model_threads(self):
+        """
+        Threads réellement utilisés par le modèle : ceux de l'interpréteur
+        TFLite, sinon None (Keras / SavedModel : pool intra-op TensorFlow
+        commun au processus, non réglable par détecteur)
+        """
+        return getattr(self.model, "num_threads", None)
+    
+    def close(self):
+        """Libère la part de budget de threads (rééquilibrée entre les autres flux)"""
+        if self._budget_token is not None:
+            self._budget_release()
+            self._budget_token = None
+    
+    @staticmethod
+    def _resolve_variant(model_path, variant):
+        if variant is not None:
+            from .model_optimization import registered_model_path
+            optimized = registered_model_path(None if variant == "recommended" else variant)
+            if optimized and os.path.exists(optimized):
+                model_path = optimized
+            else:
+                print(f"⚠️ Variante '{variant}' non enregistrée, modèle {model_path} utilisé")
+        
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"Modèle non trouvé: {model_path}\n"
+                "Lance d'abord: python scripts/train_model.py"
+            )
+        return model_path
+    
+    @staticmethod
+    def _read_labels(model_path):
+        """emotion_labels.json à côté du modèle, sinon celui de models/"""
+        labels_path = os.path.join(os.path.dirname(model_path), "emotion_labels.json")
+        if not os.path.exists(labels_path):
+            labels_path = "models/emotion_labels.json"
+        with open(labels_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _activate(self, model, labels, version, source):
+        # Un seul attribut remplacé : une frame voit l'ancien ou le nouveau couple, jamais un mélange
+        self._active = (model, {int(k): v for k, v in labels.items()})
+        self.version = version
+        self.model_path = source
+    
+    @property
+    def model(self):
+        return self._active[0]
+    
+    @property
+    def emotion_labels(self):
+        return self._active[1]
+    
+    def _maybe_reload(self):
+        """Vérifie le pointeur CURRENT au plus toutes les reload_interval secondes"""
+        now = time.monotonic()
+        if self.registry is None or now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        
+        version = self.registry.current_version()
+        if (version and version not in (self.version, self._failed_version)
+                and self._reloading.acquire(blocking=False)):
+            # Chargement hors du fil des frames : l'ancien modèle sert jusqu'à la bascule
+            threading.Thread(target=self._reload, args=(version,), daemon=True).start()
+    
+    def _reload(self, version):
+        try:
+            model, manifest = self.registry.load(version, num_threads=self._num_threads())
+            self._activate(model, manifest["labels"], manifest["version"],
+                           f"{self.registry.path}/{manifest['version']}")
+            print(f"🔁 Modèle rechargé à chaud: version {version}")
+        except Exception as e:
+            print(f"⚠️ Rechargement de la version {version} impossible: {e}")
+            self._failed_version = version  # pas de nouvelle tentative en boucle
+        finally:
+            self._reloading.release()
+    
     def detect_emotion(self, frame):
         """
         Détecte les émotions sur une frame
         Returns: (frame_annotated, emotions_detected)
         """
+        self._maybe_reload()
+        model, emotion_labels = self._active
+        if self._budget_token is not None:
+            allocation = self.thread_budget.apply(self._budget_token)
+            # Rééquilibrage (flux ajouté ou retiré) : l'interpréteur suit la nouvelle part
+            if allocation is not None and hasattr(model, "set_num_threads"):
+                model.set_num_threads(allocation.threads)
+        
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         faces = self.face_cascade.detectMultiScale(
             gray, scaleFactor=1.1, minNeighbors=5, minSize=(48, 48)
@@ -58,10 +233,10 @@ class EmotionDetector:
             face_input = np.expand_dims(face_input, axis=-1)
             
             # Prédiction
-            predictions = self.model.predict(face_input, verbose=0)[0]
+            predictions = model.predict(face_input, verbose=0)[0]
             emotion_idx = np.argmax(predictions)
             confidence = predictions[emotion_idx]
-            emotion_label = self.emotion_labels[emotion_idx]
+            emotion_label = emotion_labels[emotion_idx]
             
             # Ajout au buffer
             self.emotion_buffer.append(emotion_label)
@@ -88,27 +263,11 @@ class EmotionDetector:
         Détermine l'état d'humeur global (UP/DOWN/NEUTRAL)
         basé sur l'historique récent des émotions
         """
-        if len(self.emotion_buffer) == 0:
-            return "NEUTRAL"
-        
-        # Classification des émotions
-        negative_emotions = ['angry', 'sad', 'fear', 'disgust']
-        positive_emotions = ['happy', 'surprise']
-        
-        negative_count = sum(1 for e in self.emotion_buffer if e in negative_emotions)
-        positive_count = sum(1 for e in self.emotion_buffer if e in positive_emotions)
-        
-        total = len(self.emotion_buffer)
-        negative_ratio = negative_count / total
-        positive_ratio = positive_count / total
-        
-        # Seuils de décision
-        if negative_ratio > 0.6:
-            return "DOWN"
-        elif positive_ratio > 0.5:
-            return "UP"
-        else:
-            return "NEUTRAL"
+        return mood_from_emotions(self.emotion_buffer)
+    
+    def get_dominant_emotion(self):
+        """Émotion majoritaire de l'historique récent (clé lissée pour la pré-génération)"""
+        return dominant_emotion(self.emotion_buffer)
     
     def _get_emotion_color(self, emotion):
         """Retourne une couleur BGR selon l'émotion"""
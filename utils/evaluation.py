@@ -0,0 +1,270 @@
+"""
+Évaluation précision / performance d'un modèle sur FER2013 : précision,
+F1 par classe, matrice de confusion, latence lot 1 et lot N, débit et
+empreinte mémoire, dans un rapport JSON
+"""
+
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+
+import numpy as np
+
+from .fer_dataset import EMOTION_MAP, load_splits
+from .profiling import latency_profile, predict_labels
+
+
+def classification_metrics(labels, predictions, num_classes=len(EMOTION_MAP), class_names=None):
+    """
+    Précision globale, précision / rappel / F1 par classe et matrice de
+    confusion (lignes = vérité, colonnes = prédiction)
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    predictions = np.asarray(predictions, dtype=np.int64)
+    class_names = class_names or [EMOTION_MAP[i] for i in range(num_classes)]
+
+    confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+    np.add.at(confusion, (labels, predictions), 1)
+
+    tp = np.diag(confusion).astype(np.float64)
+    support = confusion.sum(axis=1)
+    predicted = confusion.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+    per_class = {
+        class_names[i]: {"precision": float(precision[i]), "recall": float(recall[i]),
+                         "f1": float(f1[i]), "support": int(support[i])}
+        for i in range(num_classes)
+    }
+    return {
+        "accuracy": float(tp.sum() / max(len(labels), 1)),
+        "macro_f1": float(f1.mean()),
+        "weighted_f1": float((f1 * support).sum() / max(support.sum(), 1)),
+        "per_class": per_class,
+        "confusion_matrix": confusion.tolist(),
+        "class_names": class_names,
+    }
+
+
+def current_rss_mb():
+    """Mémoire résidente actuelle (Linux : /proc), sinon pic depuis le démarrage"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss : Ko sous Linux, octets sous macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _artifact_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+
+class _KerasPredictor:
+    """Appel direct du modèle : sans l'enrobage (tf.data, callbacks) de Model.predict()"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, x, verbose=0):
+        return self.model(x, training=False).numpy()
+
+
+def load_target(spec, num_threads=None):
+    """
+    Charge un modèle à partir d'une spécification :
+        "registry" / "registry:v0003"   version du registre (courante par défaut)
+        "variant:int8"                  variante de models/optimized/registry.json
+        chemin .h5 / .keras / .tflite   fichier modèle
+        dossier SavedModel
+
+    Returns:
+        (modèle avec predict(x), labels {int: str}, infos {backend, path, version})
+    """
+    if spec == "registry" or spec.startswith("registry:"):
+        from .model_registry import ModelRegistry
+
+        registry = ModelRegistry()
+        version = spec.partition(":")[2] or None
+        model, manifest = registry.load(version, num_threads=num_threads)
+        path = os.path.join(registry.path, manifest["version"], manifest["artifact"])
+        labels = {int(k): v for k, v in manifest["labels"].items()}
+        return model, labels, {"backend": manifest["backend"], "path": path,
+                               "version": manifest["version"]}
+
+    if spec.startswith("variant:"):
+        from .model_optimization import registered_model_path
+
+        path = registered_model_path(spec.partition(":")[2])
+        if path is None:
+            raise LookupError(f"Variante non enregistrée: {spec}")
+    else:
+        path = spec
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Modèle non trouvé: {path}")
+
+    labels_path = os.path.join(os.path.dirname(path.rstrip("/")), "emotion_labels.json")
+    if os.path.exists(labels_path):
+        with open(labels_path, "r", encoding="utf-8") as f:
+            labels = {int(k): v for k, v in json.load(f).items()}
+    else:
+        labels = EMOTION_MAP
+
+    if path.endswith(".tflite"):
+        from .tflite_model import TFLiteModel
+        return TFLiteModel(path, num_threads=num_threads), labels, {"backend": "tflite", "path": path}
+    if os.path.isdir(path):
+        from .model_registry import SavedModelPredictor
+        return SavedModelPredictor(path), labels, {"backend": "savedmodel", "path": path}
+
+    from tensorflow.keras.models import load_model
+    return _KerasPredictor(load_model(path)), labels, {"backend": "keras", "path": path}
+
+
+def evaluate_target(spec, images, labels, batch_size=32, runs=200, num_threads=None):
+    """
+    Évalue un modèle dans le processus courant
+
+    Returns:
+        dict: métriques de classification, latences lot 1 / lot N, débit, mémoire
+    """
+    if num_threads:
+        import tensorflow as tf
+        tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    model, model_labels, info = load_target(spec, num_threads=num_threads)
+    load_s = time.perf_counter() - start
+    rss_loaded = current_rss_mb()
+
+    def predict(x):
+        return model.predict(x, verbose=0)
+
+    eval_start = time.perf_counter()
+    predictions = predict_labels(predict, images)
+    eval_s = time.perf_counter() - eval_start
+
+    class_names = [model_labels[i] for i in sorted(model_labels)]
+    result = {"target": spec, **info}
+    result.update(classification_metrics(labels, predictions,
+                                         num_classes=len(class_names), class_names=class_names))
+
+    latency = latency_profile(predict, images, batch_size=batch_size, runs=runs)
+    result.update({
+        "latency_batch1": latency["single"],
+        "latency_batchN": {"batch_size": batch_size, **latency["batch"]},
+        "throughput_images_per_s": latency["images_per_s"],
+        "eval_images_per_s": len(labels) / eval_s,
+        "load_s": load_s,
+        "memory": {
+            "artifact_mb": _artifact_size(info["path"]) / 1e6,
+            "rss_before_load_mb": rss_before,
+            "rss_after_load_mb": rss_loaded,
+            "model_rss_mb": rss_loaded - rss_before,
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "num_threads": num_threads,
+    })
+    return result
+
+
+def _evaluate_isolated(spec, csv_path, cache_dir, split, seed, batch_size, runs, num_threads):
+    """Point d'entrée du processus dédié : relit le split en memmap puis évalue"""
+    splits = load_splits(csv_path, cache_dir, seed=seed)
+    indices = splits[split]
+    return evaluate_target(spec, splits["images"][indices], splits["labels"][indices],
+                           batch_size=batch_size, runs=runs, num_threads=num_threads)
+
+
+def environment():
+    """Contexte matériel / logiciel du rapport (les latences en dépendent)"""
+    info = {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+    try:
+        import tensorflow as tf
+        info["tensorflow"] = tf.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def run_evaluation(targets, csv_path="data/fer2013.csv", cache_dir="data/cache", split="test",
+                   seed=42, batch_size=32, runs=200, num_threads=None, isolate=True,
+                   output_path=None):
+    """
+    Évalue chaque cible l'une après l'autre et écrit le rapport JSON
+
+    Args:
+        targets: spécifications (voir load_target)
+        isolate: un processus neuf par cible (mémoire mesurée sans les
+            modèles précédents, pas de pools de threads partagés)
+        output_path: fichier du rapport (défaut: reports/evaluation-<date>.json)
+
+    Returns:
+        dict: rapport complet
+    """
+    splits = load_splits(csv_path, cache_dir, seed=seed)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "dataset": {"csv": csv_path, "split": split, "seed": seed,
+                    "images": int(len(splits[split]))},
+        "settings": {"batch_size": batch_size, "runs": runs, "num_threads": num_threads,
+                     "isolated": isolate},
+        "environment": environment() if not isolate else None,
+        "results": [],
+        "errors": {},
+    }
+
+    for spec in targets:
+        print(f"📏 {spec}...")
+        args = (spec, csv_path, cache_dir, split, seed, batch_size, runs, num_threads)
+        try:
+            if isolate:
+                with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn")) as pool:
+                    result = pool.submit(_evaluate_isolated, *args).result()
+                    if report["environment"] is None:
+                        report["environment"] = pool.submit(environment).result()
+            else:
+                result = _evaluate_isolated(*args)
+        except Exception as e:
+            print(f"   ❌ {e}")
+            report["errors"][spec] = str(e)
+            continue
+        report["results"].append(result)
+
+    output_path = output_path or os.path.join(
+        "reports", f"evaluation-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp = output_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, output_path)
+    report["path"] = output_path
+    return report
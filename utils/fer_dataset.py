@@ -0,0 +1,221 @@
+"""
+Chargement de FER2013 : conversion vectorisée du CSV en tableaux uint8
+mis en cache (.npy, clé = empreinte du contenu du CSV) puis relus en memmap
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (lecteur CSV multi-thread de pandas)
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+IMAGE_SIZE = 48
+
+# Mapping FER2013 code -> émotion (écrit dans models/emotion_labels.json)
+EMOTION_MAP = {
+    0: "angry", 1: "disgust", 2: "fear", 3: "happy",
+    4: "sad", 5: "surprise", 6: "neutral"
+}
+
+# Colonne "Usage" du CSV -> code
+USAGES = {"Training": 0, "PublicTest": 1, "PrivateTest": 2}
+
+# Taille du sous-ensemble d'entraînement en mode smoke
+SMOKE_SIZE = 1024
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Empreinte SHA-256 du contenu d'un fichier (lecture par blocs)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_pixels(pixels, size=IMAGE_SIZE):
+    """
+    Convertit la colonne "pixels" (chaînes "0 12 255 ...") en un tableau
+    uint8 (N, size, size, 1) : toutes les chaînes sont concaténées et lues
+    en un seul appel numpy (pas de tableau int64 par image)
+    """
+    n = len(pixels)
+    # int16 : une valeur > 255 est détectée au lieu de déborder silencieusement
+    values = np.fromstring(" ".join(pixels), dtype=np.int16, sep=" ")
+
+    if values.size != n * size * size:
+        raise ValueError(f"{values.size} pixels lus, {n * size * size} attendus "
+                         f"({n} images {size}x{size})")
+    if values.min() < 0 or values.max() > 255:
+        raise ValueError("Valeur de pixel hors de [0, 255]")
+    return values.astype(np.uint8).reshape(n, size, size, 1)
+
+
+def _cache_paths(cache_dir, key):
+    base = os.path.join(cache_dir, f"fer2013-{key[:16]}")
+    return {name: f"{base}.{name}.npy" for name in ("images", "labels", "usage")}
+
+
+def _content_key(csv_path, cache_dir):
+    """
+    Empreinte du CSV ; mémorisée par (taille, date de modification) pour ne
+    pas relire tout le fichier à chaque démarrage
+    """
+    stat = os.stat(csv_path)
+    index_path = os.path.join(cache_dir, "index.json")
+    stamp = f"{os.path.abspath(csv_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    index = {}
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+
+    if stamp in index:
+        return index[stamp]
+
+    key = file_hash(csv_path)
+    index[stamp] = key
+    _atomic_write(index_path, lambda f: f.write(json.dumps(index, indent=2).encode("utf-8")))
+    return key
+
+
+def _atomic_write(path, write):
+    """Écrit via un fichier temporaire puis os.replace (jamais de cache à moitié écrit)"""
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def build_cache(csv_path, cache_dir, key):
+    """Conversion unique CSV -> .npy uint8 ; retourne les chemins du cache"""
+    paths = _cache_paths(cache_dir, key)
+
+    data = pd.read_csv(csv_path, engine=CSV_ENGINE)
+    images = parse_pixels(data["pixels"].astype(str).tolist())
+    labels = data["emotion"].to_numpy(dtype=np.uint8)
+    if "Usage" in data.columns:
+        usage = data["Usage"].map(USAGES).fillna(-1).to_numpy(dtype=np.int8)
+    else:
+        usage = np.zeros(len(data), dtype=np.int8)
+    del data
+
+    # Images en dernier : leur présence signale un cache complet
+    _atomic_write(paths["labels"], lambda f: np.save(f, labels))
+    _atomic_write(paths["usage"], lambda f: np.save(f, usage))
+    _atomic_write(paths["images"], lambda f: np.save(f, images))
+    return paths
+
+
+def load_fer2013(csv_path="data/fer2013.csv", cache_dir="data/cache", mmap=True):
+    """
+    Charge FER2013 depuis le cache (construit au premier appel)
+
+    Args:
+        csv_path: CSV Kaggle (colonnes emotion, pixels[, Usage])
+        cache_dir: dossier des .npy
+        mmap: images en lecture seule via np.memmap (rien n'est chargé en RAM
+            tant que les pages ne sont pas lues)
+
+    Returns:
+        (images, labels, usage): uint8 (N, 48, 48, 1), uint8 (N,), int8 (N,)
+    """
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(
+            f"Dataset non trouvé: {csv_path}\n"
+            "Télécharge-le depuis https://www.kaggle.com/datasets/msambare/fer2013"
+        )
+
+    os.makedirs(cache_dir, exist_ok=True)
+    key = _content_key(csv_path, cache_dir)
+    paths = _cache_paths(cache_dir, key)
+
+    if not all(os.path.exists(p) for p in paths.values()):
+        print("🔄 Conversion du CSV en cache uint8 (une seule fois)...")
+        start = time.perf_counter()
+        build_cache(csv_path, cache_dir, key)
+        print(f"   ✅ Cache écrit en {time.perf_counter() - start:.1f}s: {paths['images']}")
+
+    images = np.load(paths["images"], mmap_mode="r" if mmap else None)
+    labels = np.load(paths["labels"])
+    usage = np.load(paths["usage"])
+    return images, labels, usage
+
+
+def _subsample(indices, labels, size, seed):
+    """Sous-ensemble stratifié de taille size (indices triés)"""
+    from sklearn.model_selection import train_test_split
+
+    if size >= len(indices):
+        return indices
+    subset, _ = train_test_split(indices, train_size=size, random_state=seed,
+                                 stratify=labels[indices])
+    return np.sort(subset)
+
+
+def load_splits(csv_path="data/fer2013.csv", cache_dir="data/cache", seed=42, smoke_size=None):
+    """
+    Images (memmap) et indices train/val/test (80/10/10 stratifié), mis en
+    cache par (labels, graine, taille smoke) : relancer un entraînement ne
+    recalcule rien
+
+    Args:
+        smoke_size: nombre d'images d'entraînement pour un essai rapide
+            (val/test réduits à un quart), None = dataset complet
+
+    Returns:
+        dict: images, labels, train, val, test (tableaux d'indices)
+    """
+    images, labels, _ = load_fer2013(csv_path, cache_dir)
+
+    # Le découpage ne dépend que des labels et de la graine
+    labels_key = hashlib.sha256(labels.tobytes()).hexdigest()[:16]
+    suffix = f"-smoke{smoke_size}" if smoke_size else ""
+    path = os.path.join(cache_dir, f"splits-{labels_key}-seed{seed}{suffix}.npz")
+
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            splits = {name: cached[name] for name in ("train", "val", "test")}
+    else:
+        from sklearn.model_selection import train_test_split
+
+        # Même partition que l'ancien script (test_size=0.2 puis 0.5, stratifiés)
+        train, temp = train_test_split(np.arange(len(labels)), test_size=0.2,
+                                       random_state=seed, stratify=labels)
+        val, test = train_test_split(temp, test_size=0.5, random_state=seed,
+                                     stratify=labels[temp])
+        if smoke_size:
+            train = _subsample(train, labels, smoke_size, seed)
+            val = _subsample(val, labels, max(smoke_size // 4, len(EMOTION_MAP)), seed)
+            test = _subsample(test, labels, max(smoke_size // 4, len(EMOTION_MAP)), seed)
+
+        splits = {"train": train, "val": val, "test": test}
+        _atomic_write(path, lambda f: np.savez(f, **splits))
+
+    return {"images": images, "labels": labels, **splits}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Construit / vérifie le cache FER2013")
+    parser.add_argument("csv_path", nargs="?", default="data/fer2013.csv")
+    parser.add_argument("--cache-dir", default="data/cache")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    images, labels, usage = load_fer2013(args.csv_path, args.cache_dir)
+    print(f"📦 {images.shape[0]} images {images.shape[1:]} {images.dtype} "
+          f"chargées en {time.perf_counter() - start:.2f}s "
+          f"({images.nbytes / 1e6:.0f} Mo sur disque, memmap)")
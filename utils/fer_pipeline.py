@@ -0,0 +1,172 @@
+"""
+Pipeline tf.data pour FER2013 : images uint8 -> lots normalisés et augmentés
+(rotation, translations, zoom, miroir horizontal) en opérations vectorisées,
+en parallèle et avec préchargement
+"""
+
+import math
+
+import numpy as np
+import tensorflow as tf
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+# Mêmes amplitudes que l'ancien ImageDataGenerator de scripts/train_model.py
+DEFAULT_AUGMENTATION = {
+    "rotation": 15,        # degrés
+    "shift": 0.15,         # fraction de la largeur / hauteur
+    "zoom": 0.15,          # facteur dans [1 - zoom, 1 + zoom], par axe
+    "horizontal_flip": True,
+}
+
+
+def normalize(images):
+    """uint8 [0, 255] -> float32 [0, 1]"""
+    return tf.cast(images, tf.float32) / 255.0
+
+
+def random_affine(images, rotation=15, shift=0.15, zoom=0.15, horizontal_flip=True, seed=None):
+    """
+    Augmente un lot entier en une seule opération : pour chaque image, une
+    transformation aléatoire (miroir, zoom, rotation, translation) est
+    composée en une matrice, puis tout le lot est rééchantillonné d'un coup
+    (ImageProjectiveTransformV3, bords répliqués comme fill_mode='nearest').
+
+    Args:
+        images: float32 (B, H, W, C)
+        rotation: angle maximum (degrés)
+        shift: translation maximum (fraction de la taille)
+        zoom: variation maximum d'échelle, tirée indépendamment par axe
+        horizontal_flip: miroir aléatoire une fois sur deux
+    """
+    shape = tf.shape(images)
+    batch = shape[0]
+    height = tf.cast(shape[1], tf.float32)
+    width = tf.cast(shape[2], tf.float32)
+
+    def uniform(limit, seed_offset):
+        return tf.random.uniform([batch], -limit, limit,
+                                 seed=None if seed is None else seed + seed_offset)
+
+    angle = uniform(rotation * math.pi / 180.0, 0)
+    zoom_x = 1.0 + uniform(zoom, 1)
+    zoom_y = 1.0 + uniform(zoom, 2)
+    shift_x = uniform(shift, 3) * width
+    shift_y = uniform(shift, 4) * height
+    if horizontal_flip:
+        flip = tf.where(tf.random.uniform([batch], seed=None if seed is None else seed + 5) < 0.5,
+                        -1.0, 1.0)
+    else:
+        flip = tf.ones([batch])
+
+    # Coordonnée d'entrée = A · (sortie - centre) + centre + translation,
+    # avec A = rotation · zoom · miroir
+    cos, sin = tf.cos(angle), tf.sin(angle)
+    a00 = cos * zoom_x * flip
+    a01 = -sin * zoom_y
+    a10 = sin * zoom_x * flip
+    a11 = cos * zoom_y
+    cx = (width - 1.0) / 2.0
+    cy = (height - 1.0) / 2.0
+    a02 = cx - (a00 * cx + a01 * cy) + shift_x
+    a12 = cy - (a10 * cx + a11 * cy) + shift_y
+    zeros = tf.zeros([batch])
+    transforms = tf.stack([a00, a01, a02, a10, a11, a12, zeros, zeros], axis=1)
+
+    return tf.raw_ops.ImageProjectiveTransformV3(
+        images=images,
+        transforms=transforms,
+        output_shape=shape[1:3],
+        fill_value=0.0,
+        interpolation="BILINEAR",
+        fill_mode="NEAREST",
+    )
+
+
+def _memmap_batches(images, labels, indices, batch_size, shuffle=False, seed=None):
+    """
+    Lots (uint8, int32) lus directement dans le memmap : seuls les indices
+    sont en mémoire, les pages du fichier sont partagées entre processus
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    labels = np.asarray(labels)
+
+    dataset = tf.data.Dataset.from_tensor_slices(indices)
+    if shuffle:
+        dataset = dataset.shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+
+    def gather(idx):
+        # Indices triés : lecture séquentielle du fichier (l'ordre dans un lot est indifférent)
+        idx = np.sort(idx)
+        return np.ascontiguousarray(images[idx]), labels[idx].astype(np.int32)
+
+    def load(idx):
+        x, y = tf.numpy_function(gather, [idx], (tf.uint8, tf.int32))
+        x.set_shape([None] + list(images.shape[1:]))
+        y.set_shape([None])
+        return x, y
+
+    return dataset.map(load, num_parallel_calls=AUTOTUNE)
+
+
+def make_train_dataset(images, labels, batch_size=64, num_classes=7, augmentation=None,
+                       seed=None, indices=None):
+    """
+    Lots d'entraînement : mélange, normalisation et augmentation dans le pipeline
+
+    Args:
+        images: uint8 (N, 48, 48, 1), tableau ou memmap
+        labels: entiers (N,)
+        augmentation: dict comme DEFAULT_AUGMENTATION, False = aucune
+        seed: graine du mélange et des augmentations
+        indices: sous-ensemble de images/labels lu à la volée dans le memmap
+            au lieu d'être copié en mémoire (processus parallèles)
+
+    Returns:
+        tf.data.Dataset de (float32 (B, 48, 48, 1), one-hot (B, num_classes))
+    """
+    if augmentation is None:
+        augmentation = DEFAULT_AUGMENTATION
+
+    if indices is not None:
+        dataset = _memmap_batches(images, labels, indices, batch_size, shuffle=True, seed=seed)
+    else:
+        # uint8 en mémoire : 4x moins que des float32 pour le cache et le mélange
+        dataset = tf.data.Dataset.from_tensor_slices((np.asarray(images), np.asarray(labels)))
+        dataset = dataset.cache()
+        dataset = dataset.shuffle(len(labels), seed=seed, reshuffle_each_iteration=True)
+        # Mise en lot avant les transformations : une opération par lot, pas par image
+        dataset = dataset.batch(batch_size)
+
+    def prepare(x, y):
+        x = normalize(x)
+        if augmentation:
+            x = random_affine(x, seed=seed, **augmentation)
+        return x, tf.one_hot(tf.cast(y, tf.int32), num_classes)
+
+    dataset = dataset.map(prepare, num_parallel_calls=AUTOTUNE)
+
+    options = tf.data.Options()
+    # L'ordre exact des lots augmentés importe peu : pas d'attente du plus lent
+    options.deterministic = False
+    return dataset.with_options(options).prefetch(AUTOTUNE)
+
+
+def make_eval_dataset(images, labels, batch_size=256, num_classes=7, indices=None):
+    """
+    Lots de validation / test : normalisés une fois puis gardés en cache
+    (avec indices : relus dans le memmap à chaque passe, sans cache float32)
+    """
+    if indices is not None:
+        dataset = _memmap_batches(images, labels, indices, batch_size)
+    else:
+        dataset = tf.data.Dataset.from_tensor_slices((np.asarray(images), np.asarray(labels)))
+        dataset = dataset.batch(batch_size)
+    dataset = dataset.map(
+        lambda x, y: (normalize(x), tf.one_hot(tf.cast(y, tf.int32), num_classes)),
+        num_parallel_calls=AUTOTUNE
+    )
+    if indices is None:
+        dataset = dataset.cache()
+    return dataset.prefetch(AUTOTUNE)
@@ -0,0 +1,217 @@
+"""
+Optimisation post-entraînement : élagage (pruning) et quantification
+(float16, dynamique, int8 calibrée sur FER2013), mesures de précision,
+taille et latence CPU, enregistrement des variantes acceptables
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+
+try:
+    import tensorflow_model_optimization as tfmot
+    TFMOT_AVAILABLE = True
+except ImportError:
+    TFMOT_AVAILABLE = False
+    print("⚠️ tensorflow-model-optimization non installé, variantes élaguées désactivées")
+
+from .fer_dataset import load_splits
+from .fer_pipeline import make_train_dataset
+from .profiling import profile
+from .tflite_model import TFLiteModel
+
+QUANTIZATIONS = ("float32", "float16", "dynamic", "int8")
+
+REGISTRY_FILE = "registry.json"
+
+
+def representative_dataset(images, size=500, seed=42):
+    """Générateur de calibration int8 : images d'entraînement normalisées, une par appel"""
+    rng = np.random.default_rng(seed)
+    indices = np.sort(rng.choice(len(images), size=min(size, len(images)), replace=False))
+
+    def generator():
+        for i in indices:
+            yield [images[i:i + 1].astype(np.float32) / 255.0]
+    return generator
+
+
+def convert(model, quantization, calibration=None):
+    """
+    Convertit un modèle Keras en TFLite
+
+    Args:
+        quantization: "float32", "float16", "dynamic" (poids int8) ou
+            "int8" (entièrement entier, nécessite calibration)
+        calibration: générateur de representative_dataset()
+
+    Returns:
+        bytes: modèle TFLite
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if quantization == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "dynamic":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif quantization == "int8":
+        if calibration is None:
+            raise ValueError("La quantification int8 nécessite un jeu de calibration")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = calibration
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    elif quantization != "float32":
+        raise ValueError(f"Quantification inconnue: {quantization}")
+
+    return converter.convert()
+
+
+def prune(model, train_images, train_labels, target_sparsity=0.5, epochs=2, batch_size=64,
+          seed=42):
+    """
+    Élague les poids de faible amplitude puis ré-entraîne brièvement
+
+    Returns:
+        keras.Model: modèle élagué (enveloppes de pruning retirées), recompilé
+    """
+    if not TFMOT_AVAILABLE:
+        raise RuntimeError("tensorflow-model-optimization requis pour l'élagage")
+
+    # Copie : les enveloppes de pruning partagent les poids du modèle d'origine
+    clone = tf.keras.models.clone_model(model)
+    clone.set_weights(model.get_weights())
+
+    dataset = make_train_dataset(train_images, train_labels, batch_size=batch_size, seed=seed)
+    steps = int(np.ceil(len(train_labels) / batch_size)) * epochs
+
+    schedule = tfmot.sparsity.keras.PolynomialDecay(
+        initial_sparsity=0.0, final_sparsity=target_sparsity,
+        begin_step=0, end_step=max(steps - 1, 1)
+    )
+    pruned = tfmot.sparsity.keras.prune_low_magnitude(clone, pruning_schedule=schedule)
+    pruned.compile(loss="categorical_crossentropy",
+                   optimizer=tf.keras.optimizers.Adam(learning_rate=1e-4),
+                   metrics=["accuracy"])
+    pruned.fit(dataset, epochs=epochs, verbose=1,
+               callbacks=[tfmot.sparsity.keras.UpdatePruningStep()])
+
+    stripped = tfmot.sparsity.keras.strip_pruning(pruned)
+    stripped.compile(loss="categorical_crossentropy", optimizer="adam", metrics=["accuracy"])
+    return stripped
+
+
+def compressed_size(path):
+    """Taille gzip : l'élagage ne réduit le fichier qu'une fois compressé"""
+    with open(path, "rb") as f:
+        return len(gzip.compress(f.read()))
+
+
+def optimize(model_path="models/emotion_model.h5", csv_path="data/fer2013.csv",
+             output_dir="models/optimized", cache_dir="data/cache", max_accuracy_drop=0.01,
+             quantizations=QUANTIZATIONS, prune_sparsity=0.5, prune_epochs=2,
+             calibration_size=500, batch_size=32, seed=42, num_threads=None):
+    """
+    Produit et mesure toutes les variantes, enregistre celles dont la perte
+    de précision (vs. le modèle Keras d'origine) est <= max_accuracy_drop
+
+    Args:
+        prune_sparsity: proportion de poids mis à zéro (0 = pas d'élagage)
+        num_threads: threads des interpréteurs TFLite (mesures de latence)
+
+    Returns:
+        dict: contenu du registre (baseline, variantes, variantes enregistrées)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    splits = load_splits(csv_path, cache_dir, seed=seed)
+    images, labels = splits["images"], splits["labels"]
+    train_idx, test_idx = splits["train"], splits["test"]
+    test_images, test_labels = images[test_idx], labels[test_idx]
+
+    model = tf.keras.models.load_model(model_path)
+    calibration = representative_dataset(images[train_idx], size=calibration_size, seed=seed)
+
+    print("\n📏 Référence Keras float32...")
+    baseline = profile(lambda x: model(x, training=False).numpy(), test_images, test_labels,
+                       batch_size=batch_size)
+    baseline.update(path=model_path, size_bytes=os.path.getsize(model_path),
+                    compressed_bytes=compressed_size(model_path))
+
+    sources = {"": model}
+    if prune_sparsity > 0:
+        if TFMOT_AVAILABLE:
+            print(f"\n✂️  Élagage ({prune_sparsity:.0%} des poids)...")
+            sources["pruned_"] = prune(model, images[train_idx], labels[train_idx],
+                                       target_sparsity=prune_sparsity, epochs=prune_epochs,
+                                       seed=seed)
+        else:
+            print("⚠️ Élagage ignoré (tensorflow-model-optimization absent)")
+
+    variants = {}
+    for prefix, source in sources.items():
+        for quantization in quantizations:
+            name = f"{prefix}{quantization}"
+            path = os.path.join(output_dir, f"emotion_model_{name}.tflite")
+            print(f"\n⚙️  Variante {name}...")
+            try:
+                data = convert(source, quantization, calibration)
+            except Exception as e:
+                print(f"   ❌ Conversion impossible: {e}")
+                continue
+
+            with tempfile.NamedTemporaryFile(dir=output_dir, suffix=".tflite", delete=False) as f:
+                f.write(data)
+            os.replace(f.name, path)
+
+            tflite = TFLiteModel(path, num_threads=num_threads)
+            metrics = profile(tflite.predict, test_images, test_labels, batch_size=batch_size)
+            metrics.update(path=path, quantization=quantization, pruned=bool(prefix),
+                           size_bytes=os.path.getsize(path), compressed_bytes=compressed_size(path))
+            metrics["accuracy_drop"] = baseline["accuracy"] - metrics["accuracy"]
+            metrics["accepted"] = metrics["accuracy_drop"] <= max_accuracy_drop
+            variants[name] = metrics
+
+    accepted = {name: m for name, m in variants.items() if m["accepted"]}
+    # Variante recommandée : la plus rapide (1 visage) parmi les acceptées
+    recommended = min(accepted, key=lambda n: accepted[n]["latency_ms"]) if accepted else None
+
+    registry = {
+        "source_model": model_path,
+        "max_accuracy_drop": max_accuracy_drop,
+        "calibration_size": calibration_size,
+        "baseline": baseline,
+        "variants": variants,
+        "registered": sorted(accepted),
+        "recommended": recommended,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    registry_path = os.path.join(output_dir, REGISTRY_FILE)
+    tmp = registry_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(registry, f, indent=2)
+    os.replace(tmp, registry_path)
+    return registry
+
+
+def registered_model_path(variant=None, output_dir="models/optimized"):
+    """
+    Chemin d'une variante enregistrée (la recommandée si variant est None),
+    None si aucune variante n'a passé le seuil de précision
+    """
+    registry_path = os.path.join(output_dir, REGISTRY_FILE)
+    if not os.path.exists(registry_path):
+        return None
+    with open(registry_path, "r", encoding="utf-8") as f:
+        registry = json.load(f)
+
+    variant = variant or registry.get("recommended")
+    if variant not in registry.get("registered", []):
+        return None
+    return registry["variants"][variant]["path"]
@@ -0,0 +1,213 @@
+"""
+Registre de modèles versionné : un dossier par version avec son manifeste
+(labels, forme d'entrée, prétraitement, backend, métriques), un format
+SavedModel à signature d'inférence précompilée, promotion atomique
+"""
+
+import json
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+
+DEFAULT_ROOT = "models/registry"
+
+# Prétraitement attendu par tous les modèles du projet (EmotionDetector)
+DEFAULT_PREPROCESSING = {
+    "color": "grayscale",
+    "size": [48, 48],
+    "scale": 1 / 255.0,
+    "face_detector": "haarcascade_frontalface_default",
+}
+
+BACKENDS = ("savedmodel", "tflite", "keras")
+
+_VERSION_RE = re.compile(r"^v(\d{4,})$")
+
+
+class SavedModelPredictor:
+    """
+    Signature "serving_default" d'un SavedModel : graphe déjà tracé, aucune
+    reconstruction des couches Keras au chargement (contrairement au .h5)
+    """
+
+    def __init__(self, path):
+        import tensorflow as tf
+
+        self._tf = tf
+        self._loaded = tf.saved_model.load(path)
+        self._serve = self._loaded.signatures["serving_default"]
+
+    def predict(self, x, verbose=0):
+        x = self._tf.convert_to_tensor(np.asarray(x, dtype=np.float32))
+        return self._serve(images=x)["probabilities"].numpy()
+
+
+def export_savedmodel(model, path, input_shape=(48, 48, 1)):
+    """Exporte un modèle Keras avec une signature (lot variable, float32) -> probabilités"""
+    import tensorflow as tf
+
+    @tf.function(input_signature=[tf.TensorSpec([None, *input_shape], tf.float32, name="images")])
+    def serve(images):
+        return {"probabilities": model(images, training=False)}
+
+    module = tf.Module()
+    module.model = model
+    module.serve = serve
+    tf.saved_model.save(module, path, signatures={"serving_default": serve})
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ModelRegistry:
+    def __init__(self, root=DEFAULT_ROOT, name="emotion"):
+        """
+        Args:
+            root: dossier racine du registre
+            name: nom du modèle (un sous-dossier par nom)
+        """
+        self.path = os.path.join(root, name)
+        self.name = name
+        self.current_path = os.path.join(self.path, "CURRENT")
+        os.makedirs(self.path, exist_ok=True)
+
+    def versions(self):
+        """Versions publiées, de la plus ancienne à la plus récente"""
+        found = []
+        for entry in os.listdir(self.path):
+            match = _VERSION_RE.match(entry)
+            if match and os.path.exists(os.path.join(self.path, entry, "manifest.json")):
+                found.append((int(match.group(1)), entry))
+        return [entry for _, entry in sorted(found)]
+
+    def current_version(self):
+        """Version promue (lue à chaque appel : suit les promotions d'autres processus)"""
+        try:
+            with open(self.current_path, "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def manifest(self, version=None):
+        version = version or self.current_version()
+        if version is None:
+            raise LookupError(f"Aucune version promue dans {self.path}")
+        return _read_json(os.path.join(self.path, version, "manifest.json"))
+
+    def register(self, model_path, labels_path=None, metrics=None, backend="savedmodel",
+                 input_shape=(48, 48, 1), preprocessing=None, notes="", promote=False):
+        """
+        Publie une nouvelle version
+
+        La version est construite dans un dossier temporaire puis renommée :
+        un lecteur ne voit jamais de version incomplète.
+
+        Args:
+            model_path: .h5 / .keras (converti selon backend) ou .tflite
+            labels_path: emotion_labels.json (défaut: à côté du modèle)
+            metrics: dict ou chemin d'un rapport JSON (précision, latence...)
+            backend: "savedmodel" (défaut, chargement rapide), "tflite" ou "keras"
+            promote: promouvoir immédiatement la nouvelle version
+
+        Returns:
+            str: version créée ("v0003")
+        """
+        if model_path.endswith(".tflite"):
+            backend = "tflite"
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend inconnu: {backend} ({', '.join(BACKENDS)})")
+
+        labels_path = labels_path or os.path.join(os.path.dirname(model_path) or ".",
+                                                  "emotion_labels.json")
+        labels = {str(k): v for k, v in _read_json(labels_path).items()}
+        if isinstance(metrics, str):
+            metrics = _read_json(metrics)
+
+        staging = os.path.join(self.path, f".staging-{os.getpid()}-{time.time_ns()}")
+        os.makedirs(staging)
+        try:
+            artifact = self._write_artifact(model_path, staging, backend, input_shape)
+            manifest = {
+                "name": self.name,
+                "labels": labels,
+                "input_shape": list(input_shape),
+                "preprocessing": preprocessing or DEFAULT_PREPROCESSING,
+                "backend": backend,
+                "artifact": artifact,
+                "metrics": metrics or {},
+                "source": os.path.abspath(model_path),
+                "notes": notes,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+
+            # Numéro suivant ; rename échoue si un autre processus l'a pris entre-temps
+            while True:
+                existing = self.versions()
+                number = int(existing[-1][1:]) + 1 if existing else 1
+                version = f"v{number:04d}"
+                manifest["version"] = version
+                with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+                    json.dump(manifest, f, ensure_ascii=False, indent=2)
+                try:
+                    os.rename(staging, os.path.join(self.path, version))
+                    break
+                except OSError:
+                    if not os.path.exists(os.path.join(self.path, version)):
+                        raise
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if promote:
+            self.promote(version)
+        return version
+
+    def _write_artifact(self, model_path, directory, backend, input_shape):
+        if backend == "tflite":
+            shutil.copyfile(model_path, os.path.join(directory, "model.tflite"))
+            return "model.tflite"
+
+        from tensorflow.keras.models import load_model
+
+        model = load_model(model_path)
+        if backend == "keras":
+            model.save(os.path.join(directory, "model.keras"))
+            return "model.keras"
+
+        export_savedmodel(model, os.path.join(directory, "savedmodel"), input_shape)
+        return "savedmodel"
+
+    def promote(self, version):
+        """Rend `version` courante (remplacement atomique du pointeur CURRENT)"""
+        if version not in self.versions():
+            raise LookupError(f"Version inconnue: {version}")
+        tmp = f"{self.current_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+        os.replace(tmp, self.current_path)
+        return version
+
+    def load(self, version=None, num_threads=None):
+        """
+        Charge une version (la courante par défaut)
+
+        Returns:
+            (modèle avec predict(x), manifeste)
+        """
+        manifest = self.manifest(version)
+        path = os.path.join(self.path, manifest["version"], manifest["artifact"])
+
+        if manifest["backend"] == "savedmodel":
+            model = SavedModelPredictor(path)
+        elif manifest["backend"] == "tflite":
+            from .tflite_model import TFLiteModel
+            model = TFLiteModel(path, num_threads=num_threads)
+        else:
+            from tensorflow.keras.models import load_model
+            model = load_model(path)
+        return model, manifest
@@ -0,0 +1,203 @@
+"""
+Moteur de notifications incrémental : état d'humeur lissé par utilisateur,
+règles déclaratives ("DOWN depuis X minutes"...) évaluées en O(1) par
+événement, écritures en base groupées
+"""
+
+import threading
+import time
+from collections import deque
+
+# Règles par défaut : seules à décider du déclenchement
+#   mood: état lissé déclencheur ; minutes: durée minimum dans cet état
+#   cooldown: délai (s) avant de renotifier tant que l'état persiste
+DEFAULT_RULES = [
+    {
+        "type": "mood_alert",
+        "mood": "DOWN",
+        "minutes": 5,
+        "cooldown": 300,
+        "message": ("⚠️ Tu sembles avoir le moral bas depuis {minutes} minutes. "
+                    "Pense à faire une pause, prendre l'air, ou parler à quelqu'un de confiance."),
+    },
+    {
+        "type": "mood_positive",
+        "mood": "UP",
+        "minutes": 10,
+        "cooldown": 600,
+        "message": ("🎉 Tu es dans un super état d'esprit depuis {minutes} minutes ! "
+                    "Continue à profiter de ce moment positif !"),
+    },
+]
+
+
+class _UserState:
+    """Fenêtre glissante et compteurs d'un utilisateur"""
+
+    __slots__ = ("window", "counts", "mood", "since", "last_fired")
+
+    def __init__(self, window):
+        self.window = deque(maxlen=window)
+        self.counts = {}
+        self.mood = None
+        self.since = None
+        # type de règle -> instant de la dernière notification
+        self.last_fired = {}
+
+
+class NotificationEngine:
+    def __init__(self, db=None, rules=None, window=5, ratio=0.8, message_fn=None,
+                 batch_size=50, flush_interval=5.0):
+        """
+        Args:
+            db: Database (ou objet avec create_notifications) ; None = pas de persistance
+            rules: liste de règles (voir DEFAULT_RULES)
+            window: nombre de derniers événements considérés pour lisser l'humeur
+            ratio: part minimum de la fenêtre pour changer d'état (anti-rebond)
+            message_fn: callable(mood, minutes) -> str | None remplaçant le
+                gabarit "message" des règles (ex: ResponseGenerator.get_notification_message) ;
+                mise en forme seulement, None = gabarit de la règle
+            batch_size: notifications en attente déclenchant une écriture
+            flush_interval: délai max (s) avant écriture des notifications en attente
+        """
+        self.db = db
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.window = window
+        self.threshold = max(1, int(round(window * ratio)))
+        self.message_fn = message_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # Règles indexées par humeur : seules celles de l'état courant sont évaluées
+        self._rules_by_mood = {}
+        for rule in self.rules:
+            self._rules_by_mood.setdefault(rule["mood"], []).append(rule)
+
+        self._users = {}
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        self.events = 0
+        self.fired = 0
+        self.written = 0
+
+    def observe(self, user_id, mood_state, timestamp=None):
+        """
+        Enregistre un état d'humeur (une frame) et évalue les règles
+
+        Args:
+            user_id: utilisateur (None = session anonyme, notifications non persistées)
+            mood_state: "UP", "DOWN" ou "NEUTRAL"
+            timestamp: instant de l'événement (time.time() par défaut)
+
+        Returns:
+            list: notifications déclenchées ({"user_id", "type", "message"})
+        """
+        now = time.time() if timestamp is None else timestamp
+
+        with self._lock:
+            self.events += 1
+            state = self._users.get(user_id)
+            if state is None:
+                state = self._users[user_id] = _UserState(self.window)
+
+            # Fenêtre glissante : compteurs mis à jour sans la reparcourir
+            if len(state.window) == state.window.maxlen:
+                evicted = state.window[0]
+                state.counts[evicted] -= 1
+            state.window.append(mood_state)
+            state.counts[mood_state] = state.counts.get(mood_state, 0) + 1
+
+            # Changement d'état seulement si l'humeur domine la fenêtre
+            if mood_state != state.mood and state.counts[mood_state] >= self.threshold:
+                state.mood = mood_state
+                state.since = now
+                state.last_fired.clear()
+
+            fired = self._evaluate(user_id, state, now)
+            self.fired += len(fired)
+
+        self._maybe_flush()
+        return fired
+
+    def _evaluate(self, user_id, state, now):
+        """Règles de l'état courant (appelé sous verrou)"""
+        fired = []
+        for rule in self._rules_by_mood.get(state.mood, ()):
+            minutes = int((now - state.since) // 60)
+            if minutes < rule["minutes"]:
+                continue
+            last = state.last_fired.get(rule["type"])
+            if last is not None and now - last < rule.get("cooldown", 0):
+                continue
+
+            message = self._message(rule, minutes)
+            state.last_fired[rule["type"]] = now
+            notification = {"user_id": user_id, "type": rule["type"], "message": message}
+            fired.append(notification)
+            if user_id is not None and self.db is not None:
+                self._pending.append((user_id, rule["type"], message))
+        return fired
+
+    def _message(self, rule, minutes):
+        """Texte de la notification ; la règle a déjà décidé qu'elle part"""
+        if self.message_fn is not None:
+            message = self.message_fn(rule["mood"], minutes)
+            if message:
+                return message
+        return rule["message"].format(minutes=minutes)
+
+    def _maybe_flush(self):
+        with self._lock:
+            due = self._pending and (
+                len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Écrit les notifications en attente en une seule transaction"""
+        # Un seul flush à la fois ; les événements continuent pendant l'écriture
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+
+            try:
+                self.db.create_notifications(pending)
+            except Exception as e:
+                print(f"⚠️ Écriture des notifications impossible: {e}")
+                with self._lock:
+                    self._pending[:0] = pending
+                return 0
+
+            self.written += len(pending)
+            return len(pending)
+
+    def current_state(self, user_id):
+        """(humeur lissée, secondes dans cet état) ou (None, 0)"""
+        with self._lock:
+            state = self._users.get(user_id)
+            if state is None or state.mood is None:
+                return None, 0
+            return state.mood, time.time() - state.since
+
+    def reset(self, user_id):
+        """Oublie l'état d'un utilisateur (déconnexion, fin de session)"""
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "events": self.events,
+                "fired": self.fired,
+                "written": self.written,
+                "pending": len(self._pending),
+            }
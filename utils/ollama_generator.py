@@ -2,31 +2,97 @@
 Générateur de réponses via Ollama LLM
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import random
+import time
+
+from .circuit_breaker import CircuitBreaker
+from .response_cache import cache_key
+from .single_flight import DEFAULT_SINGLE_FLIGHT
 
 class OllamaGenerator:
-    def __init__(self, model="llama2", base_url="http://localhost:11434"):
+    def __init__(self, model="llama2", base_url="http://localhost:11434",
+                 pool_size=10, connect_timeout=2, read_timeout=30,
+                 failure_threshold=3, recovery_timeout=15.0, health_ttl=30.0,
+                 cache=None, single_flight=None, keep_alive="30m"):
         """
         Initialise le générateur Ollama
         
         Args:
             model: Nom du modèle Ollama (llama2, mistral, etc.)
             base_url: URL du serveur Ollama
+            pool_size: connexions HTTP persistantes (keep-alive) conservées
+            connect_timeout: délai max d'établissement de connexion (s)
+            read_timeout: délai max de génération (s)
+            failure_threshold: échecs consécutifs avant ouverture du disjoncteur
+            recovery_timeout: délai avant une nouvelle sonde quand Ollama est down (s)
+            health_ttl: durée de validité de l'état "disponible" (s)
+            cache: ResponseCache optionnel (réponses déjà générées pour un même prompt)
+            single_flight: SingleFlight regroupant les prompts identiques en cours
+                (par défaut partagé par tous les générateurs du processus)
+            keep_alive: durée de maintien du modèle en mémoire côté Ollama
+                entre deux requêtes (évite le rechargement entre deux tours)
         """
         self.model = model
         self.base_url = base_url
-        self.is_available = self._check_availability()
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.cache = cache
+        self.keep_alive = keep_alive
+        self.single_flight = single_flight or DEFAULT_SINGLE_FLIGHT
+        
+        self.options = {
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "max_tokens": 150
+        }
         
+        # Session partagée : réutilise les connexions TCP au lieu d'en ouvrir une par appel
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Plus de sonde bloquante ici : la disponibilité est vérifiée au premier appel
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout, health_ttl)
+    
+    @property
+    def is_available(self):
+        """Dernier état connu (False tant que le disjoncteur est ouvert)"""
+        return self.breaker.state != CircuitBreaker.OPEN
+    
     def _check_availability(self):
         """Vérifie si Ollama est disponible"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=2)
+            response = self.session.get(
+                f"{self.base_url}/api/tags",
+                timeout=(self.connect_timeout, 2)
+            )
             return response.status_code == 200
-        except:
+        except requests.exceptions.RequestException:
             return False
     
-    def build_prompt(self, emotion, mood_state, user_message=""):
+    def _ensure_available(self):
+        """
+        Décide sans attendre si un appel peut partir :
+        disjoncteur ouvert -> False immédiatement ; état de santé
+        expiré ou sonde demi-ouverte -> vérification via /api/tags
+        """
+        if not self.breaker.allow_request():
+            return False
+        
+        if not self.breaker.health_expired():
+            return True
+        
+        if self._check_availability():
+            self.breaker.record_success()
+            return True
+        
+        self.breaker.record_failure()
+        return False
+    
+    def build_prompt(self, emotion, mood_state, user_message="", history=""):
         """
         Construit un prompt contextualisé basé sur l'émotion détectée
         
@@ -34,6 +100,7 @@ class OllamaGenerator:
             emotion: Émotion détectée (happy, sad, angry, etc.)
             mood_state: État d'humeur (UP, DOWN, NEUTRAL)
             user_message: Message de l'utilisateur (optionnel)
+            history: échanges précédents déjà bornés (ConversationContext.build)
         
         Returns:
             str: Prompt formaté pour Ollama
@@ -57,6 +124,9 @@ Génère une réponse courte (2-3 phrases maximum) en français qui:
 - L'encourage ou le réconforte selon son humeur
 - Reste naturelle et humaine"""
 
+        if history:
+            system_context += f"\n\nConversation précédente:\n{history}"
+
         if user_message:
             prompt = f"{system_context}\n\nMessage de l'utilisateur: \"{user_message}\"\n\nRéponds de manière empathique:"
         else:
@@ -64,7 +134,32 @@ Génère une réponse courte (2-3 phrases maximum) en français qui:
         
         return prompt
     
-    def generate_response(self, emotion, mood_state, user_message=""):
+    def _cached(self, prompt, user_message):
+        """Réponse en cache pour ce prompt, ou None"""
+        if self.cache is None or not self.cache.cacheable(user_message):
+            return None
+        return self.cache.get(self.model, self.options, prompt)
+    
+    def _store(self, prompt, user_message, reply):
+        """Mémorise une réponse générée (jamais les fallbacks)"""
+        if self.cache is not None and self.cache.cacheable(user_message):
+            self.cache.put(self.model, self.options, prompt, reply)
+    
+    def _flight_key(self, prompt):
+        """Clé de regroupement : même serveur, même modèle, même prompt"""
+        return f"{self.base_url}|{cache_key(self.model, self.options, prompt)}"
+    
+    def _payload(self, prompt, stream):
+        """Corps de requête /api/generate"""
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": self.options,
+            "keep_alive": self.keep_alive
+        }
+    
+    def generate_response(self, emotion, mood_state, user_message="", history=""):
         """
         Génère une réponse via Ollama
         
@@ -72,52 +167,241 @@ Génère une réponse courte (2-3 phrases maximum) en français qui:
             emotion: Émotion détectée
             mood_state: État d'humeur (UP/DOWN/NEUTRAL)
             user_message: Message utilisateur (contexte)
+            history: échanges précédents (voir build_prompt)
         
         Returns:
             str: Réponse générée
         """
-        # Si Ollama n'est pas disponible, utiliser fallback
-        if not self.is_available:
-            print("⚠️ Ollama non disponible, utilisation du fallback")
-            return self._fallback_response(mood_state)
+        prompt = self.build_prompt(emotion, mood_state, user_message, history)
+        
+        # Prompt déjà vu : réponse immédiate, même si Ollama est down
+        cached = self._cached(prompt, user_message)
+        if cached is not None:
+            return cached
+        
+        # Prompt identique déjà en cours (autre session) : on attend sa réponse
+        reply = self.single_flight.do(self._flight_key(prompt),
+                                      lambda: self._post_generate(prompt, user_message))
+        return reply or self._fallback_response(mood_state)
+    
+    def _post_generate(self, prompt, user_message, store=True):
+        """
+        Appel non streaming à /api/generate (store=False : réponse non mise en cache)
         
-        prompt = self.build_prompt(emotion, mood_state, user_message)
+        Returns:
+            str | None: texte généré, None si Ollama n'a pas répondu
+        """
+        # Si Ollama n'est pas disponible (disjoncteur ouvert), fallback immédiat
+        if not self._ensure_available():
+            print("⚠️ Ollama non disponible, utilisation du fallback")
+            return None
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "max_tokens": 150
-                    }
-                },
-                timeout=30
+                json=self._payload(prompt, stream=False),
+                timeout=(self.connect_timeout, self.read_timeout)
             )
             
             if response.status_code == 200:
+                self.breaker.record_success()
                 result = response.json()
                 generated_text = result.get('response', '').strip()
                 
                 # Nettoyer la réponse
                 if generated_text:
+                    if store:
+                        self._store(prompt, user_message, generated_text)
                     return generated_text
                 else:
-                    return self._fallback_response(mood_state)
+                    return None
             else:
                 print(f"❌ Erreur Ollama: {response.status_code}")
-                return self._fallback_response(mood_state)
+                # 4xx (modèle absent...) : le serveur répond, seules les 5xx comptent
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                return None
                 
         except requests.exceptions.Timeout:
             print("⏱️ Timeout Ollama")
-            return self._fallback_response(mood_state)
+            self.breaker.record_failure()
+            return None
         except Exception as e:
             print(f"❌ Erreur Ollama: {e}")
-            return self._fallback_response(mood_state)
+            self.breaker.record_failure()
+            return None
+    
+    def generate_stream(self, emotion, mood_state, user_message="", stats=None, history=""):
+        """
+        Génère une réponse via Ollama en streaming (NDJSON)
+        
+        Args:
+            emotion: Émotion détectée
+            mood_state: État d'humeur (UP/DOWN/NEUTRAL)
+            user_message: Message utilisateur (contexte)
+            stats: dict optionnel rempli avec ttft (s), tokens, tokens_per_s,
+                    fallback (bool), cached (bool), coalesced (bool)
+            history: échanges précédents (voir build_prompt)
+        
+        Yields:
+            str: fragments de texte au fil de la génération
+        """
+        if stats is None:
+            stats = {}
+        stats.update(ttft=None, tokens=0, tokens_per_s=0.0, fallback=False, cached=False,
+                     coalesced=False)
+        
+        prompt = self.build_prompt(emotion, mood_state, user_message, history)
+        start = time.perf_counter()
+        
+        cached = self._cached(prompt, user_message)
+        if cached is not None:
+            stats.update(ttft=time.perf_counter() - start, cached=True)
+            yield cached
+            return
+        
+        key = self._flight_key(prompt)
+        leader, flight = self.single_flight.begin(key)
+        if not leader:
+            # Même prompt déjà en génération : la réponse complète arrive d'un bloc
+            stats["coalesced"] = True
+            try:
+                reply = flight.result(timeout=self.connect_timeout + self.read_timeout)
+            except Exception:
+                reply = None
+            if reply:
+                stats["ttft"] = time.perf_counter() - start
+                yield reply
+            else:
+                stats["fallback"] = True
+                yield self._fallback_response(mood_state)
+            return
+        
+        outcome = {}
+        try:
+            yield from self._stream_upstream(prompt, mood_state, user_message, stats, start, outcome)
+        finally:
+            # Toujours libérer la clé, même si le consommateur abandonne le flux
+            self.single_flight.end(key, outcome.get("reply"))
+    
+    def _stream_upstream(self, prompt, mood_state, user_message, stats, start, outcome):
+        """Flux NDJSON réel ; outcome["reply"] reçoit le texte complet si la génération aboutit"""
+        if not self._ensure_available():
+            print("⚠️ Ollama non disponible, utilisation du fallback")
+            stats["fallback"] = True
+            yield self._fallback_response(mood_state)
+            return
+        
+        first_token = None
+        chunks = 0
+        parts = []
+        done = False
+        eval_count = None
+        eval_duration = None
+        
+        try:
+            with self.session.post(
+                f"{self.base_url}/api/generate",
+                json=self._payload(prompt, stream=True),
+                timeout=(self.connect_timeout, self.read_timeout),
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    print(f"❌ Erreur Ollama: {response.status_code}")
+                    if response.status_code >= 500:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    stats["fallback"] = True
+                    yield self._fallback_response(mood_state)
+                    return
+                
+                # chunk_size=None : chaque bloc HTTP est traité dès réception
+                for line in response.iter_lines(chunk_size=None):
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    
+                    text = chunk.get('response', '')
+                    if text:
+                        if first_token is None:
+                            first_token = time.perf_counter()
+                            stats["ttft"] = first_token - start
+                        chunks += 1
+                        parts.append(text)
+                        yield text
+                    
+                    if chunk.get('done'):
+                        done = True
+                        eval_count = chunk.get('eval_count')
+                        eval_duration = chunk.get('eval_duration')  # nanosecondes
+                        break
+            
+            self.breaker.record_success()
+        
+        except requests.exceptions.Timeout:
+            print("⏱️ Timeout Ollama")
+            self.breaker.record_failure()
+        except Exception as e:
+            print(f"❌ Erreur Ollama: {e}")
+            self.breaker.record_failure()
+        
+        if first_token is None:
+            # Rien reçu : la réponse entière vient du fallback
+            stats["fallback"] = True
+            yield self._fallback_response(mood_state)
+            return
+        
+        # Seule une génération complète est mise en cache
+        if done:
+            outcome["reply"] = "".join(parts).strip()
+            self._store(prompt, user_message, outcome["reply"])
+        
+        stats["tokens"] = eval_count or chunks
+        # Débit mesuré par le serveur si disponible, sinon côté client
+        elapsed = eval_duration / 1e9 if eval_duration else time.perf_counter() - first_token
+        if elapsed > 0:
+            stats["tokens_per_s"] = stats["tokens"] / elapsed
+    
+    def summarize(self, previous, turns):
+        """
+        Résume des échanges anciens pour ConversationContext
+        
+        Args:
+            previous: résumé existant ("" si aucun)
+            turns: échanges (id, role, message) à intégrer
+        
+        Returns:
+            str: nouveau résumé (2-3 phrases)
+        """
+        lines = "\n".join(f"{role}: {message}" for _, role, message in turns)
+        prompt = ("Résume en 2 ou 3 phrases courtes, en français, ce que l'utilisateur a "
+                  "partagé (faits, ressentis), sans ajouter de conseils.\n\n")
+        if previous:
+            prompt += f"Résumé existant:\n{previous}\n\n"
+        prompt += f"Nouveaux échanges:\n{lines}\n\nRésumé:"
+        
+        reply = self._post_generate(prompt, "", store=False)
+        if reply is None:
+            raise RuntimeError("Ollama indisponible")
+        return reply
+    
+    def warm_up(self):
+        """Charge le modèle en mémoire sans générer (requête sans prompt)"""
+        if not self._ensure_available():
+            return False
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "keep_alive": self.keep_alive},
+                timeout=(self.connect_timeout, self.read_timeout)
+            )
+            return response.status_code == 200
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Préchargement du modèle impossible: {e}")
+            return False
     
     def _fallback_response(self, mood_state):
         """Réponses de secours si Ollama ne répond pas"""
@@ -145,7 +429,7 @@ Génère une réponse courte (2-3 phrases maximum) en français qui:
     def test_connection(self):
         """Test la connexion à Ollama"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=5)
             if response.status_code == 200:
                 models = response.json().get('models', [])
                 print(f"✅ Ollama connecté ! Modèles disponibles:")
@@ -0,0 +1,83 @@
+"""
+Mesures communes d'un prédicteur predict(x) -> probabilités : latence
+(moyenne et percentiles), prédictions et précision sur des images uint8.
+Partagées par l'optimisation, la distillation et l'évaluation, sans
+dépendance à TensorFlow
+"""
+
+import time
+
+import numpy as np
+
+
+def percentile(values, p, default=0.0):
+    """Percentile p (0-100) d'une liste de mesures ; default si elle est vide"""
+    if len(values) == 0:
+        return default
+    return float(np.percentile(values, p))
+
+
+def latency_stats(predict, sample, runs=200, warmup=20):
+    """Latence (ms) d'un appel predict(sample) : moyenne et percentiles"""
+    for _ in range(warmup):
+        predict(sample)
+
+    timings = np.empty(runs)
+    for i in range(runs):
+        start = time.perf_counter()
+        predict(sample)
+        timings[i] = (time.perf_counter() - start) * 1000
+    return {
+        "mean_ms": float(timings.mean()),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+    }
+
+
+def latency_profile(predict, images, batch_size=32, runs=200):
+    """
+    Latence d'un visage (lot 1) et d'un lot de batch_size images, débit
+
+    Returns:
+        dict: single et batch (voir latency_stats), batch_size, images_per_s
+    """
+    single = images[:1].astype(np.float32) / 255.0
+    batch = images[:batch_size].astype(np.float32) / 255.0
+    batch_stats = latency_stats(predict, batch, runs=max(runs // 4, 10))
+    return {
+        "single": latency_stats(predict, single, runs=runs),
+        "batch": batch_stats,
+        "batch_size": batch_size,
+        "images_per_s": batch_size / (batch_stats["p50_ms"] / 1000) if batch_stats["p50_ms"] > 0 else 0.0,
+    }
+
+
+def predict_labels(predict, images, batch_size=256):
+    """Classe prédite pour chaque image uint8 (normalisée par lots)"""
+    predictions = []
+    for start in range(0, len(images), batch_size):
+        x = images[start:start + batch_size].astype(np.float32) / 255.0
+        predictions.append(np.argmax(predict(x), axis=1))
+    return np.concatenate(predictions) if predictions else np.empty(0, dtype=np.int64)
+
+
+def evaluate(predict, images, labels, batch_size=256):
+    """Précision (accuracy) sur des images uint8"""
+    return float((predict_labels(predict, images, batch_size) == labels).mean())
+
+
+def profile(predict, images, labels, batch_size=32, runs=200):
+    """Précision, latence 1 visage et latence par lot d'un prédicteur (registre, rapports)"""
+    latency = latency_profile(predict, images, batch_size=batch_size, runs=runs)
+    single, batch = latency["single"], latency["batch"]
+    return {
+        "accuracy": evaluate(predict, images, labels),
+        "latency_ms": single["p50_ms"],
+        "latency_mean_ms": single["mean_ms"],
+        "latency_p95_ms": single["p95_ms"],
+        "latency_p99_ms": single["p99_ms"],
+        "batch_latency_ms": batch["p50_ms"],
+        "batch_size": batch_size,
+        "images_per_s": latency["images_per_s"],
+    }
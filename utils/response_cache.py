@@ -0,0 +1,197 @@
+"""
+Cache des réponses LLM : clé (modèle, options, prompt normalisé),
+plusieurs variantes par clé, éviction LRU/TTL, persistance SQLite optionnelle
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_prompt(prompt):
+    """Normalise un prompt (Unicode NFKC, casse, espaces) pour la clé de cache"""
+    prompt = unicodedata.normalize("NFKC", prompt).casefold()
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def cache_key(model, options, prompt):
+    """Empreinte stable de (modèle, options, prompt normalisé)"""
+    raw = json.dumps([model, options, normalize_prompt(prompt)], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, ttl=24 * 3600, variants=3,
+                 max_message_length=64, persist_path=None):
+        """
+        Args:
+            max_entries: nombre de clés gardées en mémoire (LRU)
+            ttl: durée de vie d'une réponse (s)
+            variants: réponses distinctes à accumuler par clé avant de
+                servir depuis le cache (variété des réponses)
+            max_message_length: messages utilisateur plus longs non mis en cache
+            persist_path: base SQLite de persistance (ex: database/llm_cache.db),
+                None = cache en mémoire uniquement
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.variants = variants
+        self.max_message_length = max_message_length
+        self.persist_path = persist_path
+
+        # key -> liste de (created, reply), ordre LRU
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if persist_path:
+            self._init_persistence()
+
+    def cacheable(self, user_message):
+        """Seuls les messages vides ou courts ont une chance de se répéter"""
+        return len(user_message or "") <= self.max_message_length
+
+    def get(self, model, options, prompt):
+        """
+        Returns:
+            str | None: une des variantes en cache, None si la clé n'a pas
+            encore assez de variantes (l'appelant génère et appelle put)
+        """
+        key = cache_key(model, options, prompt)
+        now = time.time()
+
+        with self._lock:
+            replies = self._fresh(key, now)
+            if replies is not None and len(replies) >= self.variants:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return random.choice(replies)[1]
+
+            self.misses += 1
+            return None
+
+    def put(self, model, options, prompt, reply):
+        """Ajoute une variante pour ce prompt (remplace la plus ancienne si pleine)"""
+        key = cache_key(model, options, prompt)
+        now = time.time()
+
+        with self._lock:
+            replies = self._fresh(key, now) or []
+            if any(r == reply for _, r in replies):
+                return
+
+            replies.append((now, reply))
+            if len(replies) > self.variants:
+                replies.pop(0)
+            self._entries[key] = replies
+            self._entries.move_to_end(key)
+
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+                self.evictions += 1
+
+        if self.persist_path:
+            self._persist(key, replies, evicted)
+
+    def _fresh(self, key, now):
+        """Variantes non expirées d'une clé (appelé sous verrou)"""
+        replies = self._entries.get(key)
+        if replies is None:
+            return None
+
+        replies = [(created, r) for created, r in replies if now - created < self.ttl]
+        if replies:
+            self._entries[key] = replies
+            return replies
+
+        del self._entries[key]
+        return None
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.persist_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM llm_cache")
+
+    # ------------------------------------------------------------
+    # Persistance SQLite
+    # ------------------------------------------------------------
+
+    def _connect(self):
+        return sqlite3.connect(self.persist_path, timeout=30)
+
+    def _init_persistence(self):
+        """Crée la table et recharge les réponses encore valides (les plus récentes)"""
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT NOT NULL,
+                    reply TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (key, reply)
+                )
+            """)
+            cutoff = time.time() - self.ttl
+            conn.execute("DELETE FROM llm_cache WHERE created < ?", (cutoff,))
+            conn.commit()
+
+            rows = conn.execute("""
+                SELECT key, reply, created FROM llm_cache
+                ORDER BY created ASC
+            """).fetchall()
+        finally:
+            conn.close()
+
+        # Ordre chronologique : les clés récentes finissent en fin de LRU
+        for key, reply, created in rows:
+            replies = self._entries.setdefault(key, [])
+            replies.append((created, reply))
+            self._entries.move_to_end(key)
+            if len(replies) > self.variants:
+                replies.pop(0)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _persist(self, key, replies, evicted):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO llm_cache (key, reply, created) VALUES (?, ?, ?)",
+                    [(key, reply, created) for created, reply in replies]
+                )
+                conn.executemany("DELETE FROM llm_cache WHERE key = ?", [(k,) for k in evicted])
+        except sqlite3.Error as e:
+            print(f"⚠️ Persistance du cache LLM impossible: {e}")
+        finally:
+            conn.close()
@@ -2,7 +2,15 @@
 Générateur de réponses empathiques basé sur l'état émotionnel
 """
 
+import queue
 import random
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .conversation_context import ConversationContext
 
 try:
     from .ollama_generator import OllamaGenerator
@@ -12,18 +20,71 @@ except:
     print("⚠️ Ollama non disponible, utilisation des réponses pré-définies")
 
 
+def _shutdown_executors(executors):
+    """Arrête les pools sans attendre ; les tâches non démarrées sont abandonnées"""
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 class ResponseGenerator:
-    def __init__(self, use_ollama=True):
+    def __init__(self, use_ollama=True, cache=None, prefetch_size=3, prefetch_settle=1.0,
+                 latency_budget=None, db=None, context_budget=768, ollama_gen=None):
+        """
+        Args:
+            use_ollama: générer via Ollama (sinon réponses pré-définies)
+            cache: ResponseCache optionnel, partageable entre sessions
+            ollama_gen: OllamaGenerator partagé (disjoncteur, connexions et
+                préchargement communs à toutes les sessions) ; None = un par instance
+            prefetch_size: réponses pré-générées pour l'état courant (0 = désactivé)
+            prefetch_settle: délai (s) de stabilité de l'état avant chaque pré-génération
+            latency_budget: délai max (s) avant de répondre avec une réponse
+                pré-définie pendant que le LLM continue (None = attendre le LLM)
+            db: Database d'où lire l'historique des sessions (messages)
+            context_budget: tokens d'historique maximum par prompt (0 = aucun)
+        """
         self.use_ollama = use_ollama and OLLAMA_AVAILABLE
+        self.latency_budget = latency_budget
+        self._llm_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm")
 
-        if self.use_ollama:
+        # Pré-génération spéculative pour l'état (émotion, humeur) courant
+        self.prefetch_size = prefetch_size
+        self.prefetch_settle = prefetch_settle
+        self.prefetch_stats = {"generated": 0, "served": 0, "missed": 0, "discarded": 0}
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_state = None
+        self._prefetch_changed_at = 0.0
+        self._prefetch_generation = 0
+        self._prefetch_pool = deque(maxlen=max(prefetch_size, 1))
+        self._prefetch_running = False
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+
+        if ollama_gen is not None:
+            # Préchargement à la charge de celui qui a créé le générateur partagé
+            self.ollama_gen = ollama_gen
+            self.use_ollama = use_ollama
+        elif self.use_ollama:
             try:
-                self.ollama_gen = OllamaGenerator(model="llama2")
+                self.ollama_gen = OllamaGenerator(model="llama2", cache=cache)
                 print("✅ OllamaGenerator initialisé")
+                # Modèle chargé dès maintenant, pas au premier message
+                self._llm_executor.submit(self.ollama_gen.warm_up)
             except Exception as e:
                 print(f"⚠️ Erreur init Ollama: {e}")
                 self.use_ollama = False
 
+        # Historique borné ; résumé des anciens échanges par le LLM, en arrière-plan
+        self.conversation = ConversationContext(
+            db,
+            token_budget=context_budget,
+            summarizer=self.ollama_gen.summarize if self.use_ollama else None
+        )
+
+        # Pools arrêtés par close(), ou quand l'instance est abandonnée (session Streamlit fermée)
+        executors = [self._llm_executor, self._prefetch_executor]
+        if self.conversation._executor is not None:
+            executors.append(self.conversation._executor)
+        self._finalizer = weakref.finalize(self, _shutdown_executors, executors)
+
         # Garder toutes les réponses existantes comme fallback
         self.responses_down = [
             "Je sens que tu traverses un moment difficile. C'est normal de se sentir comme ça parfois. 💙",
@@ -77,7 +138,8 @@ class ResponseGenerator:
             ]
         }
 
-    def generate_response(self, mood_state, current_emotion=None, include_tip=False, context=""):
+    def generate_response(self, mood_state, current_emotion=None, include_tip=False, context="",
+                          latency_budget=None, on_late_reply=None, session_id=None, turns=None):
         """
         Génère une réponse basée sur l'état d'humeur
 
@@ -86,17 +148,40 @@ class ResponseGenerator:
             current_emotion: émotion spécifique détectée (optionnel)
             include_tip: inclure un conseil bien-être (optionnel)
             context: contexte additionnel pour Ollama (optionnel)
+            latency_budget: délai max (s), self.latency_budget par défaut
+            on_late_reply: callback(reply) appelé depuis un thread de fond si
+                le LLM répond après le délai (remplacement de la réponse provisoire)
+            session_id: session dont l'historique est ajouté au prompt (messages)
+            turns: historique (id, role, message) à utiliser à la place de la base
 
         Returns:
             str: message généré
         """
         # Tentative d'utilisation d'Ollama si activé
         if self.use_ollama:
+            # Pas de texte utilisateur, ou Ollama down : réponse pré-générée si dispo
+            if not context or not self.ollama_gen.is_available:
+                response = self._take_prefetched(current_emotion, mood_state)
+                if response is not None:
+                    return response + self._pick_tip(include_tip, current_emotion)
+
+            history = self._history(session_id, turns, context)
+            budget = self.latency_budget if latency_budget is None else latency_budget
+            if budget is not None:
+                tip = self._pick_tip(include_tip, current_emotion)
+                call = self._start_llm(current_emotion, mood_state, context, tip, on_late_reply,
+                                       history)
+                parts = call.wait_all(budget)
+                if parts is not None:
+                    return "".join(parts) + tip
+                return self._placeholder(current_emotion, mood_state) + tip
+
             try:
                 response = self.ollama_gen.generate_response(
                     current_emotion, 
                     mood_state, 
-                    context
+                    context,
+                    history=history
                 )
 
                 # Ajout d'un conseil si demandé
@@ -110,12 +195,7 @@ class ResponseGenerator:
                 # Continue vers le fallback
 
         # Fallback : Logique avec réponses pré-définies
-        if mood_state == "DOWN":
-            response = random.choice(self.responses_down)
-        elif mood_state == "UP":
-            response = random.choice(self.responses_up)
-        else:
-            response = random.choice(self.responses_neutral)
+        response = self._template_response(mood_state)
 
         # Ajout d'un conseil si demandé et émotion spécifique disponible
         if include_tip and current_emotion and current_emotion in self.tips_by_emotion:
@@ -124,6 +204,211 @@ class ResponseGenerator:
 
         return response
 
+    def generate_response_stream(self, mood_state, current_emotion=None, include_tip=False,
+                                 context="", stats=None, latency_budget=None, on_late_reply=None,
+                                 session_id=None, turns=None):
+        """
+        Variante streaming de generate_response
+
+        Args:
+            mood_state, current_emotion, include_tip, context: voir generate_response
+            stats: dict optionnel rempli avec ttft (s), tokens, tokens_per_s, fallback
+            latency_budget: délai max (s) jusqu'au premier fragment
+            on_late_reply, session_id, turns: voir generate_response
+
+        Yields:
+            str: fragments de la réponse (le conseil éventuel arrive en dernier)
+        """
+        if stats is None:
+            stats = {}
+
+        tip = self._pick_tip(include_tip, current_emotion)
+        budget = self.latency_budget if latency_budget is None else latency_budget
+
+        prefetched = None
+        if self.use_ollama and (not context or not self.ollama_gen.is_available):
+            prefetched = self._take_prefetched(current_emotion, mood_state)
+
+        history = self._history(session_id, turns, context) \
+            if self.use_ollama and prefetched is None else ""
+
+        if prefetched is not None:
+            stats.update(ttft=0.0, tokens=0, tokens_per_s=0.0, fallback=False, cached=True)
+            yield prefetched
+        elif self.use_ollama and budget is not None:
+            # Génération en arrière-plan : on n'attend le 1er fragment que budget secondes
+            call = self._start_llm(current_emotion, mood_state, context, tip, on_late_reply,
+                                   history)
+            first = call.wait_first(budget)
+            if first is _TIMED_OUT:
+                # Le LLM continue : on_late_reply remplacera la réponse provisoire
+                stats.update(ttft=None, tokens=0, tokens_per_s=0.0, fallback=True,
+                             cached=False, late=True)
+                yield self._placeholder(current_emotion, mood_state)
+            elif first is None:
+                # Flux terminé sans fragment (erreur Ollama) : rien ne viendra le remplacer
+                stats.update(call.stats)
+                stats.update(ttft=None, tokens=0, tokens_per_s=0.0, fallback=True,
+                             cached=False, late=False)
+                yield self._placeholder(current_emotion, mood_state)
+            else:
+                yield first
+                yield from call.rest()
+                stats.update(call.stats)
+        elif self.use_ollama:
+            yield from self.ollama_gen.generate_stream(
+                current_emotion,
+                mood_state,
+                context,
+                stats=stats,
+                history=history
+            )
+        else:
+            stats.update(ttft=0.0, tokens=0, tokens_per_s=0.0, fallback=True, cached=False)
+            yield self._template_response(mood_state)
+
+        if tip:
+            yield tip
+
+    def prefetch(self, current_emotion, mood_state):
+        """
+        Signale l'état courant (appelé en continu par la boucle webcam, avec
+        un état déjà lissé : émotion majoritaire et humeur du détecteur).
+        Si l'état change, le pool est vidé et de nouvelles réponses sont
+        pré-générées en arrière-plan une fois l'état stable ; sinon l'appel
+        ne coûte rien.
+        """
+        if not self.use_ollama or self.prefetch_size <= 0:
+            return
+
+        state = (current_emotion, mood_state)
+        with self._prefetch_lock:
+            if state == self._prefetch_state:
+                return
+            self._prefetch_state = state
+            self._prefetch_changed_at = time.monotonic()
+            self._prefetch_generation += 1
+            self.prefetch_stats["discarded"] += len(self._prefetch_pool)
+            self._prefetch_pool.clear()
+            self._start_prefetch()
+
+    def _start_prefetch(self):
+        """Lance le remplissage du pool s'il n'est pas déjà en cours (sous verrou)"""
+        if not self._prefetch_running:
+            self._prefetch_running = True
+            self._prefetch_executor.submit(self._fill_prefetch_pool)
+
+    def _wait_stable_state(self):
+        """
+        Attend que l'état soit inchangé depuis prefetch_settle secondes, avant
+        chaque génération (les émotions fluctuent d'une frame à l'autre)
+
+        Returns:
+            ((émotion, humeur), génération), ou None si le pool est plein
+        """
+        while True:
+            with self._prefetch_lock:
+                if len(self._prefetch_pool) >= self.prefetch_size:
+                    self._prefetch_running = False
+                    return None
+                remaining = self.prefetch_settle - (time.monotonic() - self._prefetch_changed_at)
+                if remaining <= 0:
+                    return self._prefetch_state, self._prefetch_generation
+            time.sleep(remaining)
+
+    def _fill_prefetch_pool(self):
+        while True:
+            snapshot = self._wait_stable_state()
+            if snapshot is None:
+                return
+            (emotion, mood_state), generation = snapshot
+
+            stats = {}
+            try:
+                reply = "".join(self.ollama_gen.generate_stream(emotion, mood_state, "", stats=stats))
+            except Exception as e:
+                print(f"⚠️ Pré-génération impossible: {e}")
+                stats["fallback"] = True
+
+            with self._prefetch_lock:
+                if stats.get("fallback"):
+                    # Ollama indisponible : inutile d'insister
+                    self._prefetch_running = False
+                    return
+                if generation != self._prefetch_generation:
+                    # L'état a changé pendant la génération : le nouvel état
+                    # devra à son tour être stable avant la suivante
+                    self.prefetch_stats["discarded"] += 1
+                    continue
+                self._prefetch_pool.append(reply)
+                self.prefetch_stats["generated"] += 1
+
+    def _take_prefetched(self, current_emotion, mood_state):
+        """Retire une réponse pré-générée pour cet état, ou None"""
+        with self._prefetch_lock:
+            if self._prefetch_state != (current_emotion, mood_state) or not self._prefetch_pool:
+                self.prefetch_stats["missed"] += 1
+                return None
+
+            self.prefetch_stats["served"] += 1
+            reply = self._prefetch_pool.popleft()
+            # Re-remplir pour le prochain tour
+            self._start_prefetch()
+            return reply
+
+    def prefetch_report(self):
+        """Statistiques d'utilisation de la pré-génération"""
+        with self._prefetch_lock:
+            report = dict(self.prefetch_stats)
+            report["pool"] = len(self._prefetch_pool)
+        eligible = report["served"] + report["missed"]
+        report["hit_rate"] = report["served"] / eligible if eligible else 0.0
+        return report
+
+    def close(self):
+        """Arrête les threads de génération, pré-génération et résumé (idempotent)"""
+        self._finalizer()
+
+    def _pick_tip(self, include_tip, current_emotion):
+        """Conseil à ajouter en fin de réponse ("" si aucun)"""
+        if include_tip and current_emotion and current_emotion in self.tips_by_emotion:
+            return f"\n\n{random.choice(self.tips_by_emotion[current_emotion])}"
+        return ""
+
+    def _placeholder(self, current_emotion, mood_state):
+        """Réponse provisoire quand le délai est dépassé : pré-générée sinon pré-définie"""
+        prefetched = self._take_prefetched(current_emotion, mood_state)
+        return prefetched if prefetched is not None else self._template_response(mood_state)
+
+    def _history(self, session_id, turns, context):
+        """Historique borné pour le prompt ("" sans message utilisateur : accueil, pré-génération)"""
+        if not context or self.conversation.token_budget <= 0:
+            return ""
+        try:
+            return self.conversation.build(session_id, turns, current_message=context)
+        except Exception as e:
+            print(f"⚠️ Historique de conversation indisponible: {e}")
+            return ""
+
+    def _start_llm(self, current_emotion, mood_state, context, tip, on_late_reply, history=""):
+        """Lance la génération en arrière-plan (elle continue même si l'appelant abandonne)"""
+        call = _BackgroundGeneration(tip, on_late_reply)
+        self._llm_executor.submit(
+            call.run,
+            lambda s: self.ollama_gen.generate_stream(current_emotion, mood_state, context,
+                                                      stats=s, history=history)
+        )
+        return call
+
+    def _template_response(self, mood_state):
+        """Réponse pré-définie selon l'humeur"""
+        if mood_state == "DOWN":
+            return random.choice(self.responses_down)
+        elif mood_state == "UP":
+            return random.choice(self.responses_up)
+        else:
+            return random.choice(self.responses_neutral)
+
     def get_followup(self, mood_state):
         """Génère une phrase de suivi"""
         if mood_state == "DOWN":
@@ -135,17 +420,104 @@ class ResponseGenerator:
 
     def get_notification_message(self, mood_state, duration_minutes):
         """
-        Génère un message de notification basé sur la durée
-        d'un état émotionnel
+        Texte d'une notification pour un état émotionnel qui dure (mise en
+        forme seulement : les seuils sont ceux des règles du NotificationEngine)
         """
-        if mood_state == "DOWN" and duration_minutes > 5:
+        if mood_state == "DOWN":
             return (
                 f"⚠️ Tu sembles avoir le moral bas depuis {duration_minutes} minutes. "
                 "Pense à faire une pause, prendre l'air, ou parler à quelqu'un de confiance."
             )
-        elif mood_state == "UP" and duration_minutes > 10:
+        elif mood_state == "UP":
             return (
                 f"🎉 Tu es dans un super état d'esprit depuis {duration_minutes} minutes ! "
                 "Continue à profiter de ce moment positif !"
             )
         return None
+
+
+# Retour de _BackgroundGeneration.wait_first quand le délai est dépassé
+# (distinct de None : fin de flux sans fragment)
+_TIMED_OUT = object()
+
+
+class _BackgroundGeneration:
+    """
+    Génération LLM consommée avec un délai : les fragments passent par une
+    file ; si l'appelant abandonne (délai dépassé), la réponse complète est
+    transmise à on_late_reply à la fin de la génération.
+    """
+
+    def __init__(self, tip, on_late_reply):
+        self.tip = tip
+        self.on_late_reply = on_late_reply
+        self.stats = {}
+        self.chunks = queue.Queue()
+        self._lock = threading.Lock()
+        self._finished = False
+        self._abandoned = False
+
+    def run(self, stream_factory):
+        parts = []
+        try:
+            for chunk in stream_factory(self.stats):
+                parts.append(chunk)
+                self.chunks.put(chunk)
+        except Exception as e:
+            print(f"⚠️ Erreur Ollama: {e}")
+            self.stats["fallback"] = True
+        finally:
+            self.chunks.put(None)
+            with self._lock:
+                self._finished = True
+                late = self._abandoned
+
+        if late and self.on_late_reply and not self.stats.get("fallback"):
+            try:
+                self.on_late_reply("".join(parts) + self.tip)
+            except Exception as e:
+                print(f"⚠️ Erreur callback réponse tardive: {e}")
+
+    def _abandon(self):
+        """Abandon au délai, sauf si la génération vient de se terminer"""
+        with self._lock:
+            if self._finished:
+                return False
+            self._abandoned = True
+            return True
+
+    def wait_first(self, timeout):
+        """
+        Premier fragment dans le délai ; _TIMED_OUT si le délai est dépassé
+        (abandon), None si le flux s'est terminé sans fragment
+        """
+        try:
+            chunk = self.chunks.get(timeout=timeout)
+        except queue.Empty:
+            if self._abandon():
+                return _TIMED_OUT
+            chunk = self.chunks.get()
+        return chunk
+
+    def rest(self):
+        """Fragments suivants jusqu'à la fin de la génération"""
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    def wait_all(self, timeout):
+        """Liste complète des fragments dans le délai, sinon None (abandon)"""
+        deadline = time.monotonic() + timeout
+        parts = []
+        while True:
+            try:
+                chunk = self.chunks.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                if self._abandon():
+                    return None
+                continue
+            if chunk is None:
+                return parts
+            parts.append(chunk)
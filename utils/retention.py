@@ -0,0 +1,309 @@
+"""
+Rétention de l'historique : fenêtre "chaude" dans SQLite, archivage
+des lignes anciennes en Parquet partitionné par jour, compaction
+"""
+
+import glob
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (moteur Parquet de pandas)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+    print("⚠️ pyarrow non installé, archivage Parquet désactivé")
+
+from .database import CONFIDENCE_SCALE
+
+# Lignes archivées autonomes (libellés + user_id) : (alias, SELECT ... FROM ...)
+# LEFT JOIN : une ligne orpheline (session ou code inconnu) est archivée avec
+# des NULL plutôt qu'écartée de l'export puis supprimée
+ARCHIVE_SELECTS = {
+    "emotions_log": ("e", f"""
+        SELECT e.id, s.user_id, e.session_id, e.timestamp,
+               el.label AS emotion,
+               e.confidence_q / {float(CONFIDENCE_SCALE)} AS confidence,
+               ms.label AS mood_state
+        FROM emotions_log e
+        LEFT JOIN sessions s ON e.session_id = s.id
+        LEFT JOIN emotion_labels el ON el.code = e.emotion_code
+        LEFT JOIN mood_states ms ON ms.code = e.mood_code
+    """),
+    "messages": ("m", """
+        SELECT m.id, s.user_id, m.session_id, m.timestamp,
+               m.role, m.message, m.emotion_context
+        FROM messages m
+        LEFT JOIN sessions s ON m.session_id = s.id
+    """),
+}
+
+# Colonnes renvoyées par les requêtes unifiées (chaud + archive)
+TABLE_COLUMNS = {
+    "emotions_log": ["id", "user_id", "session_id", "timestamp",
+                     "emotion", "confidence", "mood_state"],
+    "messages": ["id", "user_id", "session_id", "timestamp",
+                 "role", "message", "emotion_context"],
+}
+
+
+class RetentionManager:
+    def __init__(self, db, archive_dir="database/archive", hot_days=30,
+                 batch_size=5000, vacuum_pages=500, compression="zstd"):
+        """
+        Args:
+            db: instance de Database
+            archive_dir: dossier racine des fichiers Parquet
+            hot_days: nombre de jours conservés dans SQLite
+            batch_size: lignes exportées/supprimées par transaction
+            vacuum_pages: pages libérées par passe d'incremental_vacuum
+            compression: codec Parquet (zstd, snappy, gzip...)
+        """
+        self.db = db
+        self.archive_dir = archive_dir
+        self.hot_days = hot_days
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.compression = compression
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------
+    # Archivage
+    # ------------------------------------------------------------
+
+    def cutoff(self, now=None):
+        """Limite de la fenêtre chaude (format des timestamps SQLite, UTC)"""
+        now = now or datetime.now(timezone.utc)
+        return (now - timedelta(days=self.hot_days)).strftime("%Y-%m-%d %H:%M:%S")
+
+    def run_once(self, now=None):
+        """
+        Archive puis supprime les lignes hors fenêtre chaude, puis compacte
+
+        Returns:
+            dict: nombre de lignes archivées par table
+        """
+        if not PARQUET_AVAILABLE:
+            print("⚠️ Archivage ignoré (pyarrow manquant)")
+            return {}
+
+        # Une seule passe à la fois (thread de fond + appel manuel)
+        with self._lock:
+            cutoff = self.cutoff(now)
+            archived = {table: self._archive_table(table, cutoff) for table in ARCHIVE_SELECTS}
+            if any(archived.values()):
+                self.compact()
+            return archived
+
+    def _archive_table(self, table, cutoff):
+        """Exporte puis supprime une table par lots, sans long verrou d'écriture"""
+        alias, select = ARCHIVE_SELECTS[table]
+        query = (f"{select} WHERE {alias}.id > ? AND {alias}.timestamp < ? "
+                 f"ORDER BY {alias}.id LIMIT ?")
+        total = 0
+        last_id = 0
+
+        while not self._stop_event.is_set():
+            conn = self._connect()
+            try:
+                df = pd.read_sql_query(query, conn,
+                                       params=(last_id, cutoff, self.batch_size))
+                if df.empty:
+                    break
+
+                # Export d'abord : une suppression n'a lieu qu'une fois le fichier écrit
+                self._write_partitions(table, df)
+
+                # Exactement les lignes écrites dans le fichier, rien d'autre
+                ids = [(int(i),) for i in df["id"]]
+                with conn:
+                    conn.executemany(f"DELETE FROM {table} WHERE id = ?", ids)
+                max_id = ids[-1][0]
+            finally:
+                conn.close()
+
+            total += len(df)
+            last_id = max_id
+
+        if total:
+            print(f"📦 {table}: {total} lignes archivées")
+        return total
+
+    def _write_partitions(self, table, df):
+        """Écrit un fichier Parquet par jour : <table>/date=YYYY-MM-DD/part-<min>-<max>.parquet"""
+        days = df["timestamp"].str.slice(0, 10)
+
+        for day, part in df.groupby(days):
+            part_dir = os.path.join(self.archive_dir, table, f"date={day}")
+            os.makedirs(part_dir, exist_ok=True)
+
+            name = f"part-{int(part['id'].min()):012d}-{int(part['id'].max()):012d}.parquet"
+            path = os.path.join(part_dir, name)
+
+            # Écriture atomique : un lecteur ne voit jamais de fichier partiel
+            tmp_path = path + ".tmp"
+            part.to_parquet(tmp_path, index=False, compression=self.compression)
+            os.replace(tmp_path, path)
+
+    def compact(self, full=False):
+        """
+        Libère l'espace des lignes supprimées
+
+        Args:
+            full: VACUUM complet (bloque les écritures, à réserver à la maintenance)
+        """
+        conn = self._connect()
+        try:
+            if full:
+                # Active aussi le mode incrémental pour les passes suivantes
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                return
+
+            auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if auto_vacuum != 2:
+                print("ℹ️ auto_vacuum non incrémental, lancer compact(full=True) une fois")
+                return
+
+            # Petites passes pour laisser la main aux écrivains entre deux
+            while not self._stop_event.is_set():
+                freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if freelist == 0:
+                    break
+                # fetchall() : le pragma libère une page par étape du curseur
+                conn.execute(f"PRAGMA incremental_vacuum({self.vacuum_pages})").fetchall()
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db.db_path, timeout=30)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        return conn
+
+    # ------------------------------------------------------------
+    # Tâche de fond
+    # ------------------------------------------------------------
+
+    def start(self, interval_seconds=3600):
+        """Lance l'archivage périodique dans un thread démon"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+
+        def loop():
+            while not self._stop_event.is_set():
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"❌ Erreur rétention: {e}")
+                self._stop_event.wait(interval_seconds)
+
+        self._thread = threading.Thread(target=loop, name="retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Arrête la tâche de fond (la passe en cours s'interrompt entre deux lots)"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ------------------------------------------------------------
+    # Lecture unifiée (archive + SQLite)
+    # ------------------------------------------------------------
+
+    def query_emotions(self, user_id=None, session_id=None, start=None, end=None):
+        """Émotions d'un utilisateur/session sur [start, end), archive comprise"""
+        return self._query("emotions_log", user_id, session_id, start, end)
+
+    def query_messages(self, user_id=None, session_id=None, start=None, end=None):
+        """Messages d'un utilisateur/session sur [start, end), archive comprise"""
+        return self._query("messages", user_id, session_id, start, end)
+
+    def _query(self, table, user_id, session_id, start, end):
+        start = _to_timestamp(start)
+        end = _to_timestamp(end)
+
+        frames = [self._read_archive(table, user_id, session_id, start, end),
+                  self._read_hot(table, user_id, session_id, start, end)]
+        frames = [f for f in frames if not f.empty]
+
+        if not frames:
+            return pd.DataFrame(columns=TABLE_COLUMNS[table])
+
+        df = pd.concat(frames, ignore_index=True)
+        # Une ligne peut exister des deux côtés si une passe a été interrompue
+        df = df.drop_duplicates(subset="id", keep="last")
+        return df.sort_values(["timestamp", "id"]).reset_index(drop=True)
+
+    def _read_hot(self, table, user_id, session_id, start, end):
+        alias, select = ARCHIVE_SELECTS[table]
+        conditions = []
+        params = []
+
+        for column, op, value in (("s.user_id", "=", user_id),
+                                  (f"{alias}.session_id", "=", session_id),
+                                  (f"{alias}.timestamp", ">=", start),
+                                  (f"{alias}.timestamp", "<", end)):
+            if value is not None:
+                conditions.append(f"{column} {op} ?")
+                params.append(value)
+
+        query = select
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+
+    def _read_archive(self, table, user_id, session_id, start, end):
+        if not PARQUET_AVAILABLE:
+            return pd.DataFrame(columns=TABLE_COLUMNS[table])
+
+        # Élagage des partitions par nom de dossier
+        start_day = start[:10] if start else None
+        end_day = end[:10] if end else None
+        files = []
+        for part_dir in sorted(glob.glob(os.path.join(self.archive_dir, table, "date=*"))):
+            day = os.path.basename(part_dir)[len("date="):]
+            if (start_day and day < start_day) or (end_day and day > end_day):
+                continue
+            files.extend(sorted(glob.glob(os.path.join(part_dir, "*.parquet"))))
+
+        filters = []
+        if user_id is not None:
+            filters.append(("user_id", "=", user_id))
+        if session_id is not None:
+            filters.append(("session_id", "=", session_id))
+
+        frames = []
+        for path in files:
+            df = pd.read_parquet(path, filters=filters or None)
+            if start:
+                df = df[df["timestamp"] >= start]
+            if end:
+                df = df[df["timestamp"] < end]
+            if not df.empty:
+                frames.append(df)
+
+        if not frames:
+            return pd.DataFrame(columns=TABLE_COLUMNS[table])
+        return pd.concat(frames, ignore_index=True)
+
+
+def _to_timestamp(value):
+    """datetime/str -> format texte des timestamps SQLite"""
+    if value is None or isinstance(value, str):
+        return value
+    return value.strftime("%Y-%m-%d %H:%M:%S")
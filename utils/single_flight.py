@@ -0,0 +1,73 @@
+"""
+Regroupement (single-flight) des appels identiques simultanés :
+un seul appel réel par clé, tous les appelants reçoivent son résultat
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+        self.calls = 0
+        self.deduplicated = 0
+
+    def begin(self, key):
+        """
+        Rejoint ou démarre l'appel pour cette clé
+
+        Returns:
+            (bool, Future): (True, future) si l'appelant doit exécuter l'appel
+            puis appeler end() ; (False, future) s'il doit attendre future
+        """
+        with self._lock:
+            self.calls += 1
+            future = self._flights.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                return False, future
+
+            future = Future()
+            self._flights[key] = future
+            return True, future
+
+    def end(self, key, result=None, error=None):
+        """Publie le résultat (ou l'erreur) du meneur et libère la clé"""
+        with self._lock:
+            future = self._flights.pop(key, None)
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        """Exécute fn() une seule fois pour tous les appelants simultanés de key"""
+        leader, future = self.begin(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.end(key, error=e)
+            raise
+        self.end(key, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executed": self.calls - self.deduplicated,
+                "deduplicated": self.deduplicated,
+                "in_flight": len(self._flights),
+            }
+
+
+# Instance partagée par défaut : regroupe les appels de toutes les sessions du processus
+DEFAULT_SINGLE_FLIGHT = SingleFlight()
@@ -0,0 +1,238 @@
+"""
+Recherche d'hyperparamètres en parallèle : un essai par processus, threads
+TensorFlow bornés par processus, dataset partagé en lecture seule (memmap),
+arrêt anticipé des essais et tableau de résultats comparable
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+
+from .fer_dataset import load_splits
+
+# Grille par défaut (produit cartésien : 24 essais)
+DEFAULT_SPACE = {
+    "batch_size": [64, 128],
+    "learning_rate": [0.001, 0.0005],
+    "lr_schedule": ["plateau", "cosine", "constant"],
+    "dense_dropout": [0.3, 0.5],
+}
+
+# Valeurs des hyperparamètres absents de la grille (= train_model.py)
+BASE_CONFIG = {
+    "batch_size": 64,
+    "learning_rate": 0.001,
+    "lr_schedule": "plateau",
+    "conv_dropout": 0.25,
+    "dense_dropout": 0.5,
+}
+
+RESULT_COLUMNS = ("trial_id", "val_accuracy", "val_loss", "epochs", "early_stopped",
+                  "duration_s", "batch_size", "learning_rate", "lr_schedule",
+                  "conv_dropout", "dense_dropout", "max_epochs", "patience", "seed", "smoke_size")
+
+
+def run_setup(epochs, patience, seed, smoke_size=None):
+    """Conditions d'un balayage (des résultats obtenus sous d'autres ne sont pas comparables)"""
+    return {"max_epochs": epochs, "patience": patience, "seed": seed, "smoke_size": smoke_size}
+
+
+def trial_id(config, setup=None):
+    """
+    Identifiant stable d'un essai (reprise d'un balayage interrompu) : la
+    configuration et les conditions du balayage (un essai --smoke n'est pas
+    repris par un balayage complet)
+    """
+    payload = json.dumps({"config": config, "setup": setup}, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:10]
+
+
+def grid(space=None):
+    """Toutes les combinaisons de la grille, complétées par BASE_CONFIG"""
+    space = space or DEFAULT_SPACE
+    keys = sorted(space)
+    return [{**BASE_CONFIG, **dict(zip(keys, values))}
+            for values in itertools.product(*(space[k] for k in keys))]
+
+
+def sample(space=None, trials=10, seed=42):
+    """Tirage aléatoire sans remise de `trials` combinaisons de la grille"""
+    configs = grid(space)
+    return random.Random(seed).sample(configs, min(trials, len(configs)))
+
+
+def _init_worker(threads):
+    """
+    Avant le premier import de TensorFlow dans le processus : les pools
+    intra/inter-op sont dimensionnés à l'initialisation et ne changent plus
+    """
+    for var in ("OMP_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def run_trial(config, csv_path, cache_dir, epochs, patience, threads, seed, smoke_size=None):
+    """
+    Entraîne une configuration dans le processus courant (worker)
+
+    Returns:
+        dict: ligne de résultats (meilleure val_accuracy, époques, arrêt anticipé...)
+    """
+    import math
+
+    import tensorflow as tf
+    from tensorflow.keras.callbacks import EarlyStopping, LearningRateScheduler, ReduceLROnPlateau
+
+    from .fer_dataset import EMOTION_MAP
+    from .fer_pipeline import make_train_dataset, make_eval_dataset
+    from .training import build_model
+
+    start = time.perf_counter()
+    tf.keras.utils.set_random_seed(seed)
+    splits = load_splits(csv_path, cache_dir, seed=seed, smoke_size=smoke_size)
+    images, labels = splits["images"], splits["labels"]
+    num_classes = len(EMOTION_MAP)
+
+    # Le tf.data de chaque worker reste dans son budget de threads
+    options = tf.data.Options()
+    options.threading.private_threadpool_size = threads
+    options.threading.max_intra_op_parallelism = 1
+
+    train_ds = make_train_dataset(images, labels, batch_size=config["batch_size"],
+                                  num_classes=num_classes, seed=seed,
+                                  indices=splits["train"]).with_options(options)
+    val_ds = make_eval_dataset(images, labels, num_classes=num_classes,
+                               indices=splits["val"]).with_options(options)
+
+    model = build_model(num_classes, learning_rate=config["learning_rate"],
+                        conv_dropout=config["conv_dropout"],
+                        dense_dropout=config["dense_dropout"])
+
+    early_stop = EarlyStopping(monitor="val_accuracy", mode="max", patience=patience,
+                               restore_best_weights=True)
+    callbacks = [early_stop]
+    if config["lr_schedule"] == "plateau":
+        callbacks.append(ReduceLROnPlateau(monitor="val_loss", factor=0.5,
+                                           patience=max(patience // 3, 1), min_lr=0.00001))
+    elif config["lr_schedule"] == "cosine":
+        base = config["learning_rate"]
+        callbacks.append(LearningRateScheduler(
+            lambda epoch: base * 0.5 * (1 + math.cos(math.pi * epoch / epochs))))
+
+    history = model.fit(train_ds, validation_data=val_ds, epochs=epochs,
+                        callbacks=callbacks, verbose=0).history
+
+    best = max(range(len(history["val_accuracy"])), key=history["val_accuracy"].__getitem__)
+    result = {
+        "trial_id": trial_id(config, run_setup(epochs, patience, seed, smoke_size)),
+        "val_accuracy": float(history["val_accuracy"][best]),
+        "val_loss": float(history["val_loss"][best]),
+        "epochs": len(history["val_accuracy"]),
+        "early_stopped": early_stop.stopped_epoch > 0,
+        "duration_s": round(time.perf_counter() - start, 1),
+        "pid": os.getpid(),
+        **config,
+        **run_setup(epochs, patience, seed, smoke_size),
+    }
+    tf.keras.backend.clear_session()
+    return result
+
+
+def load_results(results_path):
+    """Résultats déjà enregistrés (un JSON par ligne), par trial_id"""
+    if not os.path.exists(results_path):
+        return {}
+    results = {}
+    with open(results_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                results[row["trial_id"]] = row
+    return results
+
+
+def write_table(results, csv_path):
+    """Tableau trié par val_accuracy décroissante (CSV)"""
+    import pandas as pd
+
+    table = pd.DataFrame(results)
+    columns = [c for c in RESULT_COLUMNS if c in table.columns]
+    table = table[columns].sort_values("val_accuracy", ascending=False).reset_index(drop=True)
+    table.to_csv(csv_path, index=False)
+    return table
+
+
+def run_sweep(configs, csv_path="data/fer2013.csv", cache_dir="data/cache",
+              output_dir="models/sweep", workers=None, threads_per_worker=None, epochs=30,
+              patience=5, seed=42, smoke_size=None, on_result=None):
+    """
+    Lance les essais dans `workers` processus de `threads_per_worker` threads
+
+    Les essais déjà présents dans output_dir/results.jsonl avec les mêmes
+    epochs / patience / seed / smoke_size sont ignorés (reprise). Le cache
+    .npy et les découpages sont construits ici, une fois, puis chaque
+    worker les relit en memmap (pages partagées par le noyau).
+
+    Args:
+        workers: processus parallèles (défaut: cœurs / threads_per_worker)
+        threads_per_worker: threads TensorFlow par processus (défaut: 2)
+        patience: époques sans progrès de val_accuracy avant arrêt anticipé
+        on_result: callback(result) appelé à chaque essai terminé
+
+    Returns:
+        pandas.DataFrame: résultats obtenus dans ces conditions, meilleure configuration en tête
+    """
+    cpus = os.cpu_count() or 1
+    threads_per_worker = threads_per_worker or min(2, cpus)
+    workers = workers or max(1, cpus // threads_per_worker)
+
+    os.makedirs(output_dir, exist_ok=True)
+    results_path = os.path.join(output_dir, "results.jsonl")
+    setup = run_setup(epochs, patience, seed, smoke_size)
+    # Seuls les résultats obtenus dans les mêmes conditions sont repris et comparés
+    done = {tid: row for tid, row in load_results(results_path).items()
+            if all(row.get(k) == v for k, v in setup.items())}
+    pending = [c for c in configs if trial_id(c, setup) not in done]
+
+    print(f"🔬 {len(configs)} configurations, {len(configs) - len(pending)} déjà faites, "
+          f"{workers} workers x {threads_per_worker} threads")
+
+    # Avant le fork : les workers ne doivent pas construire le cache en concurrence
+    load_splits(csv_path, cache_dir, seed=seed, smoke_size=smoke_size)
+
+    # spawn : aucun état TensorFlow hérité du parent
+    context = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+        futures = {
+            pool.submit(run_trial, config, csv_path, cache_dir, epochs, patience,
+                        threads_per_worker, seed, smoke_size): config
+            for config in pending
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Essai {trial_id(futures[future], setup)} échoué: {e}")
+                continue
+
+            # Écrit au fil de l'eau : un balayage interrompu reprend où il s'est arrêté
+            with open(results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result) + "\n")
+            done[result["trial_id"]] = result
+            if on_result:
+                on_result(result)
+
+    if not done:
+        return None
+    return write_table(list(done.values()), os.path.join(output_dir, "results.csv"))
@@ -0,0 +1,95 @@
+"""
+Modèle TFLite avec la même interface predict() qu'un modèle Keras
+(variantes float16 / int8 produites par utils/model_optimization.py)
+"""
+
+import threading
+
+import numpy as np
+import tensorflow as tf
+
+
+class TFLiteModel:
+    def __init__(self, model_path, num_threads=None):
+        """
+        Args:
+            model_path: fichier .tflite
+            num_threads: threads de l'interpréteur (None = défaut TFLite)
+        """
+        self.model_path = model_path
+        # Un interpréteur n'est pas thread-safe (tenseurs d'entrée / sortie partagés) :
+        # un appel à la fois, le modèle peut être partagé entre threads ou sessions
+        self._lock = threading.Lock()
+        self._load(num_threads)
+
+    def _load(self, num_threads):
+        self.num_threads = num_threads
+        self.interpreter = tf.lite.Interpreter(model_path=self.model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = int(self._input["shape"][0])
+
+    def set_num_threads(self, num_threads):
+        """
+        Change le nombre de threads de l'interpréteur (fixé à sa création :
+        il est recréé, seulement si la valeur change)
+        """
+        with self._lock:
+            if num_threads != self.num_threads:
+                self._load(num_threads)
+
+    @property
+    def input_dtype(self):
+        return self._input["dtype"]
+
+    def _resize(self, batch):
+        """Redimensionne l'entrée si la taille de lot change (coûteux : évité si inchangée)"""
+        if batch == self._batch:
+            return
+        shape = list(self._input["shape"])
+        shape[0] = batch
+        self.interpreter.resize_tensor_input(self._input["index"], shape)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = batch
+
+    def predict(self, x, verbose=0, batch_size=None):
+        """
+        Args:
+            x: float32 (N, 48, 48, 1) normalisé [0, 1], comme pour le modèle Keras
+            batch_size: taille des lots passés à l'interpréteur (None = N)
+
+        Returns:
+            np.ndarray: probabilités float32 (N, num_classes)
+        """
+        x = np.asarray(x, dtype=np.float32)
+        batch_size = batch_size or len(x)
+        with self._lock:
+            return self._predict(x, batch_size)
+
+    def _predict(self, x, batch_size):
+        outputs = []
+        for start in range(0, len(x), batch_size):
+            chunk = x[start:start + batch_size]
+            self._resize(len(chunk))
+
+            # Modèle entièrement entier : quantifier l'entrée avec ses paramètres
+            if self._input["dtype"] in (np.int8, np.uint8):
+                scale, zero_point = self._input["quantization"]
+                info = np.iinfo(self._input["dtype"])
+                chunk = np.clip(np.round(chunk / scale + zero_point), info.min, info.max)
+                chunk = chunk.astype(self._input["dtype"])
+
+            self.interpreter.set_tensor(self._input["index"], chunk)
+            self.interpreter.invoke()
+            out = self.interpreter.get_tensor(self._output["index"])
+
+            if self._output["dtype"] in (np.int8, np.uint8):
+                scale, zero_point = self._output["quantization"]
+                out = (out.astype(np.float32) - zero_point) * scale
+            outputs.append(out.astype(np.float32, copy=False))
+
+        return np.concatenate(outputs, axis=0)
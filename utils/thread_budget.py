@@ -0,0 +1,170 @@
+"""
+Budget de threads partagé entre détecteurs : répartit les cœurs entre les
+flux actifs (threads TensorFlow / TFLite et OpenCV, affinité CPU optionnelle)
+pour éviter la sur-souscription quand plusieurs caméras ou sessions tournent
+sur la même machine
+"""
+
+import os
+import threading
+
+
+def available_cpus():
+    """Cœurs utilisables par ce processus (respecte taskset / cgroups cpuset)"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class ThreadAllocation:
+    """Part du budget d'un flux ; generation change à chaque rééquilibrage"""
+
+    __slots__ = ("threads", "opencv_threads", "cpus", "generation")
+
+    def __init__(self, threads, opencv_threads, cpus, generation):
+        self.threads = threads
+        self.opencv_threads = opencv_threads
+        self.cpus = cpus
+        self.generation = generation
+
+    def as_dict(self):
+        return {"threads": self.threads, "opencv_threads": self.opencv_threads,
+                "cpus": self.cpus, "generation": self.generation}
+
+
+class ThreadBudget:
+    def __init__(self, cpus=None, reserve=0, pin=False, configure_tensorflow=True):
+        """
+        Args:
+            cpus: cœurs à partager (défaut: ceux autorisés pour ce processus)
+            reserve: cœurs laissés libres (UI Streamlit, LLM, base de données)
+            pin: fixer l'affinité CPU du thread de chaque flux sur sa tranche
+                (Linux uniquement, ignoré ailleurs)
+            configure_tensorflow: dimensionner les pools TensorFlow du processus
+                au premier flux (avant toute opération TensorFlow)
+        """
+        cpus = list(cpus) if cpus is not None else available_cpus()
+        self.cpus = cpus[:max(1, len(cpus) - reserve)]
+        self.pin = pin and hasattr(os, "sched_setaffinity")
+        self.configure_tensorflow = configure_tensorflow
+
+        self._lock = threading.Lock()
+        self._streams = []          # jetons actifs, dans l'ordre d'arrivée
+        self._next_token = 0
+        self._generation = 0
+        self._allocations = {}
+        self._applied = threading.local()
+        self._tensorflow_configured = False
+
+    @property
+    def streams(self):
+        return len(self._streams)
+
+    def _rebalance(self):
+        """Parts égales de cœurs contigus ; le reste va aux premiers flux"""
+        self._generation += 1
+        count = max(len(self._streams), 1)
+        share, extra = divmod(len(self.cpus), count)
+        allocations, start = {}, 0
+
+        for i, token in enumerate(self._streams):
+            size = max(1, share + (1 if i < extra else 0))
+            # Plus de flux que de cœurs : les tranches se chevauchent en tourniquet
+            cpus = [self.cpus[(start + j) % len(self.cpus)] for j in range(size)]
+            start += size
+            allocations[token] = ThreadAllocation(
+                threads=size,
+                # OpenCV (conversion, cascade, redimensionnement) : réglage global au processus
+                opencv_threads=max(1, len(self.cpus) // count),
+                cpus=cpus,
+                generation=self._generation,
+            )
+        self._allocations = allocations
+
+    def acquire(self):
+        """
+        Enregistre un flux et rééquilibre les parts
+
+        Returns:
+            int: jeton à passer à allocation() / apply() / release()
+        """
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._streams.append(token)
+            self._rebalance()
+            first = not self._tensorflow_configured
+            self._tensorflow_configured = True
+
+        if first and self.configure_tensorflow:
+            self._configure_tensorflow()
+        return token
+
+    def release(self, token):
+        with self._lock:
+            if token in self._streams:
+                self._streams.remove(token)
+                self._allocations.pop(token, None)
+                self._rebalance()
+
+    def allocation(self, token):
+        return self._allocations.get(token)
+
+    def _configure_tensorflow(self):
+        """
+        Pools intra/inter-op TensorFlow : globaux au processus et figés dès la
+        première opération. Un pool intra-op de la taille du budget est
+        partagé par les flux, un seul thread inter-op (modèles séquentiels).
+        """
+        try:
+            import tensorflow as tf
+        except ImportError:
+            return
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(len(self.cpus))
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+        except RuntimeError:
+            print("⚠️ TensorFlow déjà initialisé : pools de threads inchangés "
+                  "(créer le ThreadBudget avant de charger un modèle)")
+
+    def apply(self, token):
+        """
+        Applique la part du flux dans le thread appelant (à chaque frame :
+        ne fait rien tant que la répartition n'a pas changé)
+        """
+        allocation = self._allocations.get(token)
+        if allocation is None:
+            return None
+        key = (token, allocation.generation)
+        if getattr(self._applied, "key", None) == key:
+            return allocation
+        self._applied.key = key
+
+        try:
+            import cv2
+            cv2.setNumThreads(allocation.opencv_threads)
+        except ImportError:
+            pass
+        if self.pin:
+            try:
+                # pid 0 = thread appelant sous Linux
+                os.sched_setaffinity(0, allocation.cpus)
+            except OSError as e:
+                print(f"⚠️ Affinité CPU impossible: {e}")
+        return allocation
+
+    def summary(self):
+        with self._lock:
+            return {
+                "cpus": len(self.cpus),
+                "streams": len(self._streams),
+                "pin": self.pin,
+                "allocations": {token: a.as_dict() for token, a in self._allocations.items()},
+            }
+
+
+# Budget partagé par tous les détecteurs du processus (EmotionDetector(thread_budget=True))
+DEFAULT_THREAD_BUDGET = ThreadBudget(
+    reserve=int(os.environ.get("EMOTION_RESERVED_CPUS", "0")),
+    pin=os.environ.get("EMOTION_PIN_CPUS", "") == "1",
+)
@@ -0,0 +1,448 @@
+"""
+Entraînement du modèle d'émotions : importable, reprise sur checkpoint,
+mode "smoke" rapide sur un sous-ensemble, distillation vers un élève compact
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import (Conv2D, MaxPooling2D, Dropout, Flatten, Dense, BatchNormalization,
+                                     SeparableConv2D, Activation, GlobalAveragePooling2D)
+from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.callbacks import Callback, ModelCheckpoint, EarlyStopping, ReduceLROnPlateau
+
+from .fer_dataset import EMOTION_MAP, SMOKE_SIZE, load_splits
+from .fer_pipeline import make_train_dataset, make_eval_dataset
+
+def build_model(num_classes=7, input_shape=(48, 48, 1), learning_rate=0.001,
+                conv_dropout=0.25, dense_dropout=0.5):
+    """CNN 4 blocs (architecture de référence du projet), compilé"""
+    model = Sequential([
+        # Bloc 1
+        Conv2D(32, (3,3), activation='relu', padding='same', input_shape=input_shape),
+        BatchNormalization(),
+        Conv2D(32, (3,3), activation='relu', padding='same'),
+        BatchNormalization(),
+        MaxPooling2D(pool_size=(2,2)),
+        Dropout(conv_dropout),
+
+        # Bloc 2
+        Conv2D(64, (3,3), activation='relu', padding='same'),
+        BatchNormalization(),
+        Conv2D(64, (3,3), activation='relu', padding='same'),
+        BatchNormalization(),
+        MaxPooling2D(pool_size=(2,2)),
+        Dropout(conv_dropout),
+
+        # Bloc 3
+        Conv2D(128, (3,3), activation='relu', padding='same'),
+        BatchNormalization(),
+        Conv2D(128, (3,3), activation='relu', padding='same'),
+        BatchNormalization(),
+        MaxPooling2D(pool_size=(2,2)),
+        Dropout(conv_dropout),
+
+        # Bloc 4
+        Conv2D(256, (3,3), activation='relu', padding='same'),
+        BatchNormalization(),
+        MaxPooling2D(pool_size=(2,2)),
+        Dropout(conv_dropout),
+
+        # Couches denses
+        Flatten(),
+        Dense(512, activation='relu'),
+        BatchNormalization(),
+        Dropout(dense_dropout),
+        Dense(256, activation='relu'),
+        BatchNormalization(),
+        Dropout(dense_dropout),
+        Dense(num_classes, activation='softmax')
+    ])
+
+    model.compile(
+        loss='categorical_crossentropy',
+        optimizer=Adam(learning_rate=learning_rate),
+        metrics=['accuracy']
+    )
+    return model
+
+
+def build_student(num_classes=7, input_shape=(48, 48, 1), width=32, learning_rate=0.002):
+    """
+    CNN compact à convolutions séparables en profondeur, pour le temps réel CPU
+
+    La couche "logits" précède le softmax : la distillation s'entraîne sur les
+    logits, le modèle sauvegardé sort des probabilités comme le modèle de référence.
+    """
+    model = Sequential([
+        Conv2D(width, (3,3), padding='same', use_bias=False, input_shape=input_shape),
+        BatchNormalization(),
+        Activation('relu'),
+
+        # Blocs séparables : largeur x2 à chaque réduction spatiale
+        SeparableConv2D(width * 2, (3,3), padding='same', use_bias=False),
+        BatchNormalization(),
+        Activation('relu'),
+        MaxPooling2D(pool_size=(2,2)),
+
+        SeparableConv2D(width * 4, (3,3), padding='same', use_bias=False),
+        BatchNormalization(),
+        Activation('relu'),
+        SeparableConv2D(width * 4, (3,3), padding='same', use_bias=False),
+        BatchNormalization(),
+        Activation('relu'),
+        MaxPooling2D(pool_size=(2,2)),
+
+        SeparableConv2D(width * 8, (3,3), padding='same', use_bias=False),
+        BatchNormalization(),
+        Activation('relu'),
+        SeparableConv2D(width * 8, (3,3), padding='same', use_bias=False),
+        BatchNormalization(),
+        Activation('relu'),
+        MaxPooling2D(pool_size=(2,2)),
+
+        GlobalAveragePooling2D(),
+        Dropout(0.3),
+        Dense(num_classes, name='logits'),
+        Activation('softmax')
+    ])
+
+    model.compile(
+        loss='categorical_crossentropy',
+        optimizer=Adam(learning_rate=learning_rate),
+        metrics=['accuracy']
+    )
+    return model
+
+
+class Distiller(tf.keras.Model):
+    """
+    Entraîne un élève sur un mélange de la vérité terrain et des probabilités
+    adoucies (température T) du professeur :
+        loss = alpha * CE(y, élève) + (1 - alpha) * T² * KL(prof_T || élève_T)
+    """
+
+    def __init__(self, student, teacher, temperature=4.0, alpha=0.1):
+        super().__init__()
+        self.student = student
+        self.student_logits = tf.keras.Model(student.inputs, student.get_layer('logits').output)
+        self.teacher = teacher
+        self.teacher.trainable = False
+        self.temperature = temperature
+        self.alpha = alpha
+        self.loss_tracker = tf.keras.metrics.Mean(name='loss')
+        self.accuracy = tf.keras.metrics.CategoricalAccuracy(name='accuracy')
+
+    @property
+    def metrics(self):
+        return [self.loss_tracker, self.accuracy]
+
+    def _loss(self, y, logits, teacher_probs):
+        hard = tf.keras.losses.categorical_crossentropy(y, logits, from_logits=True)
+        # log(p) = logits à une constante près : softmax(log(p) / T) adoucit le professeur
+        soft_teacher = tf.nn.softmax(tf.math.log(teacher_probs + 1e-7) / self.temperature)
+        soft_student = tf.nn.log_softmax(logits / self.temperature)
+        soft = -tf.reduce_sum(soft_teacher * soft_student, axis=-1) * self.temperature ** 2
+        return tf.reduce_mean(self.alpha * hard + (1 - self.alpha) * soft)
+
+    def train_step(self, data):
+        x, y = data
+        teacher_probs = self.teacher(x, training=False)
+        with tf.GradientTape() as tape:
+            logits = self.student_logits(x, training=True)
+            loss = self._loss(y, logits, teacher_probs)
+        grads = tape.gradient(loss, self.student.trainable_variables)
+        self.optimizer.apply_gradients(zip(grads, self.student.trainable_variables))
+
+        self.loss_tracker.update_state(loss)
+        self.accuracy.update_state(y, logits)
+        return {m.name: m.result() for m in self.metrics}
+
+    def test_step(self, data):
+        x, y = data
+        logits = self.student_logits(x, training=False)
+        loss = self._loss(y, logits, self.teacher(x, training=False))
+
+        self.loss_tracker.update_state(loss)
+        self.accuracy.update_state(y, logits)
+        return {m.name: m.result() for m in self.metrics}
+
+    def call(self, x, training=False):
+        return self.student(x, training=training)
+
+
+class ResumeCheckpoint(Callback):
+    """
+    Sauvegarde à chaque fin d'époque le modèle complet (poids + état de
+    l'optimiseur) et le numéro d'époque, de façon atomique ; en fin
+    d'entraînement (arrêt anticipé ou dernière époque), marque le run terminé
+    """
+
+    def __init__(self, checkpoint_dir, run_config):
+        super().__init__()
+        self.checkpoint_dir = checkpoint_dir
+        self.run_config = run_config
+        self.model_path = os.path.join(checkpoint_dir, "last.keras")
+        self.state_path = os.path.join(checkpoint_dir, "state.json")
+
+    def load_state(self):
+        """État de la dernière époque terminée, ou None"""
+        if not (os.path.exists(self.model_path) and os.path.exists(self.state_path)):
+            return None
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, state):
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+        tmp_model = os.path.join(self.checkpoint_dir, "last.tmp.keras")
+        self.model.save(tmp_model)
+        os.replace(tmp_model, self.model_path)
+
+        tmp_state = self.state_path + ".tmp"
+        with open(tmp_state, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_state, self.state_path)
+
+    def on_epoch_end(self, epoch, logs=None):
+        previous = self.load_state() or {}
+        scores = [float(v) for v in (previous.get("best_val_accuracy"),
+                                     (logs or {}).get("val_accuracy")) if v is not None]
+        self._save({
+            "epoch": epoch + 1,
+            "best_val_accuracy": max(scores) if scores else None,
+            "config": self.run_config,
+            "finished": False,
+        })
+
+    def on_train_end(self, logs=None):
+        # Non appelé si le processus est interrompu : seul un run interrompu est repris.
+        # Après EarlyStopping (placé avant dans la liste) : poids restaurés sauvegardés.
+        state = self.load_state()
+        if state is None:
+            return
+        state.update(finished=True, stopped_early=bool(self.model.stop_training))
+        self._save(state)
+
+
+def train(csv_path="data/fer2013.csv", epochs=80, batch_size=64, output_dir="models",
+          seed=42, resume=True, smoke=False, cache_dir="data/cache", learning_rate=0.001,
+          verbose=1):
+    """
+    Entraîne (ou reprend) le modèle et l'évalue sur le test set
+
+    Args:
+        csv_path: dataset FER2013 (cache uint8 construit au premier appel)
+        epochs: nombre total d'époques (une reprise continue jusqu'à ce total)
+        output_dir: dossier du modèle final, du meilleur modèle et des checkpoints
+        seed: graine du découpage, du mélange et de l'initialisation
+        resume: reprendre un run interrompu depuis output_dir/checkpoints si la
+            configuration correspond (un run terminé, arrêt anticipé compris,
+            est seulement réévalué)
+        smoke: essai rapide (SMOKE_SIZE images, 1 époque, output_dir/smoke)
+
+    Returns:
+        dict: test_loss, test_accuracy, epochs_trained, model_path, resumed_from
+    """
+    if smoke:
+        epochs = min(epochs, 1)
+        output_dir = os.path.join(output_dir, "smoke")
+
+    tf.keras.utils.set_random_seed(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_dir = os.path.join(output_dir, "checkpoints")
+
+    print("\n📂 Chargement du dataset FER2013...")
+    splits = load_splits(csv_path, cache_dir, seed=seed,
+                         smoke_size=SMOKE_SIZE if smoke else None)
+    images, labels = splits["images"], splits["labels"]
+    num_classes = len(EMOTION_MAP)
+
+    print(f"   • Total d'images: {len(labels)}")
+    print(f"   • Distribution des émotions:")
+    for idx, count in enumerate(np.bincount(labels, minlength=num_classes)):
+        print(f"      {EMOTION_MAP[idx]}: {count}")
+    print(f"   • Train: {len(splits['train'])} images")
+    print(f"   • Validation: {len(splits['val'])} images")
+    print(f"   • Test: {len(splits['test'])} images")
+
+    train_ds = make_train_dataset(images[splits["train"]], labels[splits["train"]],
+                                  batch_size=batch_size, num_classes=num_classes, seed=seed)
+    val_ds = make_eval_dataset(images[splits["val"]], labels[splits["val"]], num_classes=num_classes)
+    test_ds = make_eval_dataset(images[splits["test"]], labels[splits["test"]], num_classes=num_classes)
+
+    # Une reprise n'a de sens qu'avec le même découpage et le même lot
+    run_config = {"seed": seed, "batch_size": batch_size, "smoke": smoke,
+                  "learning_rate": learning_rate}
+    resume_cb = ResumeCheckpoint(checkpoint_dir, run_config)
+    state = resume_cb.load_state() if resume else None
+    if state is not None and state.get("config") != run_config:
+        print(f"⚠️ Checkpoint ignoré (configuration différente: {state.get('config')})")
+        state = None
+
+    # Arrêt anticipé ou dernière époque atteinte : rien à reprendre (relancer
+    # fit() annulerait la décision de l'EarlyStopping, dont l'état n'est pas sauvegardé)
+    finished = state is not None and state.get("finished", False)
+    if finished:
+        print(f"\n✅ Entraînement déjà terminé ({state['epoch']} époques"
+              f"{', arrêt anticipé' if state.get('stopped_early') else ''}), évaluation seule")
+        model = tf.keras.models.load_model(resume_cb.model_path)
+        initial_epoch = state["epoch"]
+    elif state is not None:
+        print(f"\n♻️  Reprise après l'époque {state['epoch']} ({resume_cb.model_path})")
+        model = tf.keras.models.load_model(resume_cb.model_path)
+        initial_epoch = state["epoch"]
+    else:
+        print("\n🏗️  Construction du modèle CNN...")
+        model = build_model(num_classes, learning_rate=learning_rate)
+        initial_epoch = 0
+        if verbose:
+            model.summary()
+
+    best_path = os.path.join(output_dir, "emotion_model_best.h5")
+    best = state.get("best_val_accuracy") if state else None
+    checkpoint = ModelCheckpoint(
+        best_path,
+        monitor="val_accuracy",
+        save_best_only=True,
+        mode='max',
+        verbose=verbose,
+        # Après une reprise, ne pas écraser le meilleur modèle par un moins bon
+        initial_value_threshold=best
+    )
+
+    early_stop = EarlyStopping(
+        monitor="val_loss",
+        patience=15,
+        restore_best_weights=True,
+        verbose=verbose
+    )
+
+    reduce_lr = ReduceLROnPlateau(
+        monitor='val_loss',
+        factor=0.5,
+        patience=5,
+        min_lr=0.00001,
+        verbose=verbose
+    )
+
+    if finished:
+        pass
+    elif initial_epoch < epochs:
+        print(f"\n🚀 Entraînement: époques {initial_epoch + 1} à {epochs}")
+        model.fit(
+            train_ds,
+            validation_data=val_ds,
+            epochs=epochs,
+            initial_epoch=initial_epoch,
+            callbacks=[checkpoint, early_stop, reduce_lr, resume_cb],
+            verbose=verbose
+        )
+    else:
+        print(f"\n✅ Déjà entraîné sur {initial_epoch} époques, évaluation seule")
+
+    print("\n📈 Évaluation sur le test set...")
+    test_loss, test_acc = model.evaluate(test_ds, verbose=0)
+    print(f"   • Test Loss: {test_loss:.4f}")
+    print(f"   • Test Accuracy: {test_acc:.4f} ({test_acc*100:.2f}%)")
+
+    model_path = os.path.join(output_dir, "emotion_model.h5")
+    model.save(model_path)
+    with open(os.path.join(output_dir, "emotion_labels.json"), "w", encoding='utf-8') as f:
+        json.dump(EMOTION_MAP, f, ensure_ascii=False, indent=2)
+
+    final_state = resume_cb.load_state()
+    return {
+        "test_loss": float(test_loss),
+        "test_accuracy": float(test_acc),
+        "epochs_trained": final_state["epoch"] if final_state else initial_epoch,
+        "model_path": model_path,
+        "resumed_from": initial_epoch if state is not None else None,
+    }
+
+
+def distill(csv_path="data/fer2013.csv", teacher_path="models/emotion_model.h5", epochs=40,
+            batch_size=64, output_dir="models/student", temperature=4.0, alpha=0.1, width=32,
+            seed=42, smoke=False, cache_dir="data/cache", learning_rate=0.002, verbose=1):
+    """
+    Distille le modèle professeur dans un élève compact (build_student)
+
+    L'élève est sauvegardé comme un modèle ordinaire (output_dir/emotion_model.h5,
+    sortie softmax) avec le emotion_labels.json du professeur : il remplace
+    directement le modèle de référence dans EmotionDetector.
+
+    Returns:
+        dict: comparaison professeur / élève (précision, paramètres, taille,
+              latence 1 visage, débit par lot), aussi écrite dans
+              output_dir/distillation_report.json
+    """
+    from .profiling import profile
+
+    if smoke:
+        epochs = min(epochs, 1)
+        output_dir = os.path.join(output_dir, "smoke")
+
+    tf.keras.utils.set_random_seed(seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    print("\n📂 Chargement du dataset FER2013...")
+    splits = load_splits(csv_path, cache_dir, seed=seed,
+                         smoke_size=SMOKE_SIZE if smoke else None)
+    images, labels = splits["images"], splits["labels"]
+    num_classes = len(EMOTION_MAP)
+
+    train_ds = make_train_dataset(images[splits["train"]], labels[splits["train"]],
+                                  batch_size=batch_size, num_classes=num_classes, seed=seed)
+    val_ds = make_eval_dataset(images[splits["val"]], labels[splits["val"]], num_classes=num_classes)
+
+    print(f"\n👨‍🏫 Professeur: {teacher_path}")
+    teacher = tf.keras.models.load_model(teacher_path)
+    student = build_student(num_classes, width=width, learning_rate=learning_rate)
+    print(f"🎓 Élève: {student.count_params():,} paramètres "
+          f"(professeur: {teacher.count_params():,})")
+
+    distiller = Distiller(student, teacher, temperature=temperature, alpha=alpha)
+    distiller.compile(optimizer=Adam(learning_rate=learning_rate))
+
+    callbacks = [
+        EarlyStopping(monitor="val_accuracy", mode='max', patience=10,
+                      restore_best_weights=True, verbose=verbose),
+        ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=4,
+                          min_lr=0.00001, verbose=verbose)
+    ]
+
+    print(f"\n🚀 Distillation: {epochs} époques, T={temperature}, alpha={alpha}")
+    distiller.fit(train_ds, validation_data=val_ds, epochs=epochs,
+                  callbacks=callbacks, verbose=verbose)
+
+    model_path = os.path.join(output_dir, "emotion_model.h5")
+    student.save(model_path)
+    teacher_labels = os.path.join(os.path.dirname(teacher_path), "emotion_labels.json")
+    if os.path.exists(teacher_labels):
+        shutil.copyfile(teacher_labels, os.path.join(output_dir, "emotion_labels.json"))
+    else:
+        with open(os.path.join(output_dir, "emotion_labels.json"), "w", encoding='utf-8') as f:
+            json.dump(EMOTION_MAP, f, ensure_ascii=False, indent=2)
+
+    print("\n📈 Comparaison professeur / élève sur le test set...")
+    test_images, test_labels = images[splits["test"]], labels[splits["test"]]
+    report = {"temperature": temperature, "alpha": alpha, "width": width}
+    for name, model, path in (("teacher", teacher, teacher_path), ("student", student, model_path)):
+        metrics = profile(lambda x, m=model: m(x, training=False).numpy(), test_images, test_labels)
+        metrics.update(path=path, params=int(model.count_params()),
+                       size_bytes=os.path.getsize(path))
+        report[name] = metrics
+
+    report["speedup"] = report["teacher"]["latency_ms"] / max(report["student"]["latency_ms"], 1e-9)
+    report["accuracy_drop"] = report["teacher"]["accuracy"] - report["student"]["accuracy"]
+
+    tmp = os.path.join(output_dir, "distillation_report.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, os.path.join(output_dir, "distillation_report.json"))
+    report["model_path"] = model_path
+    return report